@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import g, jsonify, request
+
+# Signing secret for admin session tokens, from ADMIN_SESSION_SECRET. Without it a
+# secret is generated once and kept in MongoDB (SETTINGS_COLLECTION), so every
+# worker signs with the same key and sessions survive restarts.
+SETTINGS_COLLECTION = 'app_settings'
+_SESSION_SECRET = os.getenv('ADMIN_SESSION_SECRET', '').encode('utf-8') or None
+_session_secret_lock = threading.Lock()
+
+SESSION_TTL_SECONDS = int(os.getenv('ADMIN_SESSION_TTL_SECONDS', 8 * 3600))
+
+# bcrypt is imported lazily: only login/password routes need it.
+# bcrypt is deliberately slow (~250 ms per check); a small dedicated pool caps how
+# many hashes run at once, so a burst of logins cannot saturate the CPU. The
+# request thread still waits for its result.
+_bcrypt_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BCRYPT_WORKERS', 2)),
+    thread_name_prefix='bcrypt'
+)
+BCRYPT_TIMEOUT_SECONDS = 30
+
+
+def check_password(plain, hashed):
+    """bcrypt.checkpw on the dedicated bcrypt pool."""
+    import bcrypt
+    if not plain or not hashed:
+        return False
+    return _bcrypt_pool.submit(bcrypt.checkpw, plain.encode('utf-8'), hashed).result(timeout=BCRYPT_TIMEOUT_SECONDS)
+
+
+def hash_password(plain):
+    """bcrypt.hashpw with a fresh salt on the dedicated bcrypt pool."""
+    import bcrypt
+    return _bcrypt_pool.submit(bcrypt.hashpw, plain.encode('utf-8'), bcrypt.gensalt()).result(timeout=BCRYPT_TIMEOUT_SECONDS)
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _session_secret():
+    """ADMIN_SESSION_SECRET, or the secret shared through MongoDB (created by the first worker)."""
+    global _SESSION_SECRET
+    if _SESSION_SECRET is None:
+        with _session_secret_lock:
+            if _SESSION_SECRET is None:
+                from pymongo.errors import DuplicateKeyError
+                from db_config import db_manager
+                settings = db_manager.get_db()[SETTINGS_COLLECTION]
+                try:
+                    settings.update_one(
+                        {'_id': 'admin_session_secret'},
+                        {'$setOnInsert': {'secret': secrets.token_hex(32)}},
+                        upsert=True
+                    )
+                except DuplicateKeyError:
+                    pass  # another worker inserted it first
+                _SESSION_SECRET = bytes.fromhex(settings.find_one({'_id': 'admin_session_secret'})['secret'])
+    return _SESSION_SECRET
+
+
+def _sign(payload):
+    return hmac.new(_session_secret(), payload.encode('ascii'), hashlib.sha256).digest()
+
+
+def issue_session_token(username, ttl_seconds=None):
+    """Return (token, expires_at) for an authenticated admin.
+
+    The token is base64url(JSON claims) + '.' + base64url(HMAC-SHA256 of the claims).
+    """
+    now = int(time.time())
+    expires_at = now + (ttl_seconds or SESSION_TTL_SECONDS)
+    claims = {'sub': username, 'iat': now, 'exp': expires_at}
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f'{payload}.{_b64encode(_sign(payload))}', expires_at
+
+
+def verify_session_token(token):
+    """Return the token's claims if the signature is valid and it has not expired, else None."""
+    if not token or token.count('.') != 1:
+        return None
+    payload, signature = token.split('.')
+    try:
+        if not hmac.compare_digest(_sign(payload), _b64decode(signature)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or claims.get('exp', 0) < time.time():
+        return None
+    return claims
+
+
+def _token_from_request():
+    header = request.headers.get('Authorization', '')
+    if header.lower().startswith('bearer '):
+        return header[7:].strip()
+    return request.headers.get('X-Admin-Token', '').strip()
+
+
+def require_admin(view):
+    """Reject the request with 401 unless it carries a valid admin session token."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        claims = verify_session_token(_token_from_request())
+        if claims is None:
+            return jsonify({'error': 'Admin authentication required'}), 401
+        g.admin_username = claims.get('sub')
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,4 +1,7 @@
-from flask import Flask, request, jsonify
+import time
+# Measured from the first line so the startup log can report cold start time
+_IMPORT_STARTED = time.perf_counter()
+from flask import Flask, request, jsonify, Response, stream_with_context
 #from tasks import scrape_papers_task, cleanup_old_jobs_task, health_check_task
 #from scheduler_python import scheduler
 import os
@@ -7,15 +10,17 @@ import subprocess
 from flask_cors import CORS
 import urllib.parse
 import re
-from datetime import datetime
+from datetime import datetime, timezone
 import json
+import base64
+import hashlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from bson.objectid import ObjectId
 from werkzeug.utils import secure_filename
-import bcrypt
 import secrets
 import string
 import threading
-import time
 import uuid
 #from . import db_config
 #from db_config import db_manager
@@ -23,18 +28,39 @@ import uuid
 import sys, os
 sys.path.append(os.path.dirname(__file__))
 from db_config import db_manager
+from json_provider import BsonJSONProvider
+from admin_auth import check_password, hash_password, issue_session_token, require_admin
+from index_manager import ensure_collection_indexes, ensure_collection_indexes_async, reconcile_indexes
+from query_audit import audit_query_plans
+from citation_rollup import TotalCitationsWatcher, rebuild_total_citations
+from change_feed import ChangeFeedWatcher, read_changes, record_tombstone, stamp
+from citation_history import HISTORY_COLLECTION, load_series, paper_deltas, record_citation_snapshots, summarize_series
+from leaderboard import LEADERBOARD_METRICS, RANKINGS_COLLECTION, metric_for, refresh_rankings, teacher_rank, top_rankings
+from domain_normalizer import SYNONYMS_COLLECTION, NormalizerRegistry, renormalize_domains, seed_synonym_table
+from publication_ingest import PARSERS, SUPPORTED_FORMATS, compute_content_hash, detect_format, normalize_record
 import io
-import csv
-from openpyxl import load_workbook
+# openpyxl is only needed by the Excel import and export routes and is imported
+# inside them, so workers that only serve reads never load it
 
 load_dotenv()
 
 app = Flask(__name__)
+# Serializes ObjectId/datetime/Decimal128 natively, so handlers can jsonify query results as-is
+app.json = BsonJSONProvider(app)
 CORS(app)
 
 @app.route('/health', methods=['GET'])
 def health_check():
 	return jsonify({'status': 'ok'}), 200
+
+@app.route('/health/db', methods=['GET'])
+def db_health_check():
+    """MongoDB reachability and connection pool saturation for this worker"""
+    try:
+        db_manager.ping()
+        return jsonify({'status': 'ok', 'pool': db_manager.pool_stats()}), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': str(e), 'pool': db_manager.pool_stats()}), 503
 # -------- Awards config ---------
 def get_frontend_assets_dir():
     backend_dir = os.path.dirname(__file__)
@@ -52,6 +78,7 @@ def slugify_filename(name: str) -> str:
     return s or 'award'
 
 @app.route('/api/awards', methods=['POST'])
+@require_admin
 def add_award():
     """Add an ISFCR award with image URL; stores record in MongoDB awards collection."""
     try:
@@ -90,7 +117,7 @@ def add_award():
             'imageUrl': image_url,
             'createdAt': datetime.utcnow().isoformat()
         }
-        result = awards_collection.insert_one(doc)
+        result = awards_collection.insert_one(stamp(doc))
 
         print(f'[AWARDS] inserted id={str(result.inserted_id)}')
         # Build a JSON-safe award payload (avoid ObjectId in doc after insert_one)
@@ -114,8 +141,6 @@ def list_awards():
         db = db_manager.connect()
         awards_collection = db['awards']
         awards = list(awards_collection.find({}).sort([('createdAt', -1)]))
-        for a in awards:
-            a['_id'] = str(a['_id'])
         return jsonify({'success': True, 'awards': awards}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -123,6 +148,7 @@ def list_awards():
 
 # ---- Funding (Funds) endpoints ----
 @app.route('/api/funds', methods=['POST'])
+@require_admin
 def add_funding_record():
     """Create a funding/consultancy record in the 'funds' collection."""
     try:
@@ -165,7 +191,7 @@ def add_funding_record():
             'imageUrl': image_url,
             'createdAt': datetime.utcnow().isoformat()
         }
-        result = funds_collection.insert_one(doc)
+        result = funds_collection.insert_one(stamp(doc))
         doc['_id'] = str(result.inserted_id)
         return jsonify({'success': True, 'fund': doc}), 201
     except Exception as e:
@@ -178,14 +204,13 @@ def list_funding_records():
         db = db_manager.connect()
         funds_collection = db['funds']
         records = list(funds_collection.find({}).sort([('year', -1), ('createdAt', -1)]))
-        for r in records:
-            r['_id'] = str(r.get('_id'))
         return jsonify({'success': True, 'funds': records}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/funds/<fund_id>', methods=['PUT'])
+@require_admin
 def update_funding_record(fund_id):
     """Update an existing funding/consultancy record in the 'funds' collection."""
     try:
@@ -231,50 +256,162 @@ def update_funding_record(fund_id):
             'updatedAt': datetime.utcnow().isoformat()
         }
 
-        result = funds_collection.update_one({'_id': ObjectId(fund_id)}, {'$set': update_doc})
+        result = funds_collection.update_one({'_id': ObjectId(fund_id)}, {'$set': stamp(update_doc)})
         if result.matched_count == 0:
             return jsonify({'error': 'Funding record not found'}), 404
 
         # Return updated doc
         doc = funds_collection.find_one({'_id': ObjectId(fund_id)})
-        doc['_id'] = str(doc['_id'])
         return jsonify({'success': True, 'fund': doc}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# ---- Canonical publication fields ----
+# pubType and yearInt are computed once at write time so that stats endpoints can
+# count on an index instead of re-deriving type precedence and parsing year strings.
+PUBLICATION_TYPES = ['book', 'conference', 'patent', 'journal', 'other']
+
+def is_patent_flag(value):
+    """Return True for the boolean/string representations of the patent flag."""
+    return value is True or (isinstance(value, str) and value.strip().lower() == 'true')
+
+def classify_publication_type(paper_doc):
+    """Classify a paper as book, conference, patent, journal or other (in that precedence)."""
+    if paper_doc.get('book'):
+        return 'book'
+    if paper_doc.get('conference'):
+        return 'conference'
+    if is_patent_flag(paper_doc.get('patent')):
+        return 'patent'
+    if paper_doc.get('source') or paper_doc.get('journal'):
+        return 'journal'
+    return 'other'
+
+def extract_publication_year(paper_doc):
+    """Return the publication year as an int, falling back to the date fields, or None."""
+    year_value = paper_doc.get('year')
+    # Handle numeric year
+    try:
+        if year_value is not None and str(int(year_value)).isdigit():
+            return int(year_value)
+    except Exception:
+        pass
+
+    # Try common date fields
+    for date_key in ['publicationDate', 'grantedOn', 'filedOn']:
+        date_val = paper_doc.get(date_key)
+        if date_val and isinstance(date_val, str) and len(date_val) >= 4:
+            first_four = date_val[:4]
+            if first_four.isdigit():
+                return int(first_four)
+    return None
+
+def apply_canonical_publication_fields(paper_doc):
+    """Set pubType and yearInt on a paper document in place and return it."""
+    paper_doc['pubType'] = classify_publication_type(paper_doc)
+    paper_doc['yearInt'] = extract_publication_year(paper_doc)
+    return paper_doc
+
+# Fields classify_publication_type/extract_publication_year read, for papers not yet backfilled
+CANONICAL_SOURCE_FIELDS = {'book': 1, 'conference': 1, 'patent': 1, 'source': 1, 'journal': 1,
+                           'year': 1, 'publicationDate': 1, 'grantedOn': 1, 'filedOn': 1}
+# Stats match backfilled papers on the pubType index and the rest by the missing field
+CANONICAL_STATS_QUERY = {'$or': [{'pubType': {'$in': PUBLICATION_TYPES}}, {'pubType': {'$exists': False}}]}
+
+def canonical_publication_fields(paper_doc):
+    """(pubType, yearInt) from the stored fields, derived on the fly for papers not yet backfilled"""
+    if 'pubType' in paper_doc:
+        return paper_doc['pubType'], paper_doc.get('yearInt')
+    return classify_publication_type(paper_doc), extract_publication_year(paper_doc)
+
+def backfill_canonical_publication_fields(db, only_missing=False, batch_size=1000):
+    """Set pubType/yearInt on papers where they are stale (or, with only_missing, absent).
+
+    Returns {collection: papers updated}.
+    """
+    from pymongo import UpdateOne
+    per_collection = {}
+    for col_name in [col for col in db.list_collection_names() if col.startswith('papers_')]:
+        col = db.get_collection(col_name)
+        ensure_collection_indexes(db, col_name)
+        updated = 0
+        operations = []
+        query = {'pubType': {'$exists': False}} if only_missing else {}
+        for paper in col.find(query, {**CANONICAL_SOURCE_FIELDS, 'pubType': 1, 'yearInt': 1}):
+            pub_type = classify_publication_type(paper)
+            year_int = extract_publication_year(paper)
+            if paper.get('pubType') == pub_type and paper.get('yearInt', False) == year_int:
+                continue
+            operations.append(UpdateOne({'_id': paper['_id']}, {'$set': {'pubType': pub_type, 'yearInt': year_int}}))
+            if len(operations) >= batch_size:
+                updated += col.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += col.bulk_write(operations, ordered=False).modified_count
+        per_collection[col_name] = updated
+    return per_collection
+
+# Sparse fieldsets: default projections for list views, overridable with ?fields=a,b,c
+# (or ?fields=all for whole documents). _id is always returned.
+LIST_VIEW_FIELDS = {
+    'teachers': ['name', 'profileUrl', 'photoUrl', 'lastUpdated'],
+    # description/summary are only shown on the publication details page
+    'publications': ['title', 'url', 'authors', 'year', 'yearInt', 'pubType', 'citationCount', 'teacherName',
+                     'source', 'journal', 'conference', 'book', 'patent', 'inventors', 'patentOffice',
+                     'publicationDate', 'filedOn', 'grantedOn'],
+    'yearly_projects': ['year', 'teacherName', 'projectName', 'projectDescription', 'students', 'createdAt',
+                        'report', 'poster', 'category'],
+}
+_FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$')
+
+def parse_fields_param(view, args):
+    """Build the MongoDB projection for a list view from the fields= query parameter.
+
+    Returns None (whole documents) for fields=all. Raises ValueError on invalid field names.
+    """
+    raw = (args.get('fields') or '').strip()
+    if raw.lower() in ('all', '*'):
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()] if raw else LIST_VIEW_FIELDS[view]
+    for field in fields:
+        if not _FIELD_NAME.match(field):
+            raise ValueError(f'Invalid field name: {field}')
+    return {field: 1 for field in fields}
+
 # Task management for background processes
-task_store = {}
-task_lock = threading.Lock()
+# Task state lives in MongoDB so a status poll can be answered by any worker;
+# TASKS_COLLECTION has a TTL index on createdAt (see index_manager.py)
+TASKS_COLLECTION = 'tasks'
+_TASK_PROJECTION = {'_id': 0, 'createdAt': 0}
 
 def get_task_status(task_id):
     """Get the status of a background task"""
-    with task_lock:
-        return task_store.get(task_id, {'status': 'not_found'})
+    task = db_manager.get_db()[TASKS_COLLECTION].find_one({'_id': task_id}, _TASK_PROJECTION)
+    return task or {'status': 'not_found'}
 
 def update_task_status(task_id, status, result=None, error=None):
     """Update the status of a background task"""
-    with task_lock:
-        if task_id in task_store:
-            task_store[task_id].update({
-                'status': status,
-                'result': result,
-                'error': error,
-                'updated_at': datetime.now().isoformat()
-            })
+    db_manager.get_db()[TASKS_COLLECTION].update_one({'_id': task_id}, {'$set': {
+        'status': status,
+        'result': result,
+        'error': error,
+        'updated_at': datetime.now().isoformat()
+    }})
 
 def create_task(task_type, params):
     """Create a new background task"""
     task_id = str(uuid.uuid4())
-    with task_lock:
-        task_store[task_id] = {
-            'id': task_id,
-            'type': task_type,
-            'params': params,
-            'status': 'pending',
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
+    db_manager.get_db()[TASKS_COLLECTION].insert_one({
+        '_id': task_id,
+        'id': task_id,
+        'type': task_type,
+        'params': params,
+        'status': 'pending',
+        'created_at': datetime.now().isoformat(),
+        'updated_at': datetime.now().isoformat(),
+        'createdAt': datetime.utcnow()
+    })
     return task_id
 
 def run_scraping_task(task_id, profile_url):
@@ -316,6 +453,19 @@ def run_scraping_task(task_id, profile_url):
             pass
         
         if return_code == 0:
+            # Apply admin-defined synonyms to any domains the scraper just wrote
+            renormalize_domains(db_manager.get_collection('domains'), domain_normalizers.get())
+            # Index any papers_* collections the scraper created
+            reconcile_indexes(db_manager.get_db())
+            # Citations per year may have changed
+            rebuild_total_citations(db_manager.get_db())
+            record_citation_snapshots(db_manager.get_db())
+            mark_citation_matrix_dirty()
+            refresh_all_teacher_stats()
+            rebuild_coauthor_graph()
+            cluster_publications(db_manager.get_db())
+            mark_suggest_index_stale()
+            rebuild_text_index()
             update_task_status(task_id, 'completed', {'message': 'Scraping completed successfully'})
         else:
             update_task_status(task_id, 'failed', error=stderr)
@@ -387,6 +537,20 @@ def run_update_all_task(task_id):
             except:
                 pass
         
+        # Apply admin-defined synonyms to any domains the scraper just wrote
+        renormalize_domains(db_manager.get_collection('domains'), domain_normalizers.get())
+        # Index any papers_* collections the scraper created
+        reconcile_indexes(db_manager.get_db())
+        # Citations per year may have changed
+        rebuild_total_citations(db_manager.get_db())
+        record_citation_snapshots(db_manager.get_db())
+        mark_citation_matrix_dirty()
+        refresh_all_teacher_stats()
+        rebuild_coauthor_graph()
+        cluster_publications(db_manager.get_db())
+        mark_suggest_index_stale()
+        rebuild_text_index()
+
         # Complete task (Elasticsearch sync removed)
         update_task_status(task_id, 'completed', {
             'message': f'Update completed for {len(teachers)} teachers',
@@ -398,6 +562,7 @@ def run_update_all_task(task_id):
 
 # Background task endpoints
 @app.route('/tasks/start-scraping', methods=['POST'])
+@require_admin
 def start_scraping_task():
     """Start a background scraping task"""
     try:
@@ -423,6 +588,7 @@ def start_scraping_task():
         return jsonify({'error': str(error)}), 500
 
 @app.route('/tasks/start-update-all', methods=['POST'])
+@require_admin
 def start_update_all_task():
     """Start a background update all task"""
     try:
@@ -457,8 +623,7 @@ def get_task_status_endpoint(task_id):
 def list_tasks():
     """List all background tasks"""
     try:
-        with task_lock:
-            tasks = list(task_store.values())
+        tasks = list(db_manager.get_db()[TASKS_COLLECTION].find({}, _TASK_PROJECTION).sort('createdAt', -1))
         return jsonify({'tasks': tasks}), 200
     except Exception as error:
         return jsonify({'error': str(error)}), 500
@@ -468,7 +633,7 @@ def get_papers_count():
     """Get count of papers in database from all teacher collections"""
     try:
         from db_config import get_collection
-        db = get_collection('teachers').database
+        db = db_manager.get_analytics_db()
         all_collections = db.list_collection_names()
         teacher_paper_collections = [col for col in all_collections if col.startswith('papers_')]
         
@@ -522,12 +687,14 @@ def get_teachers():
         from db_config import get_collection
         teachers_collection = get_collection('teachers')
         
-        # Get all teachers, including _id, and convert _id to string
-        teachers = list(teachers_collection.find({}))
-        for teacher in teachers:
-            if '_id' in teacher:
-                teacher['_id'] = str(teacher['_id'])
-        
+        try:
+            projection = parse_fields_param('teachers', request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Get all teachers, including _id
+        teachers = list(teachers_collection.find({}, projection))
+
         return jsonify({
             'teachers': teachers,
             'total': len(teachers)
@@ -574,49 +741,113 @@ def get_teacher(teacher_id):
         print(f"Error in get_teacher: {error}")
         return jsonify({'error': str(error)}), 500
 
+# Per-teacher publication stats are kept in a rollup collection, refreshed whenever the
+# API writes that teacher's papers and after scrapes. Writes made outside the API (the
+# Node scheduler) are picked up once a rollup is older than TEACHER_STATS_MAX_AGE_SECONDS.
+TEACHER_STATS_COLLECTION = 'teacher_stats'
+TEACHER_STATS_MAX_AGE_SECONDS = int(os.getenv('TEACHER_STATS_MAX_AGE_SECONDS', 3600))
+TEACHER_STATS_FIELDS = ['journal_count', 'conference_count', 'book_count', 'patent_count', 'total_papers', 'total_citations']
+
+def compute_teacher_stats(papers_collection):
+    """Publication counts by type plus totals in a single $facet aggregation"""
+    result = next(papers_collection.aggregate([
+        {'$facet': {
+            'byType': [
+                {'$match': {'pubType': {'$exists': True}}},
+                {'$group': {'_id': '$pubType', 'count': {'$sum': 1}}}
+            ],
+            # Papers written before the pubType backfill are classified from their source fields
+            'untyped': [{'$match': {'pubType': {'$exists': False}}}, {'$project': CANONICAL_SOURCE_FIELDS}],
+            'totals': [{'$group': {'_id': None, 'papers': {'$sum': 1}, 'citations': {'$sum': '$citationCount'}}}]
+        }}
+    ]), {})
+    by_type = Counter({row['_id']: row['count'] for row in result.get('byType', [])})
+    by_type.update(classify_publication_type(paper) for paper in result.get('untyped', []))
+    totals = (result.get('totals') or [{}])[0]
+    return {
+        'journal_count': by_type.get('journal', 0),
+        'conference_count': by_type.get('conference', 0),
+        'book_count': by_type.get('book', 0),
+        'patent_count': by_type.get('patent', 0),
+        'total_papers': totals.get('papers', 0),
+        'total_citations': totals.get('citations', 0)
+    }
+
+def refresh_teacher_stats(teacher_name, update_rankings=True):
+    """Recompute one teacher's stats and store them in the rollup (and the leaderboard)"""
+    from db_config import get_collection
+    collection_name = 'papers_' + re.sub(r'[^a-z0-9]', '_', teacher_name.lower())
+    stats = compute_teacher_stats(get_collection(collection_name))
+    get_collection(TEACHER_STATS_COLLECTION).update_one(
+        {'teacherName': teacher_name},
+        {'$set': {**stats, 'updatedAt': datetime.utcnow()}},
+        upsert=True
+    )
+    invalidate_teacher_profile(teacher_name)
+    if update_rankings:
+        refresh_rankings(db_manager.get_db(), [teacher_name])
+    return stats
+
+def refresh_all_teacher_stats():
+    """Rebuild the rollup for every teacher, e.g. after a scrape"""
+    from db_config import get_collection
+    names = [t['name'] for t in get_collection('teachers').find({}, {'name': 1, '_id': 0}) if t.get('name')]
+    for name in names:
+        refresh_teacher_stats(name, update_rankings=False)
+    get_collection(TEACHER_STATS_COLLECTION).delete_many({'teacherName': {'$nin': names}})
+    refresh_rankings(db_manager.get_db())
+    return len(names)
+
+def load_teacher_stats(teacher_names):
+    """Return {teacherName: stats} from the rollup, recomputing missing or stale entries"""
+    from db_config import get_collection
+    stale_before = datetime.utcnow().timestamp() - TEACHER_STATS_MAX_AGE_SECONDS
+    projection = {'_id': 0, 'teacherName': 1, 'updatedAt': 1, **{f: 1 for f in TEACHER_STATS_FIELDS}}
+    rollups = {
+        doc['teacherName']: doc
+        for doc in get_collection(TEACHER_STATS_COLLECTION).find({'teacherName': {'$in': list(teacher_names)}}, projection)
+    }
+    stats = {}
+    for name in teacher_names:
+        doc = rollups.get(name)
+        updated_at = doc.get('updatedAt') if doc else None
+        if updated_at is None or updated_at.replace(tzinfo=timezone.utc).timestamp() < stale_before:
+            stats[name] = refresh_teacher_stats(name)
+        else:
+            stats[name] = {f: doc.get(f, 0) for f in TEACHER_STATS_FIELDS}
+    return stats
+
+@app.route('/teachers/stats', methods=['GET'])
+def get_all_teacher_stats():
+    """Publication stats for all teachers, or for ?names=a,b,c, in one response"""
+    try:
+        from db_config import get_collection
+        requested = [n.strip() for n in (request.args.get('names') or '').split(',') if n.strip()]
+        known = {t['name'] for t in get_collection('teachers').find(
+            {'name': {'$in': requested}} if requested else {}, {'name': 1, '_id': 0}
+        ) if t.get('name')}
+        stats = load_teacher_stats(sorted(known))
+        response = {'stats': stats, 'total': len(stats)}
+        missing = [n for n in requested if n not in known]
+        if missing:
+            response['notFound'] = missing
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/teachers/<teacher_id>/stats', methods=['GET'])
 def get_teacher_stats(teacher_id):
     """Get statistics for an individual teacher (journal vs. conference papers)."""
     try:
-        print(f"=== GET /teachers/{teacher_id}/stats ===")
         from db_config import get_collection
         teachers_collection = get_collection('teachers')
         decoded_teacher_id = urllib.parse.unquote(teacher_id)
-        print(f"Looking for teacher with name: '{decoded_teacher_id}'")
-        teacher = teachers_collection.find_one({'name': decoded_teacher_id})
+        teacher = teachers_collection.find_one({'name': decoded_teacher_id}, {'name': 1})
         if not teacher:
-            all_teachers = list(teachers_collection.find({}, {'name': 1, '_id': 0}))
-            print(f"Available teachers: {[t['name'] for t in all_teachers]}")
             print(f"404: Teacher '{decoded_teacher_id}' not found")
             return jsonify({'error': 'Teacher not found'}), 404
-        teacher_name = teacher['name']
-        collection_name = 'papers_' + re.sub(r'[^a-z0-9]', '_', teacher_name.lower())
-        print(f"Using collection: {collection_name}")
-        papers_collection = get_collection(collection_name)
-        # Count journals: papers with non-empty journal field OR non-empty source field
-        journal_count = papers_collection.count_documents({
-            '$or': [
-                {'journal': {'$exists': True, '$ne': ''}},
-                {'source': {'$exists': True, '$ne': ''}}
-            ]
-        })
-        conference_count = papers_collection.count_documents({'conference': {'$exists': True, '$ne': ''}})
-        book_count = papers_collection.count_documents({'book': {'$exists': True, '$ne': ''}})
-        # Count patents with more robust query to handle different boolean representations
-        patent_count = papers_collection.count_documents({
-            '$or': [
-                {'patent': True},
-                {'patent': 'true'},
-                {'patent': 'True'}
-            ]
-        })
-        print(f"Journal count: {journal_count}, Conference count: {conference_count}, Book count: {book_count}, Patent count: {patent_count}")
-        return jsonify({
-            'journal_count': journal_count,
-            'conference_count': conference_count,
-            'book_count': book_count,
-            'patent_count': patent_count
-        }), 200
+        stats = load_teacher_stats([teacher['name']])[teacher['name']]
+        return jsonify(stats), 200
     except Exception as e:
         print(f"Error in get_teacher_stats: {e}")
         return jsonify({'error': str(e)}), 500
@@ -706,15 +937,64 @@ def get_teacher_citations(teacher_id):
         return jsonify({'error': str(error)}), 500
 
 @app.route('/admin/scrape', methods=['POST'])
+@require_admin
 def admin_scrape():
     """Start background scraping - returns immediately with task ID"""
     return start_scraping_task()
 
 @app.route('/admin/update-all', methods=['POST'])
+@require_admin
 def admin_update_all():
     """Start background update all - returns immediately with task ID"""
     return start_update_all_task()
 
+# Keyset pagination for publications, ordered by (citationCount desc, _id asc) to match
+# the compound index declared in index_manager
+PUBLICATION_SORT = [('citationCount', -1), ('_id', 1)]
+PUBLICATION_PAGE_MAX = 200
+PUBLICATION_COUNT_TTL_SECONDS = 300
+_publication_counts = {}
+_publication_counts_lock = threading.Lock()
+
+def cached_publication_count(papers_collection):
+    """Paper count for a teacher collection, cached per process until a write or TTL expiry"""
+    now = time.monotonic()
+    with _publication_counts_lock:
+        cached = _publication_counts.get(papers_collection.name)
+    if cached and now - cached[1] < PUBLICATION_COUNT_TTL_SECONDS:
+        return cached[0]
+    count = papers_collection.estimated_document_count()
+    with _publication_counts_lock:
+        _publication_counts[papers_collection.name] = (count, now)
+    return count
+
+def invalidate_publication_count(collection_name):
+    with _publication_counts_lock:
+        _publication_counts.pop(collection_name, None)
+
+def encode_publication_cursor(paper):
+    """Opaque cursor for the position just after this paper"""
+    raw = json.dumps([paper.get('citationCount'), str(paper['_id'])], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+def decode_publication_cursor(token):
+    """Return the MongoDB filter for papers after the cursor; raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        citation_count, paper_id = json.loads(raw)
+        paper_id = ObjectId(paper_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not (citation_count is None or (isinstance(citation_count, int) and not isinstance(citation_count, bool))):
+        # Stored counts are ints; anything else would build a filter matching the wrong papers
+        raise ValueError('Invalid cursor')
+    same_count = {'citationCount': citation_count, '_id': {'$gt': paper_id}}
+    if citation_count is None:
+        # Papers without a citation count sort last; only ties remain
+        return same_count
+    # Missing/null counts sort after every number in descending order
+    return {'$or': [{'citationCount': {'$lt': citation_count}}, {'citationCount': None}, same_count]}
+
 @app.route('/teachers/<teacher_id>/publications', methods=['GET'])
 def get_teacher_publications(teacher_id):
     """Get all publications for a teacher, sorted by number of citations (descending)"""
@@ -735,12 +1015,32 @@ def get_teacher_publications(teacher_id):
         collection_name = 'papers_' + re.sub(r'[^a-z0-9]', '_', teacher_name.lower())
         print(f"Using collection: {collection_name}")
         teacher_papers_collection = get_collection(collection_name)
+        try:
+            projection = parse_fields_param('publications', request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        after = request.args.get('after')
+        if after or request.args.get('limit'):
+            # Keyset pagination: every page is an index range scan, however deep
+            try:
+                limit = min(max(int(request.args.get('limit', 50)), 1), PUBLICATION_PAGE_MAX)
+                query = decode_publication_cursor(after) if after else {}
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if projection is not None:
+                projection['citationCount'] = 1
+            papers = list(teacher_papers_collection.find(query, projection).sort(PUBLICATION_SORT).limit(limit + 1))
+            next_cursor = encode_publication_cursor(papers[limit - 1]) if len(papers) > limit else None
+            papers = papers[:limit]
+            return jsonify({
+                'publications': papers,
+                'total': cached_publication_count(teacher_papers_collection),
+                'limit': limit,
+                'nextCursor': next_cursor
+            }), 200
+
         # Do not exclude _id so it is included in the response
-        papers = list(teacher_papers_collection.find({}).sort('citationCount', -1))
-        # Convert _id to string for each paper
-        for paper in papers:
-            if '_id' in paper:
-                paper['_id'] = str(paper['_id'])
+        papers = list(teacher_papers_collection.find({}, projection).sort(PUBLICATION_SORT))
         print(f"Found {len(papers)} papers for teacher {teacher_name}")
         return jsonify({'publications': papers, 'total': len(papers)}), 200
     except Exception as error:
@@ -796,6 +1096,7 @@ def get_publication_details(teacher_id, publication_id):
         return jsonify({'error': str(error)}), 500
 
 @app.route('/teachers/<teacher_id>/publications/<pub_id>', methods=['DELETE'])
+@require_admin
 def delete_teacher_publication(teacher_id, pub_id):
     """Delete a publication by ObjectId from a teacher's papers collection"""
     try:
@@ -805,7 +1106,13 @@ def delete_teacher_publication(teacher_id, pub_id):
         collection_name = 'papers_' + re.sub(r'[^a-z0-9]', '_', decoded_teacher_id.lower())
         papers_collection = get_collection(collection_name)
         result = papers_collection.delete_one({'_id': ObjectId(pub_id)})
+        invalidate_publication_count(collection_name)
         if result.deleted_count == 1:
+            refresh_teacher_stats(decoded_teacher_id)
+            from near_duplicates import SIGNATURES_COLLECTION
+            get_collection(SIGNATURES_COLLECTION).delete_one({'_id': f'{collection_name}:{pub_id}'})
+            mark_suggest_index_stale()
+            remove_from_text_index(pub_id)
             return jsonify({'message': 'Publication deleted'}), 200
         else:
             return jsonify({'error': 'Publication not found'}), 404
@@ -867,6 +1174,7 @@ def search_papers():
                     'conference': doc.get('conference', ''),
                     'book': doc.get('book', ''),
                     'pdfLink': doc.get('pdfLink', ''),
+                    'clusterId': doc.get('clusterId'),
                 })
 
         seen_keys = set()
@@ -884,7 +1192,8 @@ def search_papers():
                 raw_authors = str(raw_authors or '')
             authors = raw_authors.strip().lower()
 
-            key = f"{title}|{year}|{authors}"
+            # Near-duplicates (same paper under several teachers) share a clusterId
+            key = hit.get('clusterId') or f"{title}|{year}|{authors}"
             if key in seen_keys:
                 continue
             seen_keys.add(key)
@@ -892,12 +1201,12 @@ def search_papers():
 
         final_results = unique_results[:max(1, limit)]
 
-                return jsonify({
-                    'query': query,
+        return jsonify({
+            'query': query,
             'total_results': len(final_results),
             'results': final_results
-                }), 200
-            
+        }), 200
+
     except Exception as error:
         return jsonify({'error': 'Error performing search', 'message': str(error)}), 500
 
@@ -906,39 +1215,31 @@ def get_community_stats():
     """Get aggregated community-wide statistics from all teacher paper collections."""
     try:
         from db_config import get_collection
-        db = get_collection('teachers').database
+        db = db_manager.get_analytics_db()
         all_collections = db.list_collection_names()
         teacher_paper_collections = [col for col in all_collections if col.startswith('papers_')]
         
-        # Gather all papers from all teacher collections
-        all_papers = []
+        # De-duplicate papers by near-duplicate cluster (falling back to URL for papers
+        # not yet clustered) before counting
+        seen_keys = set()
+        type_counts = {pub_type: 0 for pub_type in PUBLICATION_TYPES}
         for col_name in teacher_paper_collections:
             col = db.get_collection(col_name)
-            papers = list(col.find({}))
-            all_papers.extend(papers)
-        
-        # De-duplicate papers by URL before counting
-        papers_by_url = {}
-        for paper in all_papers:
-            url = paper.get('url')
-            if url and url not in papers_by_url:
-                papers_by_url[url] = paper
-        unique_papers = list(papers_by_url.values())
-        
-        journal_count = 0
-        conference_count = 0
-        book_count = 0
-        patent_count = 0
-        
-        for paper in unique_papers:
-            if (paper.get('journal') or paper.get('source')):
-                journal_count += 1
-            if paper.get('conference'):
-                conference_count += 1
-            if paper.get('book'):
-                book_count += 1
-            if paper.get('patent') is True or paper.get('patent') == True or (isinstance(paper.get('patent'), str) and paper.get('patent').lower() == 'true'):
-                patent_count += 1
+            cursor = col.find(
+                CANONICAL_STATS_QUERY,
+                {'_id': 0, 'pubType': 1, 'url': 1, 'clusterId': 1, **CANONICAL_SOURCE_FIELDS}
+            )
+            for paper in cursor:
+                key = paper.get('clusterId') or paper.get('url')
+                if not key or key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                type_counts[canonical_publication_fields(paper)[0]] += 1
+
+        journal_count = type_counts['journal']
+        conference_count = type_counts['conference']
+        book_count = type_counts['book']
+        patent_count = type_counts['patent']
         
         return jsonify({
             'journal_count': journal_count,
@@ -955,126 +1256,50 @@ def get_community_yearly_stats():
     """Aggregate year-wise publication, journal, conference, book, and patent counts from all teachers' papers collections."""
     try:
         from db_config import get_collection
-        import re
-        from datetime import datetime
-        import pymongo
 
         debug_info = []
 
         # Get all teacher collections
-        db = get_collection('teachers').database
+        db = db_manager.get_analytics_db()
         all_collections = db.list_collection_names()
         teacher_paper_collections = [col for col in all_collections if col.startswith('papers_') and col != 'papers']
 
         debug_info.append(f"Found {len(teacher_paper_collections)} teacher paper collections")
 
-        # Gather all papers from all teacher collections
-        all_papers = []
+        # Read only the canonical fields and de-duplicate by cluster (or URL) on the fly
+        seen_keys = set()
+        total_papers = 0
+        yearly_data = {}
+        type_to_bucket = {'book': 'books', 'conference': 'conferences', 'patent': 'patents', 'journal': 'journals'}
         for col_name in teacher_paper_collections:
             col = db.get_collection(col_name)
-            papers = list(col.find({}))
-            debug_info.append(f"Collection {col_name}: {len(papers)} papers")
-            all_papers.extend(papers)
-
-        debug_info.append(f"Total papers before deduplication: {len(all_papers)}")
-
-        # De-duplicate by URL
-        papers_by_url = {}
-        for paper in all_papers:
-            url = paper.get('url')
-            if url and url not in papers_by_url:
-                papers_by_url[url] = paper
-        unique_papers = list(papers_by_url.values())
-
-        debug_info.append(f"Unique papers after deduplication: {len(unique_papers)}")
-
-        yearly_data = {}
-        books_count = 0
-        conferences_count = 0
-        journals_count = 0
-        patents_count = 0
-        
-        book_examples = []
-        journal_examples = []
-        conference_examples = []
-        
-        def extract_year_from_paper(paper_doc):
-            year_value = paper_doc.get('year')
-            # Handle numeric year
-            try:
-                if year_value is not None and str(int(year_value)).isdigit():
-                    return int(year_value)
-            except Exception:
-                pass
-
-            # Try common date fields
-            for date_key in ['publicationDate', 'grantedOn', 'filedOn']:
-                date_val = paper_doc.get(date_key)
-                if date_val and isinstance(date_val, str) and len(date_val) >= 4:
-                    first_four = date_val[:4]
-                    if first_four.isdigit():
-                        return int(first_four)
-            return None
-
-        for paper in unique_papers:
-            year = extract_year_from_paper(paper)
-            if year is None:
-                continue
-            if year not in yearly_data:
-                yearly_data[year] = {
-                    'conferences': 0, 'journals': 0, 'books': 0, 'patents': 0, 'papers': 0
-                }
-            yearly_data[year]['papers'] += 1
-
-            # Categorize the paper
-            source = paper.get('source')
-            journal = paper.get('journal')
-            conference = paper.get('conference')
-            book = paper.get('book')
-            patent = paper.get('patent')
-
-            # Check for books first (non-empty book field)
-            if book:
-                yearly_data[year]['books'] += 1
-                books_count += 1
-                if len(book_examples) < 3:
-                    book_examples.append({
-                        'title': paper.get('title', 'No title')[:100],
-                        'book': str(book),
-                        'source': str(source) if source else '',
-                        'journal': str(journal) if journal else '',
-                        'conference': str(conference) if conference else ''
-                    })
-            # Check for conferences (non-empty conference field)
-            elif conference:
-                yearly_data[year]['conferences'] += 1
-                conferences_count += 1
-                if len(conference_examples) < 3:
-                    conference_examples.append({
-                        'title': paper.get('title', 'No title')[:100],
-                        'conference': str(conference),
-                        'source': str(source) if source else '',
-                        'journal': str(journal) if journal else '',
-                        'book': str(book) if book else ''
-                    })
-            # Check for patents (patent field True or "true")
-            elif patent is True or patent == True or (isinstance(patent, str) and patent.lower() == 'true'):
-                yearly_data[year]['patents'] += 1
-                patents_count += 1
-            # Check for journals (non-empty source field OR non-empty journal field)
-            elif source or journal:
-                yearly_data[year]['journals'] += 1
-                journals_count += 1
-                if len(journal_examples) < 3:
-                    journal_examples.append({
-                        'title': paper.get('title', 'No title')[:100],
-                        'source': str(source) if source else '',
-                        'journal': str(journal) if journal else '',
-                        'conference': str(conference) if conference else '',
-                        'book': str(book) if book else ''
-                    })
-
-        debug_info.append(f"Final counts - Books: {books_count}, Conferences: {conferences_count}, Journals: {journals_count}, Patents: {patents_count}")
+            collection_count = 0
+            cursor = col.find(
+                CANONICAL_STATS_QUERY,
+                {'_id': 0, 'pubType': 1, 'yearInt': 1, 'url': 1, 'clusterId': 1, **CANONICAL_SOURCE_FIELDS}
+            )
+            for paper in cursor:
+                collection_count += 1
+                key = paper.get('clusterId') or paper.get('url')
+                if not key or key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                pub_type, year = canonical_publication_fields(paper)
+                if year is None:
+                    continue
+                if year not in yearly_data:
+                    yearly_data[year] = {
+                        'conferences': 0, 'journals': 0, 'books': 0, 'patents': 0, 'papers': 0
+                    }
+                yearly_data[year]['papers'] += 1
+                bucket = type_to_bucket.get(pub_type)
+                if bucket:
+                    yearly_data[year][bucket] += 1
+            debug_info.append(f"Collection {col_name}: {collection_count} papers")
+            total_papers += collection_count
+
+        debug_info.append(f"Total papers before deduplication: {total_papers}")
+        debug_info.append(f"Unique papers after deduplication: {len(seen_keys)}")
 
         # Convert to list of objects for the frontend, sorted by year
         yearly_stats = [{'year': y, **data} for y, data in sorted(yearly_data.items())]
@@ -1099,17 +1324,22 @@ def get_community_yearly_stats():
         return jsonify({
             'summary': summary,
             'yearly_stats': yearly_stats,
-            'debug_info': debug_info,
-            'examples': {
-                'books': book_examples,
-                'journals': journal_examples,
-                'conferences': conference_examples
-            }
+            'debug_info': debug_info
         }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def stored_citations_per_year(papers_collection):
+    """Sum citationCount by publication year over a teacher's papers, sorted by year"""
+    citations_per_year = {}
+    for paper in papers_collection.find({}, {'_id': 0, 'year': 1, 'citationCount': 1}):
+        year = paper.get('year')
+        count = paper.get('citationCount', 0)
+        if year and str(year).isdigit():
+            citations_per_year[year] = citations_per_year.get(year, 0) + int(count or 0)
+    return dict(sorted(citations_per_year.items(), key=lambda x: x[0]))
+
 @app.route('/teachers/<teacher_id>/citations/stored', methods=['GET'])
 def get_stored_citations_by_year(teacher_id):
     """Aggregate total citationCount by publication year for a teacher from their papers collection."""
@@ -1129,14 +1359,7 @@ def get_stored_citations_by_year(teacher_id):
         teacher_name = teacher['name']
         collection_name = 'papers_' + re.sub(r'[^a-z0-9]', '_', teacher_name.lower())
         print(f"Using collection: {collection_name}")
-        papers_collection = get_collection(collection_name)
-        citations_per_year = {}
-        for paper in papers_collection.find({}):
-            year = paper.get('year')
-            count = paper.get('citationCount', 0)
-            if year and str(year).isdigit():
-                citations_per_year[year] = citations_per_year.get(year, 0) + int(count)
-        sorted_citations = dict(sorted(citations_per_year.items(), key=lambda x: x[0]))
+        sorted_citations = stored_citations_per_year(get_collection(collection_name))
         print(f"Citations per year: {sorted_citations}")
         return jsonify({
             'teacherName': teacher_name,
@@ -1146,6 +1369,33 @@ def get_stored_citations_by_year(teacher_id):
         print(f"Error in get_stored_citations_by_year: {error}")
         return jsonify({'error': str(error)}), 500
 
+def scraped_citations_summary(citations_collection, teacher_name):
+    """Citations per year, totals and h/i10 indexes scraped from Google Scholar for one teacher"""
+    citation_doc = citations_collection.find_one({'teacherName': teacher_name})
+    if not citation_doc:
+        return {
+            'teacherName': teacher_name,
+            'citationsPerYear': {},
+            'lastUpdated': None,
+            'totalCitations': 0,
+            'hIndex': 0,
+            'i10Index': 0
+        }
+
+    # Convert Map to dict if needed
+    citations_per_year = citation_doc.get('citationsPerYear', {})
+    if hasattr(citations_per_year, 'to_dict'):
+        citations_per_year = citations_per_year.to_dict()
+
+    return {
+        'teacherName': citation_doc['teacherName'],
+        'citationsPerYear': citations_per_year,
+        'lastUpdated': citation_doc.get('lastUpdated'),
+        'totalCitations': sum(v for v in citations_per_year.values() if isinstance(v, (int, float))),
+        'hIndex': citation_doc.get('hIndex', 0),
+        'i10Index': citation_doc.get('i10Index', 0)
+    }
+
 @app.route('/teachers/<teacher_id>/citations/scraped', methods=['GET'])
 def get_scraped_citations_by_year(teacher_id):
     """Get citations by year for a teacher from the citations collection (scraped from Google Scholar)."""
@@ -1166,45 +1416,137 @@ def get_scraped_citations_by_year(teacher_id):
             print(f"404: Teacher '{decoded_teacher_id}' not found")
             return jsonify({'error': 'Teacher not found'}), 404
         
-        # Get citations from citations collection using teacherName
-        citation_doc = citations_collection.find_one({'teacherName': teacher['name']})
-        
-        if not citation_doc:
-            print(f"No citation data found for teacher {teacher['name']}")
-            return jsonify({
-                'teacherName': teacher['name'],
-                'citationsPerYear': {},
-                'lastUpdated': None,
-                'totalCitations': 0,
-                'hIndex': 0,
-                'i10Index': 0
-            }), 200
-        
-        # Convert Map to dict if needed
-        citations_per_year = citation_doc.get('citationsPerYear', {})
-        if hasattr(citations_per_year, 'to_dict'):
-            citations_per_year = citations_per_year.to_dict()
-        
-        # Calculate total citations
-        total_citations = sum(v for v in citations_per_year.values() if isinstance(v, (int, float)))
-        h_index = citation_doc.get('hIndex', 0)
-        i10_index = citation_doc.get('i10Index', 0)
-        
-        print(f"Found citation data for {teacher['name']}: {citations_per_year}")
-        return jsonify({
-            'teacherName': citation_doc['teacherName'],
-            'citationsPerYear': citations_per_year,
-            'lastUpdated': citation_doc.get('lastUpdated'),
-            'totalCitations': total_citations,
-            'hIndex': h_index,
-            'i10Index': i10_index
-        }), 200
+        return jsonify(scraped_citations_summary(citations_collection, teacher['name'])), 200
         
     except Exception as error:
         print(f"Error in get_scraped_citations_by_year: {error}")
         return jsonify({'error': str(error)}), 500
 
+# ---- Composite teacher profile ----
+PROFILE_SECTIONS = ['stats', 'citations', 'storedCitations', 'publications']
+PROFILE_CACHE_TTL_SECONDS = int(os.getenv('PROFILE_CACHE_TTL_SECONDS', 60))
+# LRU bound on cached profiles (one entry per teacher and include= combination)
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', 500))
+# Largest N accepted by include=publications:topN
+PROFILE_MAX_TOP_PUBLICATIONS = 200
+# Sections of one profile are assembled in parallel on this pool
+_profile_pool = ThreadPoolExecutor(max_workers=int(os.getenv('PROFILE_WORKERS', 8)), thread_name_prefix='profile')
+_profile_cache = OrderedDict()
+_profile_cache_lock = threading.Lock()
+
+def _cached_profile(cache_key):
+    """(etag, body) of a fresh cached profile, marked as recently used; None when missing or expired"""
+    with _profile_cache_lock:
+        cached = _profile_cache.get(cache_key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[2] >= PROFILE_CACHE_TTL_SECONDS:
+            del _profile_cache[cache_key]
+            return None
+        _profile_cache.move_to_end(cache_key)
+        return cached[0], cached[1]
+
+def _store_profile(cache_key, etag, body):
+    """Cache a profile, then evict expired entries and the least recently used beyond the bound"""
+    now = time.monotonic()
+    with _profile_cache_lock:
+        _profile_cache[cache_key] = (etag, body, now)
+        _profile_cache.move_to_end(cache_key)
+        for key in [k for k, v in _profile_cache.items() if now - v[2] >= PROFILE_CACHE_TTL_SECONDS]:
+            del _profile_cache[key]
+        while len(_profile_cache) > PROFILE_CACHE_MAX_ENTRIES:
+            _profile_cache.popitem(last=False)
+
+def invalidate_teacher_profile(teacher_name=None):
+    """Drop cached profiles for one teacher, or for everyone when teacher_name is None"""
+    with _profile_cache_lock:
+        for key in [k for k in _profile_cache if teacher_name is None or k[0] == teacher_name]:
+            del _profile_cache[key]
+
+def parse_profile_include(raw):
+    """Parse include=stats,citations,publications:top20 into {section: limit or None}.
+
+    Raises ValueError on unknown sections or malformed limits.
+    """
+    if not raw:
+        return {section: None for section in PROFILE_SECTIONS}
+    sections = {}
+    for token in [t.strip() for t in raw.split(',') if t.strip()]:
+        name, _, option = token.partition(':')
+        if name not in PROFILE_SECTIONS:
+            raise ValueError(f'Unknown section: {name}')
+        limit = None
+        if option:
+            match = re.fullmatch(r'top(\d+)', option)
+            if not match or name != 'publications':
+                raise ValueError(f'Invalid option for {name}: {option}')
+            limit = int(match.group(1))
+            if not 1 <= limit <= PROFILE_MAX_TOP_PUBLICATIONS:
+                raise ValueError(f'publications:topN takes N from 1 to {PROFILE_MAX_TOP_PUBLICATIONS}')
+        sections[name] = limit
+    return sections
+
+def build_teacher_profile(teacher, sections):
+    """Assemble the requested profile sections concurrently for an already resolved teacher"""
+    from db_config import get_collection
+    teacher_name = teacher['name']
+    papers_collection = get_collection('papers_' + re.sub(r'[^a-z0-9]', '_', teacher_name.lower()))
+
+    def publications_section(limit):
+        cursor = papers_collection.find({}, parse_fields_param('publications', {})).sort(PUBLICATION_SORT)
+        if limit:
+            cursor = cursor.limit(limit)
+        return {'publications': list(cursor), 'total': cached_publication_count(papers_collection)}
+
+    builders = {
+        'stats': lambda limit: load_teacher_stats([teacher_name])[teacher_name],
+        'citations': lambda limit: scraped_citations_summary(get_collection('citations'), teacher_name),
+        'storedCitations': lambda limit: stored_citations_per_year(papers_collection),
+        'publications': publications_section,
+    }
+    futures = {name: _profile_pool.submit(builders[name], limit) for name, limit in sections.items()}
+    profile = {'teacher': teacher}
+    for name, future in futures.items():
+        profile[name] = future.result()
+    return profile
+
+@app.route('/teachers/<teacher_id>/profile', methods=['GET'])
+def get_teacher_profile(teacher_id):
+    """Teacher, stats, citations and publications in one response.
+
+    ?include= selects sections (default: all), e.g. include=stats,citations,publications:top20.
+    Responses carry an ETag and are cached per process until the teacher's data changes.
+    """
+    try:
+        from db_config import get_collection
+        decoded_teacher_id = urllib.parse.unquote(teacher_id)
+        try:
+            sections = parse_profile_include(request.args.get('include'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        cache_key = (decoded_teacher_id, tuple(sorted(sections.items())))
+        cached = _cached_profile(cache_key)
+        if cached:
+            etag, body = cached
+        else:
+            teacher = get_collection('teachers').find_one({'name': decoded_teacher_id}, {'_id': 0})
+            if not teacher:
+                return jsonify({'error': 'Teacher not found'}), 404
+            body = app.json.dumps(build_teacher_profile(teacher, sections))
+            etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+            _store_profile(cache_key, etag, body)
+
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    except Exception as error:
+        print(f"Error in get_teacher_profile: {error}")
+        return jsonify({'error': str(error)}), 500
+
 @app.route('/teachers/<teacher_id>', methods=['DELETE'])
+@require_admin
 def delete_teacher(teacher_id):
     """Delete a teacher and all their related data."""
     try:
@@ -1218,6 +1560,7 @@ def delete_teacher(teacher_id):
 
         # Remove teacher
         teachers_collection.delete_one({'name': decoded_teacher_id})
+        record_tombstone(teachers_collection.database, 'teachers', teacher['_id'])
 
         # Remove related papers collection
         import re
@@ -1225,6 +1568,19 @@ def delete_teacher(teacher_id):
         db = teachers_collection.database
         if collection_name in db.list_collection_names():
             db.drop_collection(collection_name)
+        from near_duplicates import SIGNATURES_COLLECTION
+        get_collection(SIGNATURES_COLLECTION).delete_many({'collection': collection_name})
+        invalidate_publication_count(collection_name)
+        get_collection(TEACHER_STATS_COLLECTION).delete_one({'teacherName': decoded_teacher_id})
+        invalidate_teacher_profile(decoded_teacher_id)
+        get_collection(RANKINGS_COLLECTION).delete_one({'teacherName': decoded_teacher_id})
+        get_collection(HISTORY_COLLECTION).delete_many({'$or': [
+            {'kind': 'teacher', 'key': decoded_teacher_id},
+            {'kind': 'paper', 'teacherName': decoded_teacher_id},
+        ]})
+        rebuild_coauthor_graph()
+        mark_suggest_index_stale()
+        rebuild_text_index()
 
         # Remove related citations
         citations_collection = get_collection('citations')
@@ -1235,64 +1591,80 @@ def delete_teacher(teacher_id):
         return jsonify({'error': str(error)}), 500
 
 @app.route('/api/community/update_total_citations', methods=['POST'])
+@require_admin
 def update_total_citations():
-    """Aggregate total citations per year from citations collection and store in total_citations collection."""
+    """Rebuild total_citations from the citations collection on demand.
+
+    The rebuild also runs automatically when citations change (see citation_rollup.py).
+    """
     try:
-        from db_config import get_collection
-        citations_collection = get_collection('citations')
-        total_citations_collection = get_collection('total_citations')
-        
-        # Ensure the collection exists by inserting a dummy document and then removing it
-        try:
-            total_citations_collection.insert_one({'dummy': 'dummy'})
-            total_citations_collection.delete_one({'dummy': 'dummy'})
-        except Exception as e:
-            print(f"Error ensuring collection exists: {e}")
-        
-        all_citations = list(citations_collection.find({}))
-        print(f"Found {len(all_citations)} citation documents to process")
-        
-        yearly_totals = {}
-        for citation_doc in all_citations:
-            citations_per_year = citation_doc.get('citationsPerYear', {})
-            if hasattr(citations_per_year, 'to_dict'):
-                citations_per_year = citations_per_year.to_dict()
-            for year, count in citations_per_year.items():
-                if str(year).isdigit():
-                    y = int(year)
-                    yearly_totals[y] = yearly_totals.get(y, 0) + int(count)
-        
-        print(f"Calculated totals for years: {list(yearly_totals.keys())}")
-        
-        # Clear existing data and insert new totals
-        delete_result = total_citations_collection.delete_many({})
-        print(f"Deleted {delete_result.deleted_count} existing documents")
-        
-        # Insert new totals
-        insert_docs = [{'year': year, 'total': total} for year, total in yearly_totals.items()]
-        if insert_docs:
-            insert_result = total_citations_collection.insert_many(insert_docs)
-            print(f"Inserted {len(insert_result.inserted_ids)} new documents")
-        
-        # Verify the data was stored
-        stored_count = total_citations_collection.count_documents({})
-        print(f"Total documents in total_citations collection: {stored_count}")
-        
+        result = rebuild_total_citations(db_manager.get_db())
+        history = record_citation_snapshots(db_manager.get_db(), include_papers=False)
+        mark_citation_matrix_dirty()
         return jsonify({
             'message': 'Total citations per year updated successfully.',
-            'years': list(yearly_totals.keys()),
-            'stored_count': stored_count
+            'years': result['years'],
+            'stored_count': len(result['years']),
+            'history_samples': history
         }), 200
     except Exception as e:
         print(f"Error in update_total_citations: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _history_range_args():
+    """(start, end) dates from ?from=&to= (YYYY-MM-DD); raises ValueError"""
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+    except ValueError:
+        raise ValueError('from and to must be dates in YYYY-MM-DD format')
+    if start and end and start > end:
+        raise ValueError('from must not be after to')
+    return start, end
+
+@app.route('/teachers/<teacher_id>/citations/history', methods=['GET'])
+def get_teacher_citation_history(teacher_id):
+    """A teacher's total citations over time, the change across the range and the papers that moved most.
+
+    Query parameters: from, to (YYYY-MM-DD), papers (default 10, 0 to omit).
+    """
+    try:
+        decoded_teacher_id = urllib.parse.unquote(teacher_id)
+        try:
+            start, end = _history_range_args()
+            paper_limit = min(max(int(request.args.get('papers', 10)), 0), 200)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        db = db_manager.get_analytics_db()
+        samples = load_series(db, 'teacher', decoded_teacher_id, start, end)
+        if not samples and not db['teachers'].find_one({'name': decoded_teacher_id}, {'_id': 1}):
+            return jsonify({'error': 'Teacher not found'}), 404
+        response = {'teacherName': decoded_teacher_id, **summarize_series(samples)}
+        if paper_limit:
+            response['papers'] = paper_deltas(db, decoded_teacher_id, start, end, paper_limit)
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/community/citations/history', methods=['GET'])
+def get_community_citation_history():
+    """Community-wide total citations over time (from=, to= as YYYY-MM-DD)"""
+    try:
+        try:
+            start, end = _history_range_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        samples = load_series(db_manager.get_analytics_db(), 'community', 'all', start, end)
+        return jsonify(summarize_series(samples)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/community/total_citations', methods=['GET'])
 def get_total_citations():
     """Return total citations per year from total_citations collection as a year->total mapping."""
     try:
         from db_config import get_collection
-        total_citations_collection = get_collection('total_citations')
+        total_citations_collection = db_manager.get_analytics_collection('total_citations')
         docs = list(total_citations_collection.find({}, {'_id': 0}))
         result = {str(doc['year']): doc['total'] for doc in docs}
         return jsonify(result), 200
@@ -1304,7 +1676,7 @@ def get_all_citations():
     """Return all teachers' citationsPerYear from the citations collection."""
     try:
         from db_config import get_collection
-        citations_collection = get_collection('citations')
+        citations_collection = db_manager.get_analytics_collection('citations')
         docs = list(citations_collection.find({}, {'_id': 0, 'teacherName': 1, 'citationsPerYear': 1}))
         return jsonify({'teachers': docs}), 200
     except Exception as e:
@@ -1356,8 +1728,14 @@ def admin_login():
     admin = admin_collection.find_one({'username': username})
     if not admin:
         return jsonify({'error': 'Invalid username or password'}), 401
-    if bcrypt.checkpw(password.encode('utf-8'), admin['password']):
-        return jsonify({'success': True}), 200
+    if check_password(password, admin['password']):
+        # Issue a signed session token so admin routes never need bcrypt again
+        token, expires_at = issue_session_token(username)
+        return jsonify({
+            'success': True,
+            'token': token,
+            'expiresAt': datetime.utcfromtimestamp(expires_at).isoformat() + 'Z'
+        }), 200
     else:
         return jsonify({'error': 'Invalid username or password'}), 401
 
@@ -1374,9 +1752,9 @@ def admin_change_password():
     admin = admin_collection.find_one({'username': username})
     if not admin:
         return jsonify({'error': 'User not found'}), 404
-    if not bcrypt.checkpw(old_password.encode('utf-8'), admin['password']):
+    if not check_password(old_password, admin['password']):
         return jsonify({'error': 'Old password is incorrect'}), 401
-    hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+    hashed = hash_password(new_password)
     admin_collection.update_one({'username': username}, {'$set': {'password': hashed}})
     return jsonify({'success': True}), 200
 
@@ -1407,7 +1785,7 @@ def admin_signup():
             return jsonify({'error': 'Security code is required for admin replacement'}), 400
         
         # Check if security code matches
-        if not bcrypt.checkpw(security_code.encode('utf-8'), existing_admin.get('security_code', b'')):
+        if not check_password(security_code, existing_admin.get('security_code', b'')):
             return jsonify({'error': 'Invalid security code'}), 401
         
         # Check if username already exists (shouldn't happen with single admin, but good to check)
@@ -1420,11 +1798,11 @@ def admin_signup():
         # Generate a new secure security code for the new admin
         alphabet = string.ascii_uppercase + string.digits
         generated_security_code = ''.join(secrets.choice(alphabet) for _ in range(8))
-        hashed_security_code = bcrypt.hashpw(generated_security_code.encode('utf-8'), bcrypt.gensalt())
+        hashed_security_code = hash_password(generated_security_code)
         
-        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        hashed_a1 = bcrypt.hashpw(answer1.lower().strip().encode('utf-8'), bcrypt.gensalt())
-        hashed_a2 = bcrypt.hashpw(answer2.lower().strip().encode('utf-8'), bcrypt.gensalt())
+        hashed_pw = hash_password(password)
+        hashed_a1 = hash_password(answer1.lower().strip())
+        hashed_a2 = hash_password(answer2.lower().strip())
         
         admin_collection.insert_one({
             'username': username,
@@ -1454,11 +1832,11 @@ def admin_signup():
         # Generate a secure security code
         alphabet = string.ascii_uppercase + string.digits
         generated_security_code = ''.join(secrets.choice(alphabet) for _ in range(8))
-        hashed_security_code = bcrypt.hashpw(generated_security_code.encode('utf-8'), bcrypt.gensalt())
+        hashed_security_code = hash_password(generated_security_code)
         
-        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        hashed_a1 = bcrypt.hashpw(answer1.lower().strip().encode('utf-8'), bcrypt.gensalt())
-        hashed_a2 = bcrypt.hashpw(answer2.lower().strip().encode('utf-8'), bcrypt.gensalt())
+        hashed_pw = hash_password(password)
+        hashed_a1 = hash_password(answer1.lower().strip())
+        hashed_a2 = hash_password(answer2.lower().strip())
         
         admin_collection.insert_one({
             'username': username,
@@ -1482,11 +1860,17 @@ def admin_signup():
 
 @app.route('/admin/forgot_password', methods=['POST'])
 def admin_forgot_password():
+    """Verify the security answers; with newPassword also set the new password.
+
+    The answers are checked again in the same request that changes the password,
+    so the reset cannot be replayed without them.
+    """
     from db_config import get_collection
     data = request.get_json()
     username = data.get('username')
     answer1 = data.get('answer1')
     answer2 = data.get('answer2')
+    new_password = data.get('newPassword')
     if not username or not answer1 or not answer2:
         return jsonify({'error': 'All fields are required'}), 400
     admin_collection = get_collection('admin')
@@ -1494,23 +1878,30 @@ def admin_forgot_password():
     if not admin:
         return jsonify({'error': 'User not found'}), 404
     # Check answers (case-insensitive, trimmed)
-    if not (bcrypt.checkpw(answer1.lower().strip().encode('utf-8'), admin['security']['a1']) and bcrypt.checkpw(answer2.lower().strip().encode('utf-8'), admin['security']['a2'])):
+    if not (check_password(answer1.lower().strip(), admin['security']['a1']) and check_password(answer2.lower().strip(), admin['security']['a2'])):
         return jsonify({'error': 'Security answers do not match'}), 401
+    if new_password:
+        admin_collection.update_one({'username': username}, {'$set': {'password': hash_password(new_password)}})
     return jsonify({'success': True}), 200
 
 @app.route('/admin/reset_password', methods=['POST'])
+@require_admin
 def admin_reset_password():
+    """Set a new password for a signed-in admin who also confirms the current one"""
     from db_config import get_collection
     data = request.get_json()
     username = data.get('username')
+    current_password = data.get('currentPassword')
     new_password = data.get('newPassword')
-    if not username or not new_password:
+    if not username or not current_password or not new_password:
         return jsonify({'error': 'All fields are required'}), 400
     admin_collection = get_collection('admin')
     admin = admin_collection.find_one({'username': username})
     if not admin:
         return jsonify({'error': 'User not found'}), 404
-    hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+    if not check_password(current_password, admin['password']):
+        return jsonify({'error': 'Current password is incorrect'}), 401
+    hashed = hash_password(new_password)
     admin_collection.update_one({'username': username}, {'$set': {'password': hashed}})
     return jsonify({'success': True}), 200
     
@@ -1527,6 +1918,7 @@ def admin_status():
     }), 200
 
 @app.route('/teachers/<teacher_id>/add_publication', methods=['POST'])
+@require_admin
 def add_publication_to_teacher(teacher_id):
     try:
         from db_config import get_collection
@@ -1548,6 +1940,7 @@ def add_publication_to_teacher(teacher_id):
         decoded_teacher_id = urllib.parse.unquote(teacher_id)
         collection_name = 'papers_' + re.sub(r'[^a-z0-9]', '_', decoded_teacher_id.lower())
         papers_collection = get_collection(collection_name)
+        ensure_collection_indexes_async(papers_collection.database, collection_name)
         now = datetime.datetime.utcnow()
         doc = {
             'title': data['title'],
@@ -1584,56 +1977,568 @@ def add_publication_to_teacher(teacher_id):
         print(f"DEBUG: incoming url value: {repr(url)}")
         if url is not None and isinstance(url, str) and url.strip():
             doc['url'] = url.strip()
+        apply_canonical_publication_fields(doc)
         result = papers_collection.insert_one(doc)
+        invalidate_publication_count(collection_name)
+        refresh_teacher_stats(decoded_teacher_id)
+        update_coauthor_graph(decoded_teacher_id, [doc])
+        cluster_publications(papers_collection.database, collection_name, {'_id': result.inserted_id})
+        update_suggest_index(publications=[doc])
+        update_text_index(papers_collection, {'_id': result.inserted_id})
         doc['_id'] = str(result.inserted_id)
         return jsonify({'publication': doc}), 201
     except Exception as error:
         return jsonify({'error': str(error)}), 500
 
+def ingest_publication_records(papers_collection, teacher_name, parsed_records):
+    """Apply a batch of parsed records to a teacher's papers collection.
+
+    Each record is hashed; records whose hash matches the stored contentHash are
+    skipped and the rest go out as one unordered bulk_write of upserts keyed on
+    url (or title + year when there is no url). parsed_records yields
+    (record, error) tuples as produced by publication_ingest.PARSERS.
+    """
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+
+    rejected = []
+    by_key = {}
+    for position, (record, error) in enumerate(parsed_records):
+        if error:
+            rejected.append({'index': position, 'reason': error})
+            continue
+        try:
+            doc = normalize_record(record, teacher_name)
+        except ValueError as ve:
+            rejected.append({'index': position, 'reason': str(ve)})
+            continue
+        apply_canonical_publication_fields(doc)
+        doc['contentHash'] = compute_content_hash(doc)
+        key = ('url', doc['url']) if doc.get('url') else ('title', doc['title'], doc['year'])
+        if key in by_key:
+            rejected.append({'index': by_key[key][0], 'reason': 'superseded by a later record in the batch'})
+        by_key[key] = (position, doc)
+
+    # Fetch stored hashes for every key in the batch in one query
+    urls = {k[1] for k in by_key if k[0] == 'url'}
+    titles = {k[1] for k in by_key if k[0] == 'title'}
+    stored_hashes = {}
+    if by_key:
+        clauses = []
+        if urls:
+            clauses.append({'url': {'$in': list(urls)}})
+        if titles:
+            clauses.append({'title': {'$in': list(titles)}})
+        for existing in papers_collection.find({'$or': clauses}, {'url': 1, 'title': 1, 'year': 1, 'contentHash': 1}):
+            if existing.get('url') in urls:
+                stored_hashes[('url', existing['url'])] = existing.get('contentHash')
+            stored_hashes[('title', existing.get('title'), existing.get('year'))] = existing.get('contentHash')
+
+    now = datetime.utcnow()
+    operations = []
+    # Input record position of each operation, so bulk write errors report the same index as parse errors
+    operation_positions = []
+    written = []
+    unchanged = 0
+    for key, (position, doc) in by_key.items():
+        if key in stored_hashes and stored_hashes[key] == doc['contentHash']:
+            unchanged += 1
+            continue
+        key_filter = {'url': doc['url']} if key[0] == 'url' else {'title': doc['title'], 'year': doc['year']}
+        operations.append(UpdateOne(
+            key_filter,
+            # Changed records lose their clusterId and are re-clustered after the write
+            {'$set': {**doc, 'updatedAt': now}, '$setOnInsert': {'createdAt': now, '__v': 0}, '$unset': {'clusterId': ''}},
+            upsert=True
+        ))
+        operation_positions.append(position)
+        written.append(doc)
+
+    inserted = 0
+    updated = 0
+    if operations:
+        try:
+            result = papers_collection.bulk_write(operations, ordered=False)
+            inserted = result.upserted_count
+            updated = result.matched_count
+        except BulkWriteError as bwe:
+            details = bwe.details or {}
+            inserted = details.get('nUpserted', 0)
+            updated = details.get('nMatched', 0)
+            for write_error in details.get('writeErrors', []):
+                operation_index = write_error.get('index')
+                position = operation_positions[operation_index] if operation_index is not None else None
+                rejected.append({'index': position, 'reason': write_error.get('errmsg', 'write error')})
+        update_coauthor_graph(teacher_name, written)
+        update_suggest_index(publications=written)
+        update_text_index(papers_collection, {'updatedAt': now})
+
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': unchanged,
+        'rejected': rejected
+    }
+
+@app.route('/teachers/<teacher_id>/publications/bulk', methods=['POST'])
+@require_admin
+def bulk_ingest_publications(teacher_id):
+    """Ingest a BibTeX, CSV or JSON-lines batch of publications for a teacher.
+
+    The format comes from ?format=bibtex|csv|jsonl, or else from the Content-Type
+    or the uploaded file's extension. Send the batch as the request body or as a
+    multipart 'file'.
+    """
+    try:
+        from db_config import get_collection
+        teachers_collection = get_collection('teachers')
+        decoded_teacher_id = urllib.parse.unquote(teacher_id)
+        teacher = teachers_collection.find_one({'name': decoded_teacher_id}, {'name': 1})
+        if not teacher:
+            return jsonify({'error': 'Teacher not found'}), 404
+
+        if 'file' in request.files:
+            upload = request.files['file']
+            text = upload.read().decode('utf-8-sig', errors='replace')
+            detected = detect_format(upload.mimetype, upload.filename)
+        else:
+            text = request.get_data(as_text=True)
+            detected = detect_format(request.content_type)
+        batch_format = (request.args.get('format') or detected or '').lower()
+        if batch_format not in SUPPORTED_FORMATS:
+            return jsonify({'error': f'Unsupported or missing format. Use one of {SUPPORTED_FORMATS}'}), 400
+        if not text.strip():
+            return jsonify({'error': 'Empty batch'}), 400
+
+        teacher_name = teacher['name']
+        collection_name = 'papers_' + re.sub(r'[^a-z0-9]', '_', teacher_name.lower())
+        papers_collection = get_collection(collection_name)
+        ensure_collection_indexes_async(papers_collection.database, collection_name)
+        summary = ingest_publication_records(papers_collection, teacher_name, PARSERS[batch_format](text))
+        invalidate_publication_count(collection_name)
+        refresh_teacher_stats(teacher_name)
+        cluster_publications(papers_collection.database, collection_name)
+        summary['format'] = batch_format
+        return jsonify(summary), 200
+    except Exception as error:
+        return jsonify({'error': str(error)}), 500
+
+# ---- Citation analytics ----
+# numpy is only loaded by the analytics routes (see citation_matrix.py)
+_citation_matrix_store = None
+_citation_matrix_store_lock = threading.Lock()
+
+def get_citation_matrix_store():
+    global _citation_matrix_store
+    if _citation_matrix_store is None:
+        with _citation_matrix_store_lock:
+            if _citation_matrix_store is None:
+                from citation_matrix import CitationMatrixStore
+                _citation_matrix_store = CitationMatrixStore(db_manager.get_analytics_db)
+    return _citation_matrix_store
+
+def mark_citation_matrix_dirty():
+    """Rebuild the in-memory citation matrix on its next use"""
+    if _citation_matrix_store is not None:
+        _citation_matrix_store.mark_dirty()
+
+def _csv_arg(name):
+    return [v.strip() for v in (request.args.get(name) or '').split(',') if v.strip()]
+
+@app.route('/api/analytics/citations', methods=['GET'])
+def get_citation_analytics():
+    """Vectorized citation analytics over the teacher x year matrix.
+
+    Query parameters: metric (totals, growth, moving_average, cumulative, percentiles),
+    by (community, teacher, domain), teachers, domains, from, to, window, q.
+    """
+    try:
+        from citation_matrix import citation_analytics
+        try:
+            year_from = int(request.args['from']) if request.args.get('from') else None
+            year_to = int(request.args['to']) if request.args.get('to') else None
+            window = int(request.args.get('window', 3))
+            qs = [float(q) for q in _csv_arg('q')] or [25, 50, 75, 90]
+            if any(q < 0 or q > 100 for q in qs):
+                raise ValueError('q values must be between 0 and 100')
+            result = citation_analytics(
+                get_citation_matrix_store().get(),
+                metric=request.args.get('metric', 'totals'),
+                by=request.args.get('by', 'community'),
+                teachers=_csv_arg('teachers'),
+                domains=_csv_arg('domains'),
+                year_from=year_from,
+                year_to=year_to,
+                window=window,
+                qs=qs
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ---- Co-authorship graph ----
+# Loaded lazily like the citation matrix; updates run on one thread so saves never interleave
+_coauthor_graph_store = None
+_coauthor_graph_store_lock = threading.Lock()
+_coauthor_graph_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='coauthor-graph')
+
+def get_coauthor_graph_store():
+    global _coauthor_graph_store
+    if _coauthor_graph_store is None:
+        with _coauthor_graph_store_lock:
+            if _coauthor_graph_store is None:
+                from coauthor_graph import CoauthorGraphStore
+                _coauthor_graph_store = CoauthorGraphStore(db_manager.get_db)
+    return _coauthor_graph_store
+
+def update_coauthor_graph(teacher_name, papers):
+    """Add newly written papers to the co-authorship graph in the background"""
+    def apply():
+        try:
+            get_coauthor_graph_store().add_papers(teacher_name, papers)
+        except Exception as e:
+            print(f'[COAUTHORS] Incremental update failed for {teacher_name}: {e}')
+    _coauthor_graph_executor.submit(apply)
+
+def rebuild_coauthor_graph():
+    """Rebuild the co-authorship graph from every papers_* collection"""
+    return _coauthor_graph_executor.submit(lambda: get_coauthor_graph_store().rebuild())
+
+def _coauthor_graph_or_503():
+    from coauthor_graph import GraphNotReady
+    try:
+        return get_coauthor_graph_store().get(), None
+    except GraphNotReady as e:
+        return None, (jsonify({'error': str(e)}), 503)
+
+def _graph_node_or_404(graph, name):
+    node = graph.find(name)
+    if node is None:
+        return None, (jsonify({'error': f'No co-authorship data for {name}'}), 404)
+    return node, None
+
+@app.route('/api/coauthors/<teacher_id>', methods=['GET'])
+def get_coauthors(teacher_id):
+    """A teacher's (or author's) collaborators ranked by shared papers"""
+    try:
+        name = urllib.parse.unquote(teacher_id)
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 500)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        graph, error = _coauthor_graph_or_503()
+        if error:
+            return error
+        node, error = _graph_node_or_404(graph, name)
+        if error:
+            return error
+        collaborators = graph.collaborators(node, limit)
+        return jsonify({**graph.describe(node), 'collaborators': collaborators}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/coauthors/strength', methods=['GET'])
+def get_collaboration_strength():
+    """Shared papers, normalized strength and common collaborators for ?a=&b="""
+    try:
+        if not request.args.get('a') or not request.args.get('b'):
+            return jsonify({'error': 'a and b are required'}), 400
+        graph, error = _coauthor_graph_or_503()
+        if error:
+            return error
+        a, error = _graph_node_or_404(graph, request.args['a'])
+        if error:
+            return error
+        b, error = _graph_node_or_404(graph, request.args['b'])
+        if error:
+            return error
+        return jsonify({'a': graph.describe(a), 'b': graph.describe(b), **graph.strength(a, b)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/coauthors/path', methods=['GET'])
+def get_collaboration_path():
+    """Fewest-hop collaboration chain between ?from= and ?to= (teachers or authors)"""
+    try:
+        if not request.args.get('from') or not request.args.get('to'):
+            return jsonify({'error': 'from and to are required'}), 400
+        try:
+            max_depth = min(max(int(request.args.get('maxDepth', 6)), 1), 10)
+        except ValueError:
+            return jsonify({'error': 'maxDepth must be an integer'}), 400
+        graph, error = _coauthor_graph_or_503()
+        if error:
+            return error
+        source, error = _graph_node_or_404(graph, request.args['from'])
+        if error:
+            return error
+        target, error = _graph_node_or_404(graph, request.args['to'])
+        if error:
+            return error
+        path = graph.shortest_path(source, target, max_depth)
+        return jsonify({
+            'found': path is not None,
+            'hops': len(path) - 1 if path else None,
+            'path': [graph.describe(node) for node in path or []]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/coauthors/bridges', methods=['GET'])
+def get_cross_domain_bridges():
+    """Authors whose faculty collaborators span more than one research domain"""
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 500)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        teacher_domains = {}
+        for doc in db_manager.get_analytics_collection('domains').find(
+            {'canonicalDomain': {'$nin': [None, '']}}, {'_id': 0, 'teacherName': 1, 'canonicalDomain': 1}
+        ):
+            if doc.get('teacherName'):
+                teacher_domains.setdefault(doc['teacherName'], set()).add(doc['canonicalDomain'])
+        graph, error = _coauthor_graph_or_503()
+        if error:
+            return error
+        bridges = graph.bridges(teacher_domains, limit)
+        return jsonify({'bridges': bridges, 'count': len(bridges)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/coauthors/rebuild', methods=['POST'])
+@require_admin
+def rebuild_coauthors():
+    """Rebuild the co-authorship graph from scratch (applies deleted papers)"""
+    try:
+        graph = rebuild_coauthor_graph().result()
+        return jsonify({'success': True, 'authors': len(graph.keys), 'papers': len(graph.paper_keys)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ---- TF-IDF related publications and expert finder ----
+_text_index_store = None
+_text_index_store_lock = threading.Lock()
+_text_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='text-index')
+
+def get_text_index_store():
+    global _text_index_store
+    if _text_index_store is None:
+        with _text_index_store_lock:
+            if _text_index_store is None:
+                from text_index import TextIndexStore
+                _text_index_store = TextIndexStore(db_manager.get_db)
+    return _text_index_store
+
+def update_text_index(papers_collection, query):
+    """Add the papers matching query to the text index in the background"""
+    def apply():
+        try:
+            from text_index import _TEXT_FIELDS
+            papers = list(papers_collection.find(query, _TEXT_FIELDS))
+            if papers:
+                get_text_index_store().add_papers(papers)
+        except Exception as e:
+            print(f'[TEXT INDEX] Incremental update failed: {e}')
+    _text_index_executor.submit(apply)
+
+def remove_from_text_index(paper_id):
+    def apply():
+        try:
+            get_text_index_store().remove_paper(paper_id)
+        except Exception as e:
+            print(f'[TEXT INDEX] Removing {paper_id} failed: {e}')
+    _text_index_executor.submit(apply)
+
+def rebuild_text_index():
+    return _text_index_executor.submit(lambda: get_text_index_store().rebuild())
+
+@app.route('/publications/<publication_id>/related', methods=['GET'])
+def get_related_publications(publication_id):
+    """Top-K publications by TF-IDF cosine similarity to a publication (by _id)"""
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        related = get_text_index_store().get().related(publication_id, limit)
+        if related is None:
+            return jsonify({'error': 'Publication not found in the text index'}), 404
+        return jsonify({'publicationId': publication_id, 'related': related}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/experts', methods=['GET'])
+def find_experts():
+    """Teachers ranked by the relevance of their publications to ?q="""
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({'error': 'No search query provided'}), 400
+        try:
+            limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        experts = get_text_index_store().get().experts(query, limit)
+        return jsonify({'query': query, 'experts': experts}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/text-index/rebuild', methods=['POST'])
+@require_admin
+def rebuild_text_index_route():
+    """Rebuild the TF-IDF index from every papers_* collection"""
+    try:
+        return jsonify({'success': True, **rebuild_text_index().result()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ---- Typeahead suggestions ----
+_suggest_index_store = None
+_suggest_index_store_lock = threading.Lock()
+
+def get_suggest_index_store():
+    global _suggest_index_store
+    if _suggest_index_store is None:
+        with _suggest_index_store_lock:
+            if _suggest_index_store is None:
+                from suggest_index import SuggestIndexStore
+                _suggest_index_store = SuggestIndexStore(db_manager.get_analytics_db)
+    return _suggest_index_store
+
+def update_suggest_index(publications=None, project=None):
+    """Add written publications or a project to the suggestion index, if it is loaded"""
+    index = _suggest_index_store.peek() if _suggest_index_store is not None else None
+    if index is None:
+        return
+    try:
+        if publications:
+            index.add_publications(publications)
+        if project:
+            index.add_project(project)
+    except Exception as e:
+        print(f'[SUGGEST] Incremental update failed: {e}')
+
+def mark_suggest_index_stale():
+    """Rebuild the suggestion index in the background on its next use"""
+    if _suggest_index_store is not None:
+        _suggest_index_store.mark_stale()
+
+@app.route('/api/suggest', methods=['GET'])
+def get_suggestions():
+    """Typeahead suggestions for ?prefix=, grouped by type and ranked by popularity.
+
+    Optional: types (comma-separated teachers, publications, authors, domains, projects), limit per type.
+    """
+    try:
+        prefix = request.args.get('prefix', '')
+        try:
+            limit = min(max(int(request.args.get('limit', 5)), 1), 20)
+            suggestions = get_suggest_index_store().get().suggest(prefix, _csv_arg('types') or None, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'prefix': prefix, 'suggestions': suggestions}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ---- Near-duplicate publication clusters ----
+def cluster_publications(db, collection_name=None, query=None):
+    """Assign clusterIds to new or changed papers (one collection, or every papers_* collection)"""
+    try:
+        from near_duplicates import assign_clusters, assign_missing_clusters
+        if collection_name is None:
+            return assign_missing_clusters(db)
+        return assign_clusters(db, collection_name, query)
+    except Exception as e:
+        print(f'[CLUSTERS] Near-duplicate clustering failed: {e}')
+        return 0
+
+@app.route('/api/publications/clusters/rebuild', methods=['POST'])
+@require_admin
+def rebuild_publication_clusters():
+    """Recompute every near-duplicate cluster from scratch"""
+    try:
+        from near_duplicates import rebuild_clusters
+        result = rebuild_clusters(db_manager.get_db())
+        return jsonify({'success': True, **result}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ---- Faculty leaderboard ----
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Top teachers by a metric from the maintained rankings collection.
+
+    Query parameters: metric (default totalCitations), window (years, publications only), limit.
+    """
+    try:
+        metric = request.args.get('metric', 'totalCitations')
+        try:
+            field = metric_for(metric, request.args.get('window'))
+            limit = min(max(int(request.args.get('limit', 10)), 1), 500)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'metric': field,
+            'rankings': top_rankings(db_manager.get_analytics_db(), field, limit),
+            'metrics': LEADERBOARD_METRICS
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/leaderboard/<teacher_id>', methods=['GET'])
+def get_teacher_leaderboard_rank(teacher_id):
+    """A teacher's value and rank on one metric (?metric=, ?window=) or on every metric"""
+    try:
+        teacher_name = urllib.parse.unquote(teacher_id)
+        try:
+            if request.args.get('metric') or request.args.get('window'):
+                fields = [metric_for(request.args.get('metric', 'publications'), request.args.get('window'))]
+            else:
+                fields = LEADERBOARD_METRICS
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        ranks = teacher_rank(db_manager.get_analytics_db(), teacher_name, fields)
+        if ranks is None:
+            return jsonify({'error': 'Teacher not found'}), 404
+        return jsonify({'teacherName': teacher_name, 'ranks': ranks}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/leaderboard/rebuild', methods=['POST'])
+@require_admin
+def rebuild_leaderboard():
+    """Recompute every teacher's rankings entry"""
+    try:
+        return jsonify({'success': True, 'teachers': refresh_rankings(db_manager.get_db())}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/domains', methods=['GET'])
 def get_domains():
     """Get all unique domains"""
     try:
-        db = db_manager.connect()
-        domains_collection = db['domains']
-        
-        # Get all unique domain names
-        unique_domains = domains_collection.distinct('domainName')
-        
-        # Normalize and consolidate domain names
-        domain_consolidation = {}
-        domain_mapping = {}
-        
-        for domain_name in unique_domains:
-            normalized_name = normalize_domain_name(domain_name)
-            
-            if normalized_name not in domain_consolidation:
-                domain_consolidation[normalized_name] = {
-                    'displayName': normalized_name,
-                    'originalNames': [],
-                    'teacherCount': 0
-                }
-            
-            domain_consolidation[normalized_name]['originalNames'].append(domain_name)
-            domain_mapping[domain_name] = normalized_name
-        
-        # Count teachers for each consolidated domain
-        for domain_name in unique_domains:
-            normalized_name = domain_mapping[domain_name]
-            teacher_count = domains_collection.count_documents({'domainName': domain_name})
-            domain_consolidation[normalized_name]['teacherCount'] += teacher_count
-        
-        # Convert to list format
-        domain_stats = []
-        for normalized_name, data in domain_consolidation.items():
-            domain_stats.append({
-                'domainName': data['displayName'],
-                'teacherCount': data['teacherCount'],
-                'originalNames': data['originalNames']
-            })
-        
-        # Sort by teacher count (descending)
-        domain_stats.sort(key=lambda x: x['teacherCount'], reverse=True)
+        domains_collection = db_manager.get_analytics_collection('domains')
+        
+        # canonicalDomain is stored at write time, so consolidation is a single $group
+        domain_stats = list(domains_collection.aggregate([
+            {'$match': {'canonicalDomain': {'$exists': True, '$nin': [None, '']}}},
+            {'$group': {
+                '_id': '$canonicalDomain',
+                'originalNames': {'$addToSet': '$domainName'},
+                'teachers': {'$addToSet': '$teacherName'}
+            }},
+            {'$project': {
+                '_id': 0,
+                'domainName': '$_id',
+                'teacherCount': {'$size': '$teachers'},
+                'originalNames': 1
+            }},
+            # Sort by teacher count (descending)
+            {'$sort': {'teacherCount': -1, 'domainName': 1}}
+        ]))
         
         return jsonify({
             'domains': domain_stats,
@@ -1642,52 +2547,89 @@ def get_domains():
     except Exception as error:
         return jsonify({'error': str(error)}), 500
 
+domain_normalizers = NormalizerRegistry(lambda: db_manager.get_collection(SYNONYMS_COLLECTION))
+
 def normalize_domain_name(domain_name):
-    """Normalize domain names to consolidate similar variants"""
-    if not domain_name:
-        return domain_name
-    
-    # Convert to lowercase and remove extra spaces
-    normalized = domain_name.lower().strip()
-    
-    # Cybersecurity variants
-    if any(variant in normalized for variant in ['cyber security', 'cybersecurity', 'cyber-security']):
-        return 'Cybersecurity'
-    
-    # Machine Learning variants
-    if any(variant in normalized for variant in ['machine learning', 'ml', 'ai/ml', 'artificial intelligence']):
-        return 'Machine Learning'
-    
-    # Digital Twin variants
-    if any(variant in normalized for variant in ['digital twin', 'digital twins']):
-        return 'Digital Twin'
-    
-    # Digital Forensics variants
-    if any(variant in normalized for variant in ['digital forensics', 'cyber forensics', 'computer forensics']):
-        return 'Digital Forensics'
-    
-    # Computer Vision variants
-    if any(variant in normalized for variant in ['computer vision', 'cv', 'image processing']):
-        return 'Computer Vision'
-    
-    # Data Science variants
-    if any(variant in normalized for variant in ['data science', 'data analytics', 'big data']):
-        return 'Data Science'
-    
-    # Internet of Things variants
-    if any(variant in normalized for variant in ['iot', 'internet of things', 'smart devices']):
-        return 'Internet of Things'
-    
-    # Blockchain variants
-    if any(variant in normalized for variant in ['blockchain', 'distributed ledger', 'cryptocurrency']):
-        return 'Blockchain'
-    
-    # Cloud Computing variants
-    if any(variant in normalized for variant in ['cloud computing', 'cloud', 'aws', 'azure']):
-        return 'Cloud Computing'
-    
-    # If no match found, return the original name with proper capitalization
-    return domain_name.title()
+    """Normalize domain names to consolidate similar variants (see domain_normalizer.py)"""
+    return domain_normalizers.get().normalize(domain_name)
+
+def run_domain_renormalize_task(task_id):
+    """Recompute canonicalDomain for all domain entries after a synonym table change"""
+    try:
+        update_task_status(task_id, 'running')
+        normalizer = domain_normalizers.reload()
+        distinct_names, modified = renormalize_domains(db_manager.get_collection('domains'), normalizer)
+        mark_suggest_index_stale()
+        update_task_status(task_id, 'completed', {'distinct_names': distinct_names, 'total_updated': modified})
+    except Exception as e:
+        update_task_status(task_id, 'failed', error=str(e))
+
+def start_domain_renormalize_task():
+    task_id = create_task('domain_renormalize', {})
+    thread = threading.Thread(target=run_domain_renormalize_task, args=(task_id,))
+    thread.daemon = True
+    thread.start()
+    return task_id
+
+@app.route('/api/domain-synonyms', methods=['GET'])
+def list_domain_synonyms():
+    """List the domain synonym table in priority order"""
+    try:
+        normalizer = domain_normalizers.reload()
+        return jsonify({
+            'synonyms': [
+                {'canonical': canonical, 'variants': variants, 'priority': priority}
+                for priority, (canonical, variants) in enumerate(normalizer.synonyms)
+            ]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/domain-synonyms', methods=['POST'])
+@require_admin
+def upsert_domain_synonym():
+    """Add or replace a canonical domain and its variants, then re-normalize all domains"""
+    try:
+        data = request.get_json(force=True)
+        canonical = (data.get('canonical') or '').strip()
+        variants = data.get('variants')
+        if not canonical or not isinstance(variants, list):
+            return jsonify({'error': 'canonical and a list of variants are required'}), 400
+        variants = [str(v).strip().lower() for v in variants if str(v).strip()]
+
+        synonyms_collection = db_manager.get_collection(SYNONYMS_COLLECTION)
+        seed_synonym_table(synonyms_collection)
+        update = {'canonical': canonical, 'variants': variants}
+        if data.get('priority') is not None:
+            try:
+                update['priority'] = int(data['priority'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'priority must be a number'}), 400
+        elif not synonyms_collection.find_one({'canonical': canonical}, {'_id': 1}):
+            # New entries go to the end of the cascade by default
+            last = synonyms_collection.find_one({}, {'priority': 1}, sort=[('priority', -1)])
+            update['priority'] = (last or {}).get('priority', -1) + 1
+        synonyms_collection.update_one({'canonical': canonical}, {'$set': update}, upsert=True)
+
+        task_id = start_domain_renormalize_task()
+        return jsonify({'success': True, 'synonym': update, 'task_id': task_id}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/domain-synonyms/<path:canonical>', methods=['DELETE'])
+@require_admin
+def delete_domain_synonym(canonical):
+    """Remove a canonical domain from the synonym table, then re-normalize all domains"""
+    try:
+        synonyms_collection = db_manager.get_collection(SYNONYMS_COLLECTION)
+        seed_synonym_table(synonyms_collection)
+        result = synonyms_collection.delete_one({'canonical': urllib.parse.unquote(canonical)})
+        if result.deleted_count == 0:
+            return jsonify({'error': 'Synonym entry not found'}), 404
+        task_id = start_domain_renormalize_task()
+        return jsonify({'success': True, 'task_id': task_id}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/domains/<path:domain_name>/teachers', methods=['GET'])
 def get_teachers_by_domain(domain_name):
@@ -1699,41 +2641,31 @@ def get_teachers_by_domain(domain_name):
         # Decode the domain name from URL
         decoded_domain_name = urllib.parse.unquote(domain_name)
         
-        # Get all original domain names that map to this consolidated domain
-        all_domains = domains_collection.distinct('domainName')
-        matching_original_names = []
-        
-        # Normalize requested name too to compare canonical forms
-        normalized_requested = normalize_domain_name(decoded_domain_name)
-
-        for original_name in all_domains:
-            if normalize_domain_name(original_name) == normalized_requested:
-                matching_original_names.append(original_name)
-        
-        # Find all teachers in any of the matching original domain names
-        teachers = []
-        for original_name in matching_original_names:
-            domain_entries = domains_collection.find({'domainName': original_name})
-            for entry in domain_entries:
-                teachers.append({
-                    'teacherName': entry['teacherName'],
-                    'domainName': entry['domainName'],
-                    'domainUrl': entry.get('domainUrl', ''),
-                    'lastUpdated': entry.get('lastUpdated', '').isoformat() if entry.get('lastUpdated') else None
-                })
-        
-        # Remove duplicate teachers (in case a teacher has multiple variants of the same domain)
-        unique_teachers = []
-        seen_teachers = set()
-        for teacher in teachers:
-            if teacher['teacherName'] not in seen_teachers:
-                unique_teachers.append(teacher)
-                seen_teachers.add(teacher['teacherName'])
+        # Normalize the requested name once and match on the indexed canonical field;
+        # a teacher with several variants of the same domain is collapsed by $group
+        canonical_domain = normalize_domain_name(decoded_domain_name)
+        unique_teachers = list(domains_collection.aggregate([
+            {'$match': {'canonicalDomain': canonical_domain}},
+            {'$sort': {'teacherName': 1, 'lastUpdated': -1}},
+            {'$group': {
+                '_id': '$teacherName',
+                'domainName': {'$first': '$domainName'},
+                'domainUrl': {'$first': '$domainUrl'},
+                'lastUpdated': {'$first': '$lastUpdated'}
+            }},
+            {'$sort': {'_id': 1}}
+        ]))
+        teachers = [{
+            'teacherName': entry['_id'],
+            'domainName': entry['domainName'],
+            'domainUrl': entry.get('domainUrl') or '',
+            'lastUpdated': entry['lastUpdated'].isoformat() if isinstance(entry.get('lastUpdated'), datetime) else None
+        } for entry in unique_teachers]
         
         return jsonify({
             'domainName': decoded_domain_name,
-            'teachers': unique_teachers,
-            'teacherCount': len(unique_teachers)
+            'teachers': teachers,
+            'teacherCount': len(teachers)
         }), 200
     except Exception as error:
         return jsonify({'error': str(error)}), 500
@@ -1746,35 +2678,17 @@ def get_yearly_projects():
         db = db_manager.connect()
         projects_collection = db['yearly_projects']
         
+        try:
+            projection = parse_fields_param('yearly_projects', request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         # Get all projects sorted by year (descending) and creation date (descending)
-        # Explicitly include _id field in the query
-        projects = list(projects_collection.find({}, {'_id': 1, 'year': 1, 'teacherName': 1, 'projectName': 1, 'projectDescription': 1, 'students': 1, 'createdAt': 1, 'report': 1, 'poster': 1, 'category': 1}).sort([
+        projects = list(projects_collection.find({}, projection).sort([
             ('year', -1), 
             ('createdAt', -1)
         ]))
         
-        print(f"Found {len(projects)} projects in database")
-        
-        # Convert ObjectId to string for JSON serialization
-        for i, project in enumerate(projects):
-            print(f"Project {i}: {project}")
-            if '_id' in project:
-                project['_id'] = str(project['_id'])
-                print(f"Converted _id to string: {project['_id']}")
-            else:
-                print(f"Project {i} missing _id field!")
-                # Try to get the _id from the document
-                project_doc = projects_collection.find_one({
-                    'year': project['year'],
-                    'teacherName': project['teacherName'],
-                    'projectName': project['projectName']
-                })
-                if project_doc and '_id' in project_doc:
-                    project['_id'] = str(project_doc['_id'])
-                    print(f"Retrieved _id from database: {project['_id']}")
-                else:
-                    print(f"Could not retrieve _id for project {i}")
-        
         return jsonify({
             'success': True,
             'projects': projects
@@ -1782,11 +2696,185 @@ def get_yearly_projects():
     except Exception as error:
         return jsonify({'error': str(error)}), 500
 
+YEARLY_PROJECT_COLUMNS = ['group_id', 'name', 'srn', 'mentor', 'project_title', 'project_description', 'year', 'report', 'poster']
+# Sheets with more data rows than this are imported by a background task
+BULK_IMPORT_BACKGROUND_ROWS = int(os.getenv('BULK_IMPORT_BACKGROUND_ROWS', 5000))
+
+def read_yearly_project_groups(ws, progress_callback=None):
+    """Stream rows from a read-only worksheet and group them by group_id.
+
+    Only the grouped projects are kept in memory, never the full sheet.
+    Raises ValueError if the sheet is empty or a required column is missing.
+    """
+    rows = ws.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    if header_row is None:
+        raise ValueError('Empty sheet')
+    headers = [str(h).strip().lower() if h is not None else '' for h in header_row]
+    for req in YEARLY_PROJECT_COLUMNS:
+        if req not in headers:
+            raise ValueError(f'Missing required column: {req}')
+    idx = {h: headers.index(h) for h in YEARLY_PROJECT_COLUMNS}
+
+    def cell(r, column):
+        value = r[idx[column]] if idx[column] < len(r) else None
+        return (str(value) if value is not None else '').strip()
+
+    groups = {}
+    for row_number, r in enumerate(rows, 1):
+        if progress_callback and row_number % 500 == 0:
+            progress_callback(row_number)
+        if r is None:
+            continue
+        group_id = cell(r, 'group_id')
+        if not group_id:
+            # Skip rows without a group id
+            continue
+        group = groups.setdefault(group_id, {
+            'mentor': '',
+            'project_title': '',
+            'project_description': '',
+            'year': '',
+            'report': '',
+            'poster': '',
+            'students': []
+        })
+
+        year_val = r[idx['year']] if idx['year'] < len(r) else None
+        try:
+            year = int(str(year_val).strip()) if year_val is not None else ''
+        except Exception:
+            year = ''
+
+        # Set shared fields if present (prefer first non-empty)
+        for field in ['mentor', 'project_title', 'project_description', 'report', 'poster']:
+            value = cell(r, field)
+            if value and not group[field]:
+                group[field] = value
+        if year and not group['year']:
+            group['year'] = year
+
+        name = cell(r, 'name')
+        srn = cell(r, 'srn')
+        if name or srn:
+            group['students'].append({'name': name, 'srn': srn})
+    return groups
+
+def import_yearly_project_groups(projects_collection, groups, category):
+    """Upsert grouped projects with a single unordered bulk_write.
+
+    Dedup relies on the (year, teacherName, projectName) unique index declared in
+    index_manager: existing projects are matched and left untouched, new ones are inserted.
+    """
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+
+    created_at = datetime.utcnow().isoformat()
+    group_ids = []
+    docs = []
+    operations = []
+    for gid, g in groups.items():
+        doc = {
+            'year': g['year'] if isinstance(g['year'], int) else int(str(g['year']) or 0),
+            'teacherName': g['mentor'],
+            'projectName': g['project_title'],
+            'projectDescription': g['project_description'],
+            'category': category,
+            'students': g['students'],
+            'report': g['report'],
+            'poster': g['poster'],
+            'createdAt': created_at,
+            'groupId': gid
+        }
+        key = {'year': doc['year'], 'teacherName': doc['teacherName'], 'projectName': doc['projectName']}
+        group_ids.append(gid)
+        docs.append(doc)
+        operations.append(UpdateOne(key, {'$setOnInsert': stamp(doc)}, upsert=True))
+
+    upserted_ids = {}
+    if operations:
+        try:
+            result = projects_collection.bulk_write(operations, ordered=False)
+            upserted_ids = result.upserted_ids
+        except BulkWriteError as bwe:
+            # Concurrent imports can race on the unique index; those rows are duplicates
+            details = bwe.details or {}
+            non_duplicate = [e for e in details.get('writeErrors', []) if e.get('code') != 11000]
+            if non_duplicate:
+                raise
+            upserted_ids = {u['index']: u['_id'] for u in details.get('upserted', [])}
+
+    inserted = []
+    preview = []
+    duplicate_positions = []
+    for position, doc in enumerate(docs):
+        if position in upserted_ids:
+            project_id = str(upserted_ids[position])
+            inserted.append(project_id)
+            update_suggest_index(project=doc)
+            preview.append({
+                '_id': project_id,
+                'year': doc['year'],
+                'teacherName': doc['teacherName'],
+                'projectName': doc['projectName'],
+                'projectDescription': doc['projectDescription'],
+                'category': doc['category'],
+                'students': doc['students'],
+                'report': doc['report'],
+                'poster': doc['poster']
+            })
+        else:
+            duplicate_positions.append(position)
+
+    # Resolve the ids of the existing projects in one round trip
+    skipped = []
+    if duplicate_positions:
+        existing_ids = {}
+        lookup = [{'year': docs[p]['year'], 'teacherName': docs[p]['teacherName'], 'projectName': docs[p]['projectName']}
+                  for p in duplicate_positions]
+        for existing in projects_collection.find({'$or': lookup}, {'year': 1, 'teacherName': 1, 'projectName': 1}):
+            existing_ids[(existing.get('year'), existing.get('teacherName'), existing.get('projectName'))] = str(existing['_id'])
+        for p in duplicate_positions:
+            key = (docs[p]['year'], docs[p]['teacherName'], docs[p]['projectName'])
+            skipped.append({'groupId': group_ids[p], 'reason': 'duplicate', 'projectId': existing_ids.get(key)})
+
+    return {
+        'success': True,
+        'inserted': inserted,
+        'skipped': skipped,
+        'preview': preview,
+        'groups': len(groups)
+    }
+
+def run_yearly_projects_import_task(task_id, data, category):
+    """Import a large yearly-projects workbook in the background, reporting progress"""
+    try:
+        from db_config import get_collection
+        from openpyxl import load_workbook
+        update_task_status(task_id, 'running', {'message': 'Reading workbook', 'rowsRead': 0})
+        wb = load_workbook(filename=io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            groups = read_yearly_project_groups(
+                wb.active,
+                progress_callback=lambda n: update_task_status(task_id, 'running', {'message': 'Reading workbook', 'rowsRead': n})
+            )
+        finally:
+            wb.close()
+        update_task_status(task_id, 'running', {'message': f'Writing {len(groups)} projects', 'groups': len(groups)})
+        result = import_yearly_project_groups(get_collection('yearly_projects'), groups, category)
+        update_task_status(task_id, 'completed', result)
+    except Exception as e:
+        update_task_status(task_id, 'failed', error=str(e))
+
 @app.route('/api/yearly-projects/bulk', methods=['POST'])
+@require_admin
 def add_yearly_projects_bulk():
     """Upload an Excel file and create multiple yearly projects grouped by group_id.
 
     Expected columns: group_id, name, srn, mentor, project_title, project_description, year, report, poster
+
+    Sheets larger than BULK_IMPORT_BACKGROUND_ROWS are imported by a background
+    task; the response is 202 with a task_id to poll at /tasks/<task_id>/status.
     """
     try:
         if 'file' not in request.files:
@@ -1797,150 +2885,43 @@ def add_yearly_projects_bulk():
 
         category = request.form.get('category')
         print(f"DEBUG: Bulk upload category received: '{category}'")
-        print(f"DEBUG: Category type: {type(category)}")
-        print(f"DEBUG: Form data keys: {list(request.form.keys())}")
         if not category or category not in ['Capstone', 'Summer Internship']:
             print(f"DEBUG: Category validation failed - category: '{category}'")
             return jsonify({'error': 'Missing or invalid category field. Must be "Capstone" or "Summer Internship"'}), 400
-        print(f"DEBUG: Category validation passed: '{category}'")
         # Read workbook in memory
+        from openpyxl import load_workbook
         data = file.read()
         wb = load_workbook(filename=io.BytesIO(data), read_only=True, data_only=True)
         ws = wb.active
 
-        # Extract headers
-        rows = list(ws.iter_rows(values_only=True))
-        if not rows:
-            return jsonify({'error': 'Empty sheet'}), 400
-        headers = [str(h).strip().lower() if h is not None else '' for h in rows[0]]
-
-        required = ['group_id', 'name', 'srn', 'mentor', 'project_title', 'project_description', 'year', 'report', 'poster']
-        for req in required:
-            if req not in headers:
-                return jsonify({'error': f'Missing required column: {req}'}), 400
-
-        idx = {h: headers.index(h) for h in required}
-
-        # Group rows by group_id
-        groups = {}
-        for r in rows[1:]:
-            if r is None:
-                continue
-            group_id = str(r[idx['group_id']]).strip() if r[idx['group_id']] is not None else ''
-            if not group_id:
-                # Skip rows without a group id
-                continue
-            group = groups.setdefault(group_id, {
-                'mentor': '',
-                'project_title': '',
-                'project_description': '',
-                'year': '',
-                'report': '',
-                'poster': '',
-                'students': []
-            })
+        # max_row comes from the sheet dimension and may be missing for some writers
+        if ws.max_row and ws.max_row - 1 > BULK_IMPORT_BACKGROUND_ROWS:
+            wb.close()
+            task_id = create_task('yearly_projects_import', {'filename': file.filename, 'category': category, 'rows': ws.max_row - 1})
+            thread = threading.Thread(target=run_yearly_projects_import_task, args=(task_id, data, category))
+            thread.daemon = True
+            thread.start()
+            return jsonify({
+                'task_id': task_id,
+                'status': 'started',
+                'message': 'Import started in background'
+            }), 202
 
-            mentor = (str(r[idx['mentor']]) if r[idx['mentor']] is not None else '').strip()
-            project_title = (str(r[idx['project_title']]) if r[idx['project_title']] is not None else '').strip()
-            project_description = (str(r[idx['project_description']]) if r[idx['project_description']] is not None else '').strip()
-            year_val = r[idx['year']]
-            try:
-                year = int(str(year_val).strip()) if year_val is not None else ''
-            except Exception:
-                year = ''
-            report = (str(r[idx['report']]) if r[idx['report']] is not None else '').strip()
-            poster = (str(r[idx['poster']]) if r[idx['poster']] is not None else '').strip()
-            name = (str(r[idx['name']]) if r[idx['name']] is not None else '').strip()
-            srn = (str(r[idx['srn']]) if r[idx['srn']] is not None else '').strip()
-
-            # Set shared fields if present (prefer first non-empty)
-            if project_title and not group['project_title']:
-                group['project_title'] = project_title
-            if mentor and not group['mentor']:
-                group['mentor'] = mentor
-            if project_description and not group['project_description']:
-                group['project_description'] = project_description
-            if year and not group['year']:
-                group['year'] = year
-            if report and not group['report']:
-                group['report'] = report
-            if poster and not group['poster']:
-                group['poster'] = poster
-
-            if name or srn:
-                group['students'].append({'name': name, 'srn': srn})
+        try:
+            groups = read_yearly_project_groups(ws)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+        finally:
+            wb.close()
 
         # Persist projects
         from db_config import get_collection
         projects_collection = get_collection('yearly_projects')
-
-        # Create unique index (no-op if exists)
-        try:
-            projects_collection.create_index([
-                ('year', 1), ('teacherName', 1), ('projectName', 1)
-            ], unique=True)
-        except Exception:
-            pass
-
-        inserted = []
-        skipped = []
-        preview = []
-        for gid, g in groups.items():
-            print(f"DEBUG: Processing group {gid}, category variable: '{category}'")
-            doc = {
-                'year': g['year'] if isinstance(g['year'], int) else int(str(g['year']) or 0),
-                'teacherName': g['mentor'],
-                'projectName': g['project_title'],
-                'projectDescription': g['project_description'],
-                'category': category,
-                'students': g['students'],
-                'report': g['report'],
-                'poster': g['poster'],
-                'createdAt': datetime.utcnow().isoformat(),
-                'groupId': gid
-            }
-            print(f"DEBUG: Created document with category: '{doc.get('category')}'")
-            print(f"DEBUG: Full document: {doc}")
-            # Skip duplicates
-            existing = projects_collection.find_one({
-                'year': doc['year'],
-                'teacherName': doc['teacherName'],
-                'projectName': doc['projectName']
-            })
-            if existing:
-                skipped.append({'groupId': gid, 'reason': 'duplicate', 'projectId': str(existing.get('_id'))})
-                continue
-            print(f"DEBUG: Bulk inserting project with category: '{doc.get('category')}'")
-            res = projects_collection.insert_one(doc)
-            print(f"DEBUG: Bulk project inserted with ID: {res.inserted_id}")
-            
-            # Verify what was actually inserted
-            inserted_doc = projects_collection.find_one({'_id': res.inserted_id})
-            print(f"DEBUG: Verifying inserted document category: '{inserted_doc.get('category') if inserted_doc else 'NOT_FOUND'}'")
-            print(f"DEBUG: Inserted document keys: {list(inserted_doc.keys()) if inserted_doc else 'NOT_FOUND'}")
-            inserted.append(str(res.inserted_id))
-            preview.append({
-                '_id': str(res.inserted_id),
-                'year': doc['year'],
-                'teacherName': doc['teacherName'],
-                'projectName': doc['projectName'],
-                'projectDescription': doc['projectDescription'],
-                'category': doc['category'],
-                'students': doc['students'],
-                'report': doc['report'],
-                'poster': doc['poster']
-            })
-
-        return jsonify({
-            'success': True,
-            'inserted': inserted,
-            'skipped': skipped,
-            'preview': preview,
-            'groups': len(groups)
-        }), 201
+        return jsonify(import_yearly_project_groups(projects_collection, groups, category)), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 @app.route('/api/yearly-projects', methods=['POST'])
+@require_admin
 def add_yearly_project():
     """Add a new yearly project"""
     try:
@@ -1974,14 +2955,6 @@ def add_yearly_project():
             'createdAt': datetime.utcnow().isoformat()
         }
         
-        # Ensure a unique index to help prevent duplicates (year, teacherName, projectName)
-        try:
-            projects_collection.create_index([
-                ('year', 1), ('teacherName', 1), ('projectName', 1)
-            ], unique=True)
-        except Exception:
-            pass
-
         # Prevent duplicates
         existing = projects_collection.find_one({
             'year': project['year'],
@@ -1993,18 +2966,20 @@ def add_yearly_project():
         
         # Insert the project
         print(f"DEBUG: Inserting project with category: '{project.get('category')}'")
-        result = projects_collection.insert_one(project)
+        result = projects_collection.insert_one(stamp(project))
         print(f"DEBUG: Project inserted with ID: {result.inserted_id}")
-            return jsonify({
-                'success': True,
-                'message': 'Project added successfully',
-                'projectId': str(result.inserted_id)
-            }), 201
-            
+        update_suggest_index(project=project)
+        return jsonify({
+            'success': True,
+            'message': 'Project added successfully',
+            'projectId': str(result.inserted_id)
+        }), 201
+
     except Exception as error:
         return jsonify({'error': str(error)}), 500
 
 @app.route('/api/yearly-projects/<project_id>', methods=['PUT'])
+@require_admin
 def update_yearly_project(project_id):
     """Update an existing yearly project"""
     try:
@@ -2035,10 +3010,11 @@ def update_yearly_project(project_id):
         # Update the project
         result = projects_collection.update_one(
             {'_id': ObjectId(project_id)},
-            {'$set': update_data}
+            {'$set': stamp(update_data)}
         )
         
         if result.modified_count > 0:
+            mark_suggest_index_stale()
             return jsonify({
                 'success': True,
                 'message': 'Project updated successfully'
@@ -2123,20 +3099,55 @@ def debug_projects_without_category():
         db = db_manager.connect()
         projects_collection = db['yearly_projects']
         
-        # Find projects without category field
-        projects_without_category = list(projects_collection.find({'category': {'$exists': False}}))
-        projects_with_empty_category = list(projects_collection.find({'category': {'$in': [None, '']}}))
-        
+        # Count projects without a category and return a few samples of each
+        missing_query = {'category': {'$exists': False}}
+        empty_query = {'category': {'$in': [None, '']}}
+
         return jsonify({
-            'projects_without_category': len(projects_without_category),
-            'projects_with_empty_category': len(projects_with_empty_category),
-            'sample_without': projects_without_category[:3] if projects_without_category else [],
-            'sample_empty': projects_with_empty_category[:3] if projects_with_empty_category else []
+            'projects_without_category': projects_collection.count_documents(missing_query),
+            'projects_with_empty_category': projects_collection.count_documents(empty_query),
+            'sample_without': list(projects_collection.find(missing_query).limit(3)),
+            'sample_empty': list(projects_collection.find(empty_query).limit(3))
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/admin/indexes', methods=['GET'])
+@require_admin
+def get_index_report():
+    """Report declared indexes that are missing, undeclared indexes, and indexes unused since restart"""
+    try:
+        return jsonify({'collections': reconcile_indexes(db_manager.get_db(), apply=False)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/indexes/reconcile', methods=['POST'])
+@require_admin
+def reconcile_index_registry():
+    """Create every declared index that is missing and rebuild those whose options differ.
+
+    Rebuilding drops the index before recreating it, which is why only this
+    endpoint does it; warm-up and post-scrape reconciles just report mismatches.
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'collections': reconcile_indexes(db_manager.get_db(), rebuild_mismatched=True)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/query-plans', methods=['GET'])
+@require_admin
+def get_query_plan_report():
+    """Explain the hot query shapes and flag collection scans and high scan ratios"""
+    try:
+        return jsonify(audit_query_plans(db_manager.get_db())), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/migrate/projects-add-category', methods=['POST'])
+@require_admin
 def migrate_projects_add_category():
     """Migration endpoint to add default category to existing projects"""
     try:
@@ -2146,13 +3157,13 @@ def migrate_projects_add_category():
         # Update projects without category field to have default 'Capstone' category
         result = projects_collection.update_many(
             {'category': {'$exists': False}},
-            {'$set': {'category': 'Capstone'}}
+            {'$set': stamp({'category': 'Capstone'})}
         )
         
         # Also update projects with empty/null category
         result2 = projects_collection.update_many(
             {'category': {'$in': [None, '']}},
-            {'$set': {'category': 'Capstone'}}
+            {'$set': stamp({'category': 'Capstone'})}
         )
         
         return jsonify({
@@ -2164,7 +3175,43 @@ def migrate_projects_add_category():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/migrate/publications-canonical-fields', methods=['POST'])
+@require_admin
+def migrate_publications_canonical_fields():
+    """Migration endpoint to backfill pubType/yearInt on every paper and index them"""
+    try:
+        from db_config import get_collection
+        per_collection = backfill_canonical_publication_fields(get_collection('teachers').database)
+        return jsonify({
+            'success': True,
+            'collections': len(per_collection),
+            'updated_by_collection': per_collection,
+            'total_updated': sum(per_collection.values())
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/migrate/domains-canonical', methods=['POST'])
+@require_admin
+def migrate_domains_canonical():
+    """Migration endpoint to backfill canonicalDomain on every domain entry and index it"""
+    try:
+        db = db_manager.connect()
+        domains_collection = db['domains']
+        ensure_collection_indexes(db, 'domains')
+
+        # Normalize each distinct spelling once, then update all entries that share it
+        distinct_names, modified = renormalize_domains(domains_collection, domain_normalizers.reload())
+        return jsonify({
+            'success': True,
+            'distinct_names': distinct_names,
+            'total_updated': modified
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/yearly-projects/<project_id>', methods=['DELETE'])
+@require_admin
 def delete_yearly_project(project_id):
     """Delete a yearly project"""
     try:
@@ -2190,6 +3237,8 @@ def delete_yearly_project(project_id):
         
         if result.deleted_count > 0:
             print(f"Successfully deleted project with ID: {project_id}")
+            record_tombstone(db, 'yearly_projects', project_id)
+            mark_suggest_index_stale()
             return jsonify({
                 'success': True,
                 'message': 'Project deleted successfully'
@@ -2202,6 +3251,292 @@ def delete_yearly_project(project_id):
         print(f"Error deleting project: {str(error)}")
         return jsonify({'error': str(error)}), 500
 
+# ---- Reporting exports ----
+EXPORT_COLUMNS = {
+    'publications': ['teacherName', 'title', 'authors', 'pubType', 'yearInt', 'journal', 'conference', 'book',
+                     'source', 'publisher', 'volume', 'issue', 'pages', 'citationCount', 'url', 'patentNumber'],
+    'projects': ['year', 'category', 'teacherName', 'projectName', 'projectDescription', 'students', 'report', 'poster'],
+    'funds': ['year', 'teacherConsultant', 'consultantAgency', 'sponsoringAgency', 'revenue', 'status', 'imageUrl']
+}
+EXPORT_CHUNK_ROWS = 500
+EXPORT_CURSOR_BATCH = 1000
+
+def parse_export_filters(dataset, args):
+    """Translate export query parameters into a MongoDB filter for the dataset.
+
+    Supported parameters: teacher, yearFrom, yearTo, type (publications), category (projects),
+    status (funds). Raises ValueError on malformed years.
+    """
+    query = {}
+    year_field = {'publications': 'yearInt', 'projects': 'year', 'funds': 'year'}[dataset]
+    teacher_field = {'publications': 'teacherName', 'projects': 'teacherName', 'funds': 'teacherConsultant'}[dataset]
+
+    teacher = (args.get('teacher') or '').strip()
+    if teacher:
+        query[teacher_field] = teacher
+
+    year_range = {}
+    for param, op in [('yearFrom', '$gte'), ('yearTo', '$lte')]:
+        value = (args.get(param) or '').strip()
+        if value:
+            try:
+                year_range[op] = int(value)
+            except ValueError:
+                raise ValueError(f'{param} must be a number')
+    if year_range:
+        query[year_field] = year_range
+
+    if dataset == 'publications' and args.get('type'):
+        types = [t.strip() for t in args.get('type').split(',') if t.strip()]
+        query['pubType'] = {'$in': types}
+    if dataset == 'projects' and args.get('category'):
+        query['category'] = args.get('category')
+    if dataset == 'funds' and args.get('status'):
+        query['status'] = args.get('status')
+    return query
+
+def iter_export_documents(dataset, query):
+    """Yield export documents straight from MongoDB cursors, one batch at a time."""
+    from db_config import get_analytics_collection as get_collection
+    columns = EXPORT_COLUMNS[dataset]
+    projection = {'_id': 0, **{c: 1 for c in columns}}
+    if dataset == 'publications':
+        db = db_manager.get_analytics_db()
+        teacher = query.get('teacherName')
+        if teacher:
+            collection_names = ['papers_' + re.sub(r'[^a-z0-9]', '_', teacher.lower())]
+        else:
+            collection_names = sorted(col for col in db.list_collection_names() if col.startswith('papers_'))
+        for col_name in collection_names:
+            cursor = db.get_collection(col_name).find(query, projection).sort('yearInt', -1).batch_size(EXPORT_CURSOR_BATCH)
+            for doc in cursor:
+                yield doc
+    elif dataset == 'projects':
+        cursor = get_collection('yearly_projects').find(query, projection).sort([('year', -1), ('createdAt', -1)])
+        for doc in cursor.batch_size(EXPORT_CURSOR_BATCH):
+            yield doc
+    else:
+        cursor = get_collection('funds').find(query, projection).sort([('year', -1), ('createdAt', -1)])
+        for doc in cursor.batch_size(EXPORT_CURSOR_BATCH):
+            yield doc
+
+def export_cell(value):
+    """Flatten a document value into a single spreadsheet cell."""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        # Project students are stored as [{'name', 'srn'}]
+        parts = []
+        for item in value:
+            if isinstance(item, dict):
+                name = item.get('name', '')
+                srn = item.get('srn', '')
+                parts.append(f"{name} ({srn})" if srn else name)
+            else:
+                parts.append(str(item))
+        return '; '.join(parts)
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+def stream_csv_export(dataset, query):
+    """Generate CSV output in chunks of EXPORT_CHUNK_ROWS rows."""
+    import csv
+    columns = EXPORT_COLUMNS[dataset]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for doc in iter_export_documents(dataset, query):
+        writer.writerow([export_cell(doc.get(c)) for c in columns])
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
+
+def stream_xlsx_export(dataset, query):
+    """Write a write-only workbook to a temp file, then stream the file in chunks.
+
+    The xlsx container is a zip and has to be finalized before it can be sent,
+    but write-only mode keeps memory flat while the rows are being written.
+    """
+    import tempfile
+    from openpyxl import Workbook
+    columns = EXPORT_COLUMNS[dataset]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=dataset)
+    ws.append(columns)
+    for doc in iter_export_documents(dataset, query):
+        ws.append([export_cell(doc.get(c)) for c in columns])
+
+    tmp = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    tmp.close()
+    try:
+        wb.save(tmp.name)
+        with open(tmp.name, 'rb') as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
+
+@app.route('/api/export/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    """Stream publications, projects or funds as CSV (default) or XLSX.
+
+    Query params: format=csv|xlsx, teacher, yearFrom, yearTo, type, category, status
+    """
+    try:
+        if dataset not in EXPORT_COLUMNS:
+            return jsonify({'error': f'Unknown dataset: {dataset}. Use one of {sorted(EXPORT_COLUMNS)}'}), 400
+        export_format = (request.args.get('format') or 'csv').lower()
+        if export_format not in ['csv', 'xlsx']:
+            return jsonify({'error': 'format must be csv or xlsx'}), 400
+        try:
+            query = parse_export_filters(dataset, request.args)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+
+        filename = f"{dataset}_{datetime.utcnow().strftime('%Y%m%d')}.{export_format}"
+        if export_format == 'csv':
+            body = stream_csv_export(dataset, query)
+            mimetype = 'text/csv'
+        else:
+            body = stream_xlsx_export(dataset, query)
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        # No Content-Length is set, so the response goes out with chunked transfer encoding
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ---- Delta-sync change feed ----
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """Teachers, projects, funds and awards inserted, updated or deleted since ?since=<token>.
+
+    Without a token, or when the token can no longer be served, the response has
+    reset=true: refetch everything once and keep the returned token. Keep calling
+    while hasMore is true. Optional: collections (comma-separated).
+    """
+    try:
+        try:
+            result = read_changes(db_manager.get_db(), request.args.get('since'), _csv_arg('collections') or None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ---- Worker warm-up ----
+# (name, callable) pairs run in order by warm_up(); each step is timed and a
+# failing step is logged without stopping the worker from starting.
+WARM_UP_STEPS = []
+
+def warm_up_step(name):
+    """Register a function to run during worker warm-up"""
+    def register(fn):
+        WARM_UP_STEPS.append((name, fn))
+        return fn
+    return register
+
+@warm_up_step('mongodb')
+def _warm_up_mongodb():
+    db_manager.ping()
+
+@warm_up_step('indexes')
+def _warm_up_indexes():
+    report = reconcile_indexes(db_manager.get_db())
+    for collection_name, entry in report.items():
+        print(f'[INDEX] {collection_name}: {entry}')
+
+@warm_up_step('coauthor_graph')
+def _warm_up_coauthor_graph():
+    # Loads the saved graph, or builds it once across workers, off the request path
+    def build():
+        try:
+            get_coauthor_graph_store().ensure_built()
+        except Exception as e:
+            print(f'[COAUTHORS] Initial build failed: {e}')
+    _coauthor_graph_executor.submit(build)
+
+@warm_up_step('canonical_publication_fields')
+def _warm_up_canonical_publication_fields():
+    # Papers written before pubType/yearInt existed; stats derive them on the fly meanwhile
+    def backfill():
+        try:
+            updated = sum(backfill_canonical_publication_fields(db_manager.get_db(), only_missing=True).values())
+            if updated:
+                print(f'[CANONICAL] Backfilled pubType/yearInt on {updated} papers')
+        except Exception as e:
+            print(f'[CANONICAL] Backfill failed: {e}')
+    thread = threading.Thread(target=backfill, name='canonical-backfill')
+    thread.daemon = True
+    thread.start()
+
+@warm_up_step('domain_normalizer')
+def _warm_up_domain_normalizer():
+    domain_normalizers.reload()
+
+def on_citations_changed(teacher_names):
+    """Citations changed for these teachers: record history, refresh their rankings and cached profiles"""
+    refresh_rankings(db_manager.get_db(), teacher_names)
+    record_citation_snapshots(db_manager.get_db(), teacher_names)
+    mark_citation_matrix_dirty()
+    for name in teacher_names:
+        invalidate_teacher_profile(name)
+
+total_citations_watcher = TotalCitationsWatcher(db_manager.get_db, on_change=on_citations_changed)
+
+@warm_up_step('total_citations_watcher')
+def _warm_up_total_citations_watcher():
+    if os.getenv('TOTAL_CITATIONS_WATCHER', 'true').lower() != 'false':
+        total_citations_watcher.start()
+
+change_feed_watcher = ChangeFeedWatcher(db_manager.get_db)
+
+@warm_up_step('change_feed_watcher')
+def _warm_up_change_feed_watcher():
+    if os.getenv('CHANGE_FEED_WATCHER', 'true').lower() != 'false':
+        change_feed_watcher.start()
+
+def warm_up(worker_started=None):
+    """Connect to MongoDB, ensure indexes and prefill caches before serving traffic.
+
+    Called by gunicorn's post_worker_init hook (gunicorn.conf.py), so it runs in each
+    worker after fork and before the worker accepts connections. worker_started is the
+    perf_counter() value recorded in post_fork; cold start is measured from it, since
+    with preload_app the module was imported once in the master, possibly long before.
+    """
+    started = time.perf_counter()
+    timings = {}
+    for name, step in WARM_UP_STEPS:
+        step_started = time.perf_counter()
+        try:
+            step()
+            timings[name] = f'{(time.perf_counter() - step_started) * 1000:.0f} ms'
+        except Exception as e:
+            timings[name] = f'failed: {e}'
+    finished = time.perf_counter()
+    cold_start = finished - (worker_started if worker_started is not None else _IMPORT_STARTED)
+    print(f'[STARTUP] pid {os.getpid()} cold start {cold_start * 1000:.0f} ms '
+          f'(module import {(_IMPORT_FINISHED - _IMPORT_STARTED) * 1000:.0f} ms, '
+          f'warm-up {(finished - started) * 1000:.0f} ms) {timings}')
+    return timings
+
+_IMPORT_FINISHED = time.perf_counter()
+
 # Start the Node.js scheduler as a background process when the Flask app starts
 # Only do this if this script is the main entry point and Redis is configured
 if __name__ == '__main__':
@@ -2219,4 +3554,6 @@ if __name__ == '__main__':
     # Prefer Railway's PORT, fallback to API_PORT, then 5000 locally
     port = int(os.getenv('PORT', os.getenv('API_PORT', 5000)))
     # Disable debug mode and auto-reloader to prevent conflicts with Celery
+    # gunicorn calls warm_up() from post_worker_init; the dev server has no such hook
+    warm_up()
     app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
\ No newline at end of file
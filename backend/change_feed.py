@@ -0,0 +1,320 @@
+"""Delta-sync change feed for clients that mirror teachers, projects, funds and awards.
+
+Two sources back the feed:
+
+* stream: a ChangeFeedWatcher tails a database change stream (replica sets and
+  Atlas) and appends one change_log entry per insert, update or delete, with a
+  sequence number from a counter document. Writes to papers_* and the stats
+  sources only flag communityStatsChanged, so they are coalesced into one entry
+  per collection per batch. Tokens carry the last sequence seen.
+* poll: without change streams, each collection is queried on its write
+  watermark field and deletes are read from change_tombstones, which API delete
+  paths write. Tokens carry the watermark time.
+
+The watcher saves its change stream resume token with its lease renewals, so
+restarts and lease handovers continue where the last watcher stopped (events
+since the last save are logged again, which readers tolerate). When it cannot
+resume, it bumps the lease's epoch; stream tokens carry the epoch they were
+issued in.
+
+Tokens are opaque to clients. A token from the other mode or another epoch, or
+older than the retention window, answers with reset=True so the client
+refetches once.
+"""
+import base64
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from index_manager import register_indexes
+
+# Collection -> field stamped (as a BSON date) on every write
+FEED_COLLECTIONS = {
+    'teachers': 'lastUpdated',  # set by the scraper
+    'yearly_projects': 'syncedAt',
+    'funds': 'syncedAt',
+    'awards': 'syncedAt',
+}
+SYNC_FIELD = 'syncedAt'
+CHANGE_LOG_COLLECTION = 'change_log'
+TOMBSTONES_COLLECTION = 'change_tombstones'
+LEASES_COLLECTION = 'service_leases'
+FEED_RETENTION_DAYS = int(os.getenv('CHANGE_FEED_RETENTION_DAYS', 30))
+FEED_PAGE_SIZE = 1000
+# Poll tokens step back this far so writes committing during a read are picked up next time
+POLL_SKEW_SECONDS = 2
+LEASE_SECONDS = 60
+# Coalesced stats-only entries are written at least this often while changes keep arriving
+STATS_FLUSH_SECONDS = 1
+# Writes to these mean community stats may have changed
+STATS_SOURCES = {'teacher_stats': 'updatedAt', 'total_citations': 'updatedAt'}
+
+register_indexes(CHANGE_LOG_COLLECTION, [
+    ([('seq', ASCENDING)], {'unique': True}),
+    ([('at', ASCENDING)], {'expireAfterSeconds': FEED_RETENTION_DAYS * 86400}),
+])
+register_indexes(TOMBSTONES_COLLECTION, [
+    ([('deletedAt', ASCENDING)], {'expireAfterSeconds': FEED_RETENTION_DAYS * 86400}),
+])
+for _name, _field in FEED_COLLECTIONS.items():
+    register_indexes(_name, [([(_field, ASCENDING)], {})])
+
+
+def encode_token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    """Token payload dict; raises ValueError for malformed tokens."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except Exception:
+        raise ValueError('Invalid since token')
+    if not isinstance(payload, dict) or payload.get('m') not in ('stream', 'poll'):
+        raise ValueError('Invalid since token')
+    return payload
+
+
+def stamp(doc):
+    """Set the sync watermark on a document (or $set dict) written through the API."""
+    doc[SYNC_FIELD] = datetime.utcnow()
+    return doc
+
+
+def record_tombstone(db, collection, doc_id):
+    """Remember a delete for poll-mode clients (stream mode sees deletes in the change stream)."""
+    db[TOMBSTONES_COLLECTION].insert_one({'collection': collection, 'docId': str(doc_id), 'deletedAt': datetime.utcnow()})
+
+
+def stream_active(db):
+    """True while a watcher holds an unexpired lease with a running change stream."""
+    lease = db[LEASES_COLLECTION].find_one({'_id': 'change_feed_watcher'}, {'expiresAt': 1, 'streaming': 1})
+    return bool(lease and lease.get('streaming') and lease.get('expiresAt', 0) > time.time())
+
+
+def _empty_changes(collections):
+    return {name: {'upserted': [], 'deleted': []} for name in collections}
+
+
+def _fetch_docs(db, collection, ids):
+    object_ids = []
+    for doc_id in ids:
+        try:
+            object_ids.append(ObjectId(doc_id))
+        except Exception:
+            object_ids.append(doc_id)
+    return list(db[collection].find({'_id': {'$in': object_ids}}))
+
+
+def _stats_changed(db, since):
+    return any(db[name].find_one({field: {'$gt': since}}, {'_id': 1}) for name, field in STATS_SOURCES.items())
+
+
+def _stream_epoch(db):
+    """Bumped whenever the watcher could not resume its change stream, so the log may have a gap."""
+    lease = db[LEASES_COLLECTION].find_one({'_id': 'change_feed_watcher'}, {'epoch': 1})
+    return (lease or {}).get('epoch', 0)
+
+
+def _read_stream(db, collections, payload):
+    log = db[CHANGE_LOG_COLLECTION]
+    epoch = _stream_epoch(db)
+    if payload.get('e', 0) != epoch:
+        return None  # writes may have been missed since this token was issued
+    since_seq = payload.get('s', 0)
+    oldest = log.find_one({}, {'seq': 1}, sort=[('seq', ASCENDING)])
+    if oldest and oldest['seq'] > since_seq + 1:
+        return None  # entries after the token have expired
+    entries = list(log.find({'seq': {'$gt': since_seq}}).sort('seq', ASCENDING).limit(FEED_PAGE_SIZE))
+    last = {}
+    for entry in entries:
+        if entry['collection'] in collections:
+            # Only the latest operation per document matters
+            last[(entry['collection'], entry['docId'])] = entry['op']
+    changes = _empty_changes(collections)
+    for name in collections:
+        upserted = [doc_id for (coll, doc_id), op in last.items() if coll == name and op != 'delete']
+        changes[name]['deleted'] = [doc_id for (coll, doc_id), op in last.items() if coll == name and op == 'delete']
+        found = _fetch_docs(db, name, upserted) if upserted else []
+        found_ids = {str(doc['_id']) for doc in found}
+        changes[name]['upserted'] = found
+        # Upserted then deleted before this read
+        changes[name]['deleted'].extend(doc_id for doc_id in upserted if doc_id not in found_ids)
+    since_time = payload.get('t')
+    token = {'m': 'stream', 'e': epoch, 's': entries[-1]['seq'] if entries else since_seq, 't': time.time()}
+    stats_changed = any(e['collection'] in STATS_SOURCES or e['collection'].startswith('papers_') for e in entries)
+    if since_time and not stats_changed:
+        stats_changed = _stats_changed(db, datetime.utcfromtimestamp(since_time))
+    return changes, token, len(entries) == FEED_PAGE_SIZE, stats_changed
+
+
+def _read_poll(db, collections, payload):
+    since = datetime.utcfromtimestamp(payload['t'])
+    if datetime.utcnow() - since > timedelta(days=FEED_RETENTION_DAYS):
+        return None  # tombstones for that period have expired
+    read_started = time.time()
+    changes = _empty_changes(collections)
+    for name in collections:
+        changes[name]['upserted'] = list(db[name].find({FEED_COLLECTIONS[name]: {'$gt': since}}))
+    for tombstone in db[TOMBSTONES_COLLECTION].find(
+        {'deletedAt': {'$gt': since}, 'collection': {'$in': collections}}, {'_id': 0, 'collection': 1, 'docId': 1}
+    ):
+        changes[tombstone['collection']]['deleted'].append(tombstone['docId'])
+    token = {'m': 'poll', 't': read_started - POLL_SKEW_SECONDS}
+    return changes, token, False, _stats_changed(db, since)
+
+
+def read_changes(db, since=None, collections=None):
+    """Answer one /api/changes request; raises ValueError for bad tokens or collections."""
+    collections = collections or list(FEED_COLLECTIONS)
+    unknown = [c for c in collections if c not in FEED_COLLECTIONS]
+    if unknown:
+        raise ValueError(f'Unknown collections: {unknown}. Use {list(FEED_COLLECTIONS)}')
+    mode = 'stream' if stream_active(db) else 'poll'
+    payload = decode_token(since) if since else None
+
+    result = None
+    if payload and payload['m'] == mode:
+        result = _read_stream(db, collections, payload) if mode == 'stream' else _read_poll(db, collections, payload)
+    if result is None:
+        # No token, a token from the other mode or epoch, or one past retention: start over
+        if mode == 'stream':
+            latest = db[CHANGE_LOG_COLLECTION].find_one({}, {'seq': 1}, sort=[('seq', -1)])
+            token = {'m': 'stream', 'e': _stream_epoch(db), 's': latest['seq'] if latest else 0, 't': time.time()}
+        else:
+            token = {'m': 'poll', 't': time.time() - POLL_SKEW_SECONDS}
+        return {'token': encode_token(token), 'mode': mode, 'reset': True, 'hasMore': False,
+                'changes': _empty_changes(collections), 'communityStatsChanged': True}
+
+    changes, token, has_more, stats_changed = result
+    return {'token': encode_token(token), 'mode': mode, 'reset': False, 'hasMore': has_more,
+            'changes': changes, 'communityStatsChanged': stats_changed}
+
+
+class ChangeFeedWatcher:
+    """Appends change_log entries from a database change stream while holding the lease."""
+
+    def __init__(self, db_getter):
+        self._db_getter = db_getter
+        self._owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='change-feed-watcher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _acquire_lease(self, db, streaming):
+        from pymongo.errors import DuplicateKeyError
+        now = time.time()
+        try:
+            db[LEASES_COLLECTION].find_one_and_update(
+                {'_id': 'change_feed_watcher', '$or': [{'owner': self._owner}, {'expiresAt': {'$lt': now}}]},
+                {'$set': {'owner': self._owner, 'expiresAt': now + LEASE_SECONDS, 'streaming': streaming}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def _run(self):
+        from pymongo.errors import OperationFailure
+        while True:
+            try:
+                db = self._db_getter()
+                if not self._acquire_lease(db, streaming=False):
+                    time.sleep(LEASE_SECONDS / 2)
+                    continue
+                self._watch(db)
+            except OperationFailure as e:
+                if e.code == 40573:
+                    print('[CHANGES] Change streams need a replica set; /api/changes will poll watermarks')
+                    return
+                print(f'[CHANGES] Watcher error, retrying: {e}')
+                time.sleep(LEASE_SECONDS / 2)
+            except Exception as e:
+                print(f'[CHANGES] Watcher error, retrying: {e}')
+                time.sleep(LEASE_SECONDS / 2)
+
+    def _next_seq(self, db):
+        counter = db[LEASES_COLLECTION].find_one_and_update(
+            {'_id': 'change_feed_seq'}, {'$inc': {'seq': 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return counter['seq']
+
+    def _log_stats_changes(self, db, pending):
+        """Write one change_log entry per collection whose changes only affect community stats."""
+        if not pending:
+            return
+        now = datetime.utcnow()
+        counter = db[LEASES_COLLECTION].find_one_and_update(
+            {'_id': 'change_feed_seq'}, {'$inc': {'seq': len(pending)}}, upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        first = counter['seq'] - len(pending) + 1
+        db[CHANGE_LOG_COLLECTION].insert_many([
+            {'seq': first + i, 'collection': name, 'docId': '', 'op': 'upsert', 'at': now}
+            for i, name in enumerate(sorted(pending))
+        ])
+        pending.clear()
+
+    def _watch(self, db):
+        from pymongo.errors import OperationFailure
+        watched = list(FEED_COLLECTIONS) + list(STATS_SOURCES)
+        pipeline = [{'$match': {
+            'operationType': {'$in': ['insert', 'update', 'replace', 'delete']},
+            '$or': [{'ns.coll': {'$in': watched}}, {'ns.coll': {'$regex': '^papers_'}}],
+        }}]
+        leases = db[LEASES_COLLECTION]
+        lease = leases.find_one({'_id': 'change_feed_watcher'}, {'resumeToken': 1})
+        resume_token = (lease or {}).get('resumeToken')
+        try:
+            stream = db.watch(pipeline, max_await_time_ms=1000, resume_after=resume_token)
+        except OperationFailure as e:
+            if resume_token is None or e.code == 40573:
+                raise
+            # The saved position has left the oplog: start from now and make clients reset
+            print(f'[CHANGES] Could not resume change stream ({e}); starting a new epoch')
+            stream = db.watch(pipeline, max_await_time_ms=1000)
+            leases.update_one({'_id': 'change_feed_watcher'}, {'$inc': {'epoch': 1}})
+        if resume_token is None:
+            # No saved position (first start): changes before now were never logged
+            leases.update_one({'_id': 'change_feed_watcher'}, {'$inc': {'epoch': 1}})
+        lease_renewed = time.monotonic()
+        stats_pending, stats_flushed = set(), time.monotonic()
+        with stream:
+            self._acquire_lease(db, streaming=True)
+            while stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    collection = change['ns']['coll']
+                    if collection in FEED_COLLECTIONS:
+                        db[CHANGE_LOG_COLLECTION].insert_one({
+                            'seq': self._next_seq(db),
+                            'collection': collection,
+                            'docId': str(change['documentKey']['_id']),
+                            'op': 'delete' if change['operationType'] == 'delete' else 'upsert',
+                            'at': datetime.utcnow(),
+                        })
+                    else:
+                        stats_pending.add(collection)
+                if stats_pending and (change is None or time.monotonic() - stats_flushed > STATS_FLUSH_SECONDS):
+                    self._log_stats_changes(db, stats_pending)
+                    stats_flushed = time.monotonic()
+                if time.monotonic() - lease_renewed > LEASE_SECONDS / 3:
+                    if not self._acquire_lease(db, streaming=True):
+                        return
+                    # Saved after pending entries are logged, so a restart resumes at-least-once
+                    self._log_stats_changes(db, stats_pending)
+                    leases.update_one({'_id': 'change_feed_watcher', 'owner': self._owner},
+                                      {'$set': {'resumeToken': stream.resume_token}})
+                    lease_renewed = time.monotonic()
@@ -0,0 +1,183 @@
+"""Append-only citation history stored with the bucket pattern.
+
+Scrapes overwrite the citations documents and every paper's citationCount, so
+each snapshot is also appended here: one document per (series, month) holding
+packed parallel arrays of sample days and counts. A sample is only appended
+when the count differs from the bucket's last one, so a month with no change
+costs a single sample, and buckets older than HISTORY_COMPACT_AFTER_MONTHS
+are reduced to their final sample.
+
+Series are identified by kind ('teacher', 'paper' or 'community') and key
+(teacher name, '<collection>:<url or title>', or 'all').
+"""
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+HISTORY_COLLECTION = 'citation_history'
+HISTORY_COMPACT_AFTER_MONTHS = int(os.getenv('CITATION_HISTORY_COMPACT_AFTER_MONTHS', 24))
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_number(day):
+    return (day - _EPOCH).days
+
+
+def _day_from_number(number):
+    return _EPOCH + timedelta(days=number)
+
+
+def _total(citations_per_year):
+    return sum(v for v in (citations_per_year or {}).values() if isinstance(v, (int, float)))
+
+
+def _append_operation(kind, key, count, day, teacher_name=None):
+    """Upsert that appends (day, count) to the month's bucket unless count is unchanged.
+
+    When the bucket exists and its last count equals count, the filter misses and the
+    upsert fails with a duplicate _id, which record_samples ignores.
+    """
+    month = day.strftime('%Y-%m')
+    on_insert = {'kind': kind, 'key': key, 'month': month}
+    if teacher_name:
+        on_insert['teacherName'] = teacher_name
+    return UpdateOne(
+        {'_id': f'{kind}:{key}:{month}', 'last': {'$ne': count}},
+        {
+            '$push': {'days': _day_number(day), 'counts': count},
+            '$set': {'last': count, 'lastDay': _day_number(day)},
+            '$inc': {'n': 1},
+            '$setOnInsert': on_insert,
+        },
+        upsert=True
+    )
+
+
+def record_samples(db, operations):
+    """Run append operations; returns the number of samples written."""
+    if not operations:
+        return 0
+    try:
+        result = db[HISTORY_COLLECTION].bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+    except BulkWriteError as bwe:
+        details = bwe.details or {}
+        unexpected = [e for e in details.get('writeErrors', []) if e.get('code') != 11000]
+        if unexpected:
+            raise
+        return details.get('nUpserted', 0) + details.get('nModified', 0)
+
+
+def record_citation_snapshots(db, teacher_names=None, include_papers=True, include_community=True, when=None):
+    """Append the current citation counts of teachers (default: all), their papers and the community.
+
+    Returns {'teachers', 'papers', 'community'} sample counts written.
+    """
+    day = (when or datetime.utcnow()).date()
+    query = {'teacherName': {'$in': list(teacher_names)}} if teacher_names is not None else {}
+    teacher_ops = []
+    for doc in db['citations'].find(query, {'_id': 0, 'teacherName': 1, 'citationsPerYear': 1}):
+        if doc.get('teacherName'):
+            teacher_ops.append(_append_operation('teacher', doc['teacherName'], _total(doc.get('citationsPerYear')), day))
+
+    paper_ops = []
+    if include_papers:
+        collections = [n for n in db.list_collection_names() if n.startswith('papers_')]
+        if teacher_names is not None:
+            wanted = {'papers_' + re.sub(r'[^a-z0-9]', '_', n.lower()) for n in teacher_names}
+            collections = [n for n in collections if n in wanted]
+        for name in collections:
+            for paper in db[name].find({}, {'_id': 0, 'url': 1, 'title': 1, 'citationCount': 1, 'teacherName': 1}):
+                paper_key = paper.get('url') or paper.get('title')
+                count = paper.get('citationCount')
+                if paper_key and isinstance(count, (int, float)):
+                    paper_ops.append(_append_operation(
+                        'paper', f'{name}:{paper_key}', int(count), day, paper.get('teacherName')
+                    ))
+
+    community_ops = []
+    if include_community:
+        total = sum(doc.get('total', 0) for doc in db['total_citations'].find({}, {'_id': 0, 'total': 1}))
+        community_ops.append(_append_operation('community', 'all', int(total), day))
+
+    written = {
+        'teachers': record_samples(db, teacher_ops),
+        'papers': record_samples(db, paper_ops),
+        'community': record_samples(db, community_ops),
+    }
+    compact_history(db, day)
+    return written
+
+
+def compact_history(db, today=None):
+    """Reduce buckets older than the retention window to their last sample."""
+    today = today or datetime.utcnow().date()
+    months_back = today.year * 12 + today.month - 1 - HISTORY_COMPACT_AFTER_MONTHS
+    cutoff = f'{months_back // 12:04d}-{months_back % 12 + 1:02d}'
+    result = db[HISTORY_COLLECTION].update_many(
+        {'month': {'$lt': cutoff}, 'n': {'$gt': 1}},
+        [{'$set': {'days': ['$lastDay'], 'counts': ['$last'], 'n': 1, 'compacted': True}}]
+    )
+    return result.modified_count
+
+
+def _month(day):
+    return day.strftime('%Y-%m')
+
+
+def _clip(samples, start, end):
+    """Samples within [start, end], preceded by the last sample before start as a baseline."""
+    if end:
+        samples = [s for s in samples if s[0] <= end]
+    if start:
+        before = [s for s in samples if s[0] < start]
+        samples = before[-1:] + [s for s in samples if s[0] >= start]
+    return samples
+
+
+def load_series(db, kind, key, start=None, end=None):
+    """[(day, count), ...] for one series between start and end (dates, inclusive)."""
+    query = {'kind': kind, 'key': key}
+    if end:
+        query['month'] = {'$lte': _month(end)}
+    samples = []
+    for bucket in db[HISTORY_COLLECTION].find(query, {'_id': 0, 'days': 1, 'counts': 1}).sort('month', 1):
+        samples.extend(zip(bucket.get('days', []), bucket.get('counts', [])))
+    return _clip([(_day_from_number(d), c) for d, c in samples], start, end)
+
+
+def summarize_series(samples):
+    """Series plus first, last and delta; None values when there are no samples."""
+    return {
+        'series': [{'date': d.isoformat(), 'count': c} for d, c in samples],
+        'first': samples[0][1] if samples else None,
+        'last': samples[-1][1] if samples else None,
+        'delta': samples[-1][1] - samples[0][1] if samples else None,
+    }
+
+
+def paper_deltas(db, teacher_name, start=None, end=None, limit=20):
+    """Papers of one teacher with the largest citation change over the range."""
+    query = {'kind': 'paper', 'teacherName': teacher_name}
+    if end:
+        query['month'] = {'$lte': _month(end)}
+    by_paper = {}
+    for bucket in db[HISTORY_COLLECTION].find(query, {'_id': 0, 'key': 1, 'days': 1, 'counts': 1}).sort('month', 1):
+        by_paper.setdefault(bucket['key'], []).extend(
+            (_day_from_number(d), c) for d, c in zip(bucket.get('days', []), bucket.get('counts', []))
+        )
+    movers = []
+    for key, samples in by_paper.items():
+        samples = _clip(samples, start, end)
+        if samples:
+            movers.append({
+                'paper': key.split(':', 1)[1],
+                'from': samples[0][1],
+                'to': samples[-1][1],
+                'delta': samples[-1][1] - samples[0][1],
+            })
+    movers.sort(key=lambda m: -m['delta'])
+    return movers[:limit]
@@ -0,0 +1,184 @@
+"""Dense teacher x year citation matrix for vectorized analytics.
+
+Loads every citations document once into a NumPy array so community totals,
+growth, moving averages, per-domain aggregates, percentiles and cumulative
+curves are each a single array operation instead of a Python loop over
+citationsPerYear dicts.
+"""
+import threading
+import time
+
+import numpy as np
+
+ANALYTICS_METRICS = ['totals', 'growth', 'moving_average', 'cumulative', 'percentiles']
+ANALYTICS_GROUPS = ['community', 'teacher', 'domain']
+# Reload at least this often even without a change notification (writes from other processes)
+MATRIX_MAX_AGE_SECONDS = 300
+# Year keys outside this range are scraping noise; they would stretch the contiguous year axis
+MIN_YEAR, MAX_YEAR = 1900, 2100
+
+
+class CitationMatrix:
+    """Citations per (teacher, year) with the teacher and domain labels for each axis."""
+
+    def __init__(self, teachers, years, values, domains=None):
+        self.teachers = list(teachers)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.int64).reshape(len(self.teachers), len(self.years))
+        self._teacher_index = {name: i for i, name in enumerate(self.teachers)}
+        # domain -> row indexes of its teachers
+        self.domains = {domain: np.asarray(rows, dtype=np.int64) for domain, rows in (domains or {}).items()}
+
+    @classmethod
+    def from_db(cls, db):
+        docs = list(db['citations'].find({}, {'_id': 0, 'teacherName': 1, 'citationsPerYear': 1}))
+        teachers = sorted({doc['teacherName'] for doc in docs if doc.get('teacherName')})
+        index = {name: i for i, name in enumerate(teachers)}
+        rows, year_keys, counts = [], [], []
+        for doc in docs:
+            row = index.get(doc.get('teacherName'))
+            if row is None:
+                continue
+            for year, count in (doc.get('citationsPerYear') or {}).items():
+                if str(year).isdigit() and MIN_YEAR <= int(year) <= MAX_YEAR and isinstance(count, (int, float)):
+                    rows.append(row)
+                    year_keys.append(int(year))
+                    counts.append(int(count))
+        # Contiguous year axis: years nobody was cited in are zero columns, so growth and
+        # moving averages step one calendar year at a time
+        years = np.arange(min(year_keys), max(year_keys) + 1, dtype=np.int64) if year_keys else np.zeros(0, dtype=np.int64)
+        values = np.zeros((len(teachers), len(years)), dtype=np.int64)
+        if counts:
+            # Scatter-add every (teacher, year, count) triple in one call
+            np.add.at(values, (np.asarray(rows), np.asarray(year_keys, dtype=np.int64) - years[0]), counts)
+
+        domains = {}
+        for doc in db['domains'].find({'canonicalDomain': {'$nin': [None, '']}}, {'_id': 0, 'teacherName': 1, 'canonicalDomain': 1}):
+            row = index.get(doc.get('teacherName'))
+            if row is not None and doc.get('canonicalDomain'):
+                domains.setdefault(doc['canonicalDomain'], set()).add(row)
+        return cls(teachers, years, values, {d: sorted(r) for d, r in domains.items()})
+
+    def select(self, teachers=None, year_from=None, year_to=None):
+        """Return (row indexes, year mask) for a teacher subset and an inclusive year range."""
+        if teachers:
+            rows = np.asarray([self._teacher_index[t] for t in teachers if t in self._teacher_index], dtype=np.int64)
+        else:
+            rows = np.arange(len(self.teachers))
+        mask = np.ones(len(self.years), dtype=bool)
+        if year_from is not None:
+            mask &= self.years >= year_from
+        if year_to is not None:
+            mask &= self.years <= year_to
+        return rows, mask
+
+    def grouped(self, by, rows, mask, domains=None):
+        """Labels and a (groups x years) matrix summed by community, teacher or domain."""
+        block = self.values[np.ix_(rows, mask)]
+        if by == 'teacher':
+            return [self.teachers[r] for r in rows], block
+        if by == 'domain':
+            selected = set(rows.tolist())
+            labels = sorted(d for d in self.domains if not domains or d in domains)
+            # Membership matrix (domains x selected teachers) times the citation block
+            membership = np.zeros((len(labels), len(rows)), dtype=np.int64)
+            position = {r: i for i, r in enumerate(rows.tolist())}
+            for i, domain in enumerate(labels):
+                members = [position[r] for r in self.domains[domain].tolist() if r in selected]
+                membership[i, members] = 1
+            return labels, membership @ block
+        return ['community'], block.sum(axis=0, keepdims=True)
+
+
+def growth(series):
+    """Year-over-year change along the year axis: (absolute, percent); percent is NaN after a zero year."""
+    previous = series[:, :-1].astype(np.float64)
+    absolute = np.diff(series, axis=1)
+    percent = np.divide(absolute * 100.0, previous, out=np.full(previous.shape, np.nan), where=previous != 0)
+    return absolute, percent
+
+
+def moving_average(series, window):
+    """Trailing moving average over `window` years via a cumulative sum; aligned to the window end."""
+    if window < 1 or window > series.shape[1]:
+        return np.empty((series.shape[0], 0))
+    cumulative = np.cumsum(np.pad(series, ((0, 0), (1, 0))), axis=1, dtype=np.float64)
+    return (cumulative[:, window:] - cumulative[:, :-window]) / window
+
+
+def percentiles(block, qs):
+    """Per-year percentiles across teachers: {q: values}."""
+    if block.shape[0] == 0:
+        return {q: np.full(block.shape[1], np.nan) for q in qs}
+    result = np.percentile(block, qs, axis=0)
+    return dict(zip(qs, result))
+
+
+def to_json_list(values, digits=2):
+    """NumPy row -> list with NaN as None, rounded floats"""
+    if values.dtype.kind in 'iu':
+        return values.tolist()
+    rounded = np.round(values.astype(np.float64), digits)
+    return [None if np.isnan(v) else v for v in rounded.tolist()]
+
+
+class CitationMatrixStore:
+    """Holds the current matrix for this process; rebuilt lazily after a change."""
+
+    def __init__(self, db_getter):
+        self._db_getter = db_getter
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._loaded_at = 0.0
+        self._dirty = True
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def get(self):
+        if self._dirty or self._matrix is None or time.monotonic() - self._loaded_at > MATRIX_MAX_AGE_SECONDS:
+            with self._lock:
+                if self._dirty or self._matrix is None or time.monotonic() - self._loaded_at > MATRIX_MAX_AGE_SECONDS:
+                    self._dirty = False
+                    self._matrix = CitationMatrix.from_db(self._db_getter())
+                    self._loaded_at = time.monotonic()
+        return self._matrix
+
+
+def citation_analytics(matrix, metric='totals', by='community', teachers=None, domains=None,
+                       year_from=None, year_to=None, window=3, qs=(25, 50, 75, 90)):
+    """Answer one analytics query against the matrix; raises ValueError on bad parameters."""
+    if metric not in ANALYTICS_METRICS:
+        raise ValueError(f'metric must be one of {ANALYTICS_METRICS}')
+    if by not in ANALYTICS_GROUPS:
+        raise ValueError(f'by must be one of {ANALYTICS_GROUPS}')
+    rows, mask = matrix.select(teachers, year_from, year_to)
+    years = matrix.years[mask]
+    response = {'metric': metric, 'by': by, 'teachers': len(rows)}
+
+    if metric == 'percentiles':
+        block = matrix.values[np.ix_(rows, mask)]
+        response['years'] = years.tolist()
+        response['series'] = {f'p{q:g}': to_json_list(v) for q, v in percentiles(block, list(qs)).items()}
+        return response
+
+    labels, series = matrix.grouped(by, rows, mask, domains)
+    if metric == 'totals':
+        response['years'] = years.tolist()
+        response['series'] = {label: to_json_list(row) for label, row in zip(labels, series)}
+    elif metric == 'cumulative':
+        response['years'] = years.tolist()
+        response['series'] = {label: to_json_list(row) for label, row in zip(labels, np.cumsum(series, axis=1))}
+    elif metric == 'growth':
+        absolute, percent = growth(series)
+        response['years'] = years[1:].tolist()
+        response['series'] = {
+            label: {'absolute': to_json_list(a), 'percent': to_json_list(p)}
+            for label, a, p in zip(labels, absolute, percent)
+        }
+    elif metric == 'moving_average':
+        averaged = moving_average(series, window)
+        response['window'] = window
+        response['years'] = years[window - 1:].tolist() if averaged.shape[1] else []
+        response['series'] = {label: to_json_list(row) for label, row in zip(labels, averaged)}
+    return response
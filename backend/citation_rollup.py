@@ -0,0 +1,145 @@
+import os
+import socket
+import threading
+import time
+import uuid
+
+TOTAL_CITATIONS_COLLECTION = 'total_citations'
+CITATIONS_COLLECTION = 'citations'
+LEASES_COLLECTION = 'service_leases'
+# Changes arriving within this window are folded into one rebuild
+REBUILD_DEBOUNCE_SECONDS = float(os.getenv('TOTAL_CITATIONS_DEBOUNCE_SECONDS', 5))
+# Only the worker holding the lease watches; another takes over once it expires
+LEASE_SECONDS = 60
+
+
+def total_citations_pipeline(rebuilt_at):
+    """Sum citationsPerYear across all teachers and $merge the per-year totals in place.
+
+    Each year's document is updated atomically, so readers never see an empty
+    collection. Documents are stamped with rebuiltAt (epoch nanoseconds when the
+    rebuild started) so years that no longer appear can be removed afterwards.
+    When rebuilds overlap, a row already written by a later rebuild is kept.
+    """
+    is_newer = {'$gt': ['$$new.rebuiltAt', {'$ifNull': ['$rebuiltAt', 0]}]}
+    return [
+        {'$project': {'pairs': {'$objectToArray': {'$ifNull': ['$citationsPerYear', {}]}}}},
+        {'$unwind': '$pairs'},
+        {'$match': {'pairs.k': {'$regex': '^[0-9]+$'}}},
+        {'$group': {
+            '_id': {'$toInt': '$pairs.k'},
+            'total': {'$sum': {'$convert': {'input': '$pairs.v', 'to': 'long', 'onError': 0, 'onNull': 0}}}
+        }},
+        {'$project': {'_id': 0, 'year': '$_id', 'total': 1, 'rebuiltAt': {'$literal': rebuilt_at}, 'updatedAt': '$$NOW'}},
+        {'$merge': {
+            'into': TOTAL_CITATIONS_COLLECTION,
+            'on': 'year',  # needs the unique year index declared in index_manager
+            'whenMatched': [{'$set': {
+                'total': {'$cond': [is_newer, '$$new.total', '$total']},
+                'updatedAt': {'$cond': [is_newer, '$$new.updatedAt', '$updatedAt']},
+                'rebuiltAt': {'$cond': [is_newer, '$$new.rebuiltAt', '$rebuiltAt']},
+            }}],
+            'whenNotMatched': 'insert'
+        }},
+    ]
+
+
+def rebuild_total_citations(db):
+    """Recompute total_citations inside MongoDB; returns {'years': [...], 'removed': n}.
+
+    Safe to run concurrently (watcher, scrape completion, the POST route): a rebuild
+    only removes years stamped by an earlier rebuild than itself, never rows that a
+    concurrent later rebuild has just merged.
+    """
+    from index_manager import ensure_collection_indexes
+    ensure_collection_indexes(db, TOTAL_CITATIONS_COLLECTION)
+    rebuilt_at = time.time_ns()
+    db[CITATIONS_COLLECTION].aggregate(total_citations_pipeline(rebuilt_at))
+    totals = db[TOTAL_CITATIONS_COLLECTION]
+    removed = totals.delete_many({'$or': [
+        {'rebuiltAt': {'$lt': rebuilt_at}},
+        {'rebuiltAt': {'$exists': False}},
+    ]}).deleted_count
+    years = sorted(doc['year'] for doc in totals.find({}, {'_id': 0, 'year': 1}))
+    return {'years': years, 'removed': removed}
+
+
+class TotalCitationsWatcher:
+    """Rebuilds total_citations whenever a citations document changes.
+
+    Tails a change stream on the citations collection (replica sets and Atlas
+    only). A lease document ensures a single worker watches at a time.
+    on_change, if given, is called with the names of the teachers whose
+    citations changed, after each rebuild.
+    """
+
+    def __init__(self, db_getter, on_change=None):
+        self._db_getter = db_getter
+        self._on_change = on_change
+        self._owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._thread = None
+        self.last_rebuild = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='total-citations-watcher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _acquire_lease(self, db):
+        from pymongo.errors import DuplicateKeyError
+        now = time.time()
+        try:
+            db[LEASES_COLLECTION].find_one_and_update(
+                {'_id': 'total_citations_watcher', '$or': [{'owner': self._owner}, {'expiresAt': {'$lt': now}}]},
+                {'$set': {'owner': self._owner, 'expiresAt': now + LEASE_SECONDS}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            return False
+
+    def _run(self):
+        from pymongo.errors import OperationFailure
+        while True:
+            try:
+                db = self._db_getter()
+                if not self._acquire_lease(db):
+                    time.sleep(LEASE_SECONDS / 2)
+                    continue
+                self._watch(db)
+            except OperationFailure as e:
+                if e.code == 40573:
+                    print('[CITATIONS] Change streams need a replica set; total_citations will only be rebuilt on demand')
+                    return
+                print(f'[CITATIONS] Watcher error, retrying: {e}')
+                time.sleep(LEASE_SECONDS / 2)
+            except Exception as e:
+                print(f'[CITATIONS] Watcher error, retrying: {e}')
+                time.sleep(LEASE_SECONDS / 2)
+
+    def _watch(self, db):
+        pending_since = None
+        changed_teachers = set()
+        lease_renewed = time.monotonic()
+        with db[CITATIONS_COLLECTION].watch(full_document='updateLookup', max_await_time_ms=1000) as stream:
+            while stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    pending_since = pending_since or time.monotonic()
+                    teacher_name = (change.get('fullDocument') or {}).get('teacherName')
+                    if teacher_name:
+                        changed_teachers.add(teacher_name)
+                if pending_since is not None and time.monotonic() - pending_since >= REBUILD_DEBOUNCE_SECONDS:
+                    pending_since = None
+                    self.last_rebuild = rebuild_total_citations(db)
+                    print(f"[CITATIONS] total_citations rebuilt for years {self.last_rebuild['years']}")
+                    if self._on_change and changed_teachers:
+                        self._on_change(sorted(changed_teachers))
+                    changed_teachers = set()
+                if time.monotonic() - lease_renewed > LEASE_SECONDS / 3:
+                    if not self._acquire_lease(db):
+                        return
+                    lease_renewed = time.monotonic()
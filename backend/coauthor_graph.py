@@ -0,0 +1,441 @@
+"""Co-authorship graph over every papers_* collection, stored as CSR arrays.
+
+Nodes are authors keyed by a normalized name (first initial + surname, so
+"A. K. Sharma", "AK Sharma" and "Anil Kumar Sharma" meet). An edge's weight
+is the number of distinct papers two authors share. The graph is persisted
+as a compressed .npz file so workers start without rescanning MongoDB. Papers
+ingested through the API go to a small JSON delta next to it, replayed on load,
+and are folded into a new .npz once the delta grows past COMPACT_THRESHOLD
+edges. Deletions are
+applied by the next full rebuild (after each scrape, or POST /api/coauthors/rebuild).
+Writers in every worker serialize on an flock next to the .npz file and reload
+the saved graph before applying their papers, so no worker's additions are lost.
+"""
+import fcntl
+import json
+import os
+import re
+import threading
+import unicodedata
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+GRAPH_PATH = os.getenv('COAUTHOR_GRAPH_PATH', os.path.join(os.path.dirname(__file__), 'data', 'coauthor_graph.npz'))
+# Incremental edges are kept in a side table and merged into the CSR arrays past this size
+COMPACT_THRESHOLD = 5000
+# Author lists longer than this (consortium papers) are truncated to bound the pair count
+MAX_AUTHORS_PER_PAPER = 50
+
+_HONORIFICS = {'dr', 'prof', 'professor', 'mr', 'mrs', 'ms'}
+_AUTHOR_SPLIT = re.compile(r',|;|&|\band\b')
+# The paper fields the graph reads (and keeps in the delta file)
+_PAPER_FIELDS = ('authors', 'teacherName', 'url', 'title', 'year')
+
+
+def normalize_author(raw):
+    """Reduce an author name to 'initial surname'; None for placeholders."""
+    text = unicodedata.normalize('NFKD', raw or '').encode('ascii', 'ignore').decode('ascii').lower()
+    tokens = [t for t in re.sub(r'[^a-z\s]', ' ', text.replace('-', ' ')).split() if t not in _HONORIFICS]
+    if not tokens or tokens == ['unknown', 'authors'] or tokens[:2] == ['et', 'al']:
+        return None
+    if len(tokens) == 1:
+        return tokens[0]
+    return f'{tokens[0][0]} {tokens[-1]}'
+
+
+def split_authors(authors):
+    """Split an authors string into (key, display name) pairs, deduplicated in order."""
+    seen = {}
+    for piece in _AUTHOR_SPLIT.split(authors or ''):
+        name = piece.strip().strip('.').strip()
+        if not name or '...' in piece or '…' in piece:
+            continue
+        key = normalize_author(name)
+        if key and key not in seen:
+            seen[key] = name
+    return list(seen.items())
+
+
+def paper_key(paper):
+    """Identity used to count a paper once even when it sits in several teachers' collections."""
+    url = (paper.get('url') or '').strip()
+    if url:
+        return url
+    return re.sub(r'[^a-z0-9]', '', str(paper.get('title') or '').lower()) + '|' + str(paper.get('year') or '')
+
+
+class CoauthorGraph:
+    """Weighted undirected graph: CSR arrays plus a side table of incremental edges."""
+
+    def __init__(self, keys=(), names=(), faculty=(), indptr=None, indices=None, weights=None, paper_keys=(),
+                 base=''):
+        self.keys = list(keys)
+        self.names = list(names)
+        # Teacher name for faculty nodes, '' for external co-authors
+        self.faculty = list(faculty)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.indptr = np.zeros(1, dtype=np.int64) if indptr is None else np.asarray(indptr, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32) if indices is None else np.asarray(indices, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.int32) if weights is None else np.asarray(weights, dtype=np.int32)
+        self.paper_keys = set(paper_keys)
+        # Identifies the saved CSR arrays a delta file applies to
+        self.base = base
+        self.delta = {}
+        self.delta_edges = 0
+        # (teacher_name, paper) pairs behind the delta, persisted in the delta file
+        self.delta_papers = []
+
+    # ---- construction ----
+    def _node(self, key, name, teacher_name=''):
+        i = self.index.get(key)
+        if i is None:
+            i = len(self.keys)
+            self.index[key] = i
+            self.keys.append(key)
+            self.names.append(teacher_name or name)
+            self.faculty.append(teacher_name)
+        elif teacher_name and not self.faculty[i]:
+            self.faculty[i] = teacher_name
+            self.names[i] = teacher_name
+        return i
+
+    def _paper_nodes(self, teacher_name, paper):
+        authors = split_authors(paper.get('authors'))[:MAX_AUTHORS_PER_PAPER]
+        nodes = {self._node(k, name) for k, name in authors}
+        # The owning teacher co-authored the paper even if their name is spelled differently
+        teacher_key = normalize_author(teacher_name)
+        if teacher_key:
+            nodes.add(self._node(teacher_key, teacher_name, teacher_name))
+        return nodes
+
+    @staticmethod
+    def _pairs(nodes):
+        nodes = sorted(nodes)
+        return [(a, b) for pos, a in enumerate(nodes) for b in nodes[pos + 1:]]
+
+    @classmethod
+    def from_papers(cls, papers):
+        """Build from an iterable of (teacher_name, paper) pairs.
+
+        A paper stored under several teachers is counted once, with the union of its authors.
+        """
+        graph = cls()
+        by_paper = {}
+        for teacher_name, paper in papers:
+            by_paper.setdefault(paper_key(paper), set()).update(graph._paper_nodes(teacher_name, paper))
+        graph.paper_keys = set(by_paper)
+        pairs = Counter()
+        for nodes in by_paper.values():
+            pairs.update(cls._pairs(nodes))
+        graph._set_edges(pairs)
+        return graph
+
+    def _set_edges(self, pairs):
+        """Replace the CSR arrays with the given {(a, b): weight} edges (a < b)."""
+        n = len(self.keys)
+        if pairs:
+            edges = np.array([(a, b, w) for (a, b), w in pairs.items()], dtype=np.int64)
+            src = np.concatenate([edges[:, 0], edges[:, 1]])
+            dst = np.concatenate([edges[:, 1], edges[:, 0]])
+            weight = np.concatenate([edges[:, 2], edges[:, 2]])
+            order = np.lexsort((dst, src))
+            src, dst, weight = src[order], dst[order], weight[order]
+        else:
+            src = dst = weight = np.zeros(0, dtype=np.int64)
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))]).astype(np.int64)
+        self.indices = dst.astype(np.int32)
+        self.weights = weight.astype(np.int32)
+        self.delta = {}
+        self.delta_edges = 0
+        self.delta_papers = []
+
+    def _all_pairs(self):
+        pairs = Counter()
+        for a in range(len(self.indptr) - 1):
+            for b, w in zip(self.indices[self.indptr[a]:self.indptr[a + 1]].tolist(),
+                            self.weights[self.indptr[a]:self.indptr[a + 1]].tolist()):
+                if a < b:
+                    pairs[(a, b)] += w
+        for a, row in self.delta.items():
+            for b, w in row.items():
+                if a < b:
+                    pairs[(a, b)] += w
+        return pairs
+
+    def add_papers(self, teacher_name, papers):
+        """Add newly ingested papers to the delta; returns the number of papers not seen before."""
+        added = 0
+        for paper in papers:
+            key = paper_key(paper)
+            if key in self.paper_keys:
+                continue
+            self.paper_keys.add(key)
+            added += 1
+            self.delta_papers.append((teacher_name, {f: paper.get(f) for f in _PAPER_FIELDS}))
+            for a, b in self._pairs(self._paper_nodes(teacher_name, paper)):
+                for x, y in ((a, b), (b, a)):
+                    row = self.delta.setdefault(x, {})
+                    row[y] = row.get(y, 0) + 1
+                self.delta_edges += 1
+        return added
+
+    @property
+    def needs_compaction(self):
+        return self.delta_edges > COMPACT_THRESHOLD
+
+    # ---- persistence ----
+    def save(self, path=GRAPH_PATH):
+        """Fold the delta into the CSR arrays and write them under a new base id."""
+        if self.delta:
+            self._set_edges(self._all_pairs())
+        self.base = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            keys=np.array(self.keys, dtype=str), names=np.array(self.names, dtype=str),
+            faculty=np.array(self.faculty, dtype=str), indptr=self.indptr, indices=self.indices,
+            weights=self.weights, paper_keys=np.array(sorted(self.paper_keys), dtype=str),
+            base=np.array(self.base)
+        )
+        os.replace(tmp_path, path)
+        # A delta left over from the previous base no longer matches and is ignored on load
+        self.save_delta(path)
+
+    def save_delta(self, path=GRAPH_PATH):
+        """Write only the papers added since the last save(); cheap next to rewriting the .npz."""
+        tmp_path = delta_path(path) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'base': self.base, 'papers': self.delta_papers}, f, default=str)
+        os.replace(tmp_path, delta_path(path))
+
+    @classmethod
+    def load(cls, path=GRAPH_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            graph = cls(
+                keys=data['keys'].tolist(), names=data['names'].tolist(), faculty=data['faculty'].tolist(),
+                indptr=data['indptr'], indices=data['indices'], weights=data['weights'],
+                paper_keys=data['paper_keys'].tolist(), base=str(data['base']) if 'base' in data else ''
+            )
+        try:
+            with open(delta_path(path)) as f:
+                delta = json.load(f)
+        except FileNotFoundError:
+            return graph
+        if delta.get('base') == graph.base:
+            for teacher_name, paper in delta['papers']:
+                graph.add_papers(teacher_name, [paper])
+        return graph
+
+    # ---- queries ----
+    def find(self, name):
+        """Node index for a teacher or author name, or None."""
+        key = normalize_author(name)
+        return self.index.get(key) if key else None
+
+    def neighbors(self, i):
+        """{neighbor: weight} merging the CSR row and incremental edges."""
+        row = {}
+        if i < len(self.indptr) - 1:
+            start, end = self.indptr[i], self.indptr[i + 1]
+            row = dict(zip(self.indices[start:end].tolist(), self.weights[start:end].tolist()))
+        for j, w in self.delta.get(i, {}).items():
+            row[j] = row.get(j, 0) + w
+        return row
+
+    def describe(self, i):
+        return {'name': self.names[i], 'faculty': bool(self.faculty[i]), 'teacherName': self.faculty[i] or None}
+
+    def collaborators(self, i, limit=20):
+        row = self.neighbors(i)
+        ranked = sorted(row.items(), key=lambda item: (-item[1], self.names[item[0]]))[:limit]
+        return [{**self.describe(j), 'sharedPapers': w} for j, w in ranked]
+
+    def strength(self, a, b):
+        """Shared papers and a cosine-normalized strength in [0, 1]."""
+        row_a, row_b = self.neighbors(a), self.neighbors(b)
+        shared = row_a.get(b, 0)
+        degree_a, degree_b = sum(row_a.values()), sum(row_b.values())
+        normalized = shared / np.sqrt(degree_a * degree_b) if degree_a and degree_b else 0.0
+        common = sorted(set(row_a) & set(row_b) - {a, b}, key=lambda j: self.names[j])
+        return {'sharedPapers': shared, 'strength': round(float(normalized), 4),
+                'commonCollaborators': [self.describe(j) for j in common]}
+
+    def shortest_path(self, source, target, max_depth=6):
+        """Fewest-hop collaboration path as a list of node indexes, or None."""
+        if source == target:
+            return [source]
+        parents = {source: None}
+        frontier = deque([(source, 0)])
+        while frontier:
+            node, depth = frontier.popleft()
+            if depth >= max_depth:
+                continue
+            for neighbor in self.neighbors(node):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = node
+                if neighbor == target:
+                    path = [target]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    return path[::-1]
+                frontier.append((neighbor, depth + 1))
+        return None
+
+    def bridges(self, teacher_domains, limit=20):
+        """Authors whose faculty collaborators span several research domains.
+
+        teacher_domains maps teacherName -> set of canonical domains.
+        """
+        spans = {}
+        for i, teacher_name in enumerate(self.faculty):
+            domains = teacher_domains.get(teacher_name) if teacher_name else None
+            if not domains:
+                continue
+            for j, w in self.neighbors(i).items():
+                entry = spans.setdefault(j, {'domains': set(), 'faculty': set(), 'sharedPapers': 0})
+                entry['domains'] |= domains
+                entry['faculty'].add(teacher_name)
+                entry['sharedPapers'] += w
+        ranked = sorted(
+            ((j, e) for j, e in spans.items() if len(e['domains']) > 1),
+            key=lambda item: (-len(item[1]['domains']), -len(item[1]['faculty']), -item[1]['sharedPapers'])
+        )[:limit]
+        return [{**self.describe(j), 'domains': sorted(e['domains']), 'facultyCollaborators': sorted(e['faculty']),
+                 'sharedPapers': e['sharedPapers']} for j, e in ranked]
+
+
+def delta_path(path):
+    return os.path.splitext(path)[0] + '.delta.json'
+
+
+class GraphNotReady(RuntimeError):
+    """No saved graph yet; the first build runs in the background."""
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock shared by every worker process writing the graph file (not re-entrant)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def iter_corpus(db):
+    """(teacher_name, paper) for every paper in every papers_* collection."""
+    for name in db.list_collection_names():
+        if not name.startswith('papers_'):
+            continue
+        for paper in db[name].find({}, {'_id': 0, **{f: 1 for f in _PAPER_FIELDS}}):
+            if paper.get('teacherName'):
+                yield paper['teacherName'], paper
+
+
+class CoauthorGraphStore:
+    """Per-process graph, loaded from disk and reloaded when another worker saves.
+
+    get() never scans MongoDB: without a saved graph it starts a background
+    build (normally already started by ensure_built() at warm-up) and raises
+    GraphNotReady.
+    """
+
+    def __init__(self, db_getter, path=GRAPH_PATH):
+        self._db_getter = db_getter
+        self._path = path
+        self._lock = threading.Lock()
+        self._graph = None
+        self._mtime = None
+        self._building = False
+
+    def _file_mtime(self):
+        """Modification times of the .npz and its delta, or None before the first save."""
+        try:
+            graph_mtime = os.stat(self._path).st_mtime_ns
+        except OSError:
+            return None
+        try:
+            return graph_mtime, os.stat(delta_path(self._path)).st_mtime_ns
+        except OSError:
+            return graph_mtime, None
+
+    def _load_locked(self, mtime):
+        self._graph = CoauthorGraph.load(self._path)
+        self._mtime = mtime
+
+    def get(self):
+        mtime = self._file_mtime()
+        if self._graph is not None and mtime == self._mtime:
+            return self._graph
+        if mtime is None:
+            self._build_in_background()
+            raise GraphNotReady('The co-authorship graph is being built; retry shortly')
+        with self._lock:
+            mtime = self._file_mtime()
+            if self._graph is None or mtime != self._mtime:
+                self._load_locked(mtime)
+        return self._graph
+
+    def _build_in_background(self):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        thread = threading.Thread(target=self.ensure_built, name='coauthor-graph-build')
+        thread.daemon = True
+        thread.start()
+
+    def ensure_built(self):
+        """Build and save the graph unless some worker already has; then load it."""
+        try:
+            with self._lock:
+                with _file_lock(self._path):
+                    if self._file_mtime() is None:
+                        self._rebuild_locked()
+                    elif self._graph is None or self._file_mtime() != self._mtime:
+                        self._load_locked(self._file_mtime())
+            return self._graph
+        finally:
+            self._building = False
+
+    def _rebuild_locked(self):
+        """Full rebuild; callers hold both the thread lock and the file lock."""
+        self._graph = CoauthorGraph.from_papers(iter_corpus(self._db_getter()))
+        self._graph.save(self._path)
+        self._mtime = self._file_mtime()
+
+    def rebuild(self):
+        with self._lock:
+            with _file_lock(self._path):
+                self._rebuild_locked()
+        return self._graph
+
+    def add_papers(self, teacher_name, papers):
+        """Apply papers on top of the latest saved graph and persist them, under the file lock.
+
+        Only the delta file is rewritten until it needs compaction.
+        """
+        with self._lock:
+            with _file_lock(self._path):
+                mtime = self._file_mtime()
+                if mtime is None:
+                    # The first build reads these papers from MongoDB anyway
+                    self._rebuild_locked()
+                    return 0
+                if self._graph is None or mtime != self._mtime:
+                    self._load_locked(mtime)
+                added = self._graph.add_papers(teacher_name, papers)
+                if added:
+                    if self._graph.needs_compaction:
+                        self._graph.save(self._path)
+                    else:
+                        self._graph.save_delta(self._path)
+                    self._mtime = self._file_mtime()
+        return added
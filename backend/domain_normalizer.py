@@ -0,0 +1,134 @@
+import re
+import threading
+import time
+from functools import lru_cache
+
+# Built-in synonym table, in priority order: when a name mentions several
+# domains, the earliest entry wins. Admins can override it through the
+# domain_synonyms collection (see load_synonym_table).
+DEFAULT_SYNONYMS = [
+    ('Cybersecurity', ['cyber security', 'cybersecurity', 'cyber-security']),
+    ('Machine Learning', ['machine learning', 'ml', 'ai/ml', 'artificial intelligence']),
+    ('Digital Twin', ['digital twin', 'digital twins']),
+    ('Digital Forensics', ['digital forensics', 'cyber forensics', 'computer forensics']),
+    ('Computer Vision', ['computer vision', 'cv', 'image processing']),
+    ('Data Science', ['data science', 'data analytics', 'big data']),
+    ('Internet of Things', ['iot', 'internet of things', 'smart devices']),
+    ('Blockchain', ['blockchain', 'distributed ledger', 'cryptocurrency']),
+    ('Cloud Computing', ['cloud computing', 'cloud', 'aws', 'azure']),
+]
+
+SYNONYMS_COLLECTION = 'domain_synonyms'
+CACHE_SIZE = 4096
+# How often a worker re-reads the synonym table, so edits made through another
+# worker are picked up without a restart
+RELOAD_INTERVAL_SECONDS = 60
+
+
+class DomainNormalizer:
+    """Token-aware, single-pass domain name normalizer.
+
+    All variants are compiled into one alternation anchored on token boundaries,
+    so 'ml' matches "ML for Security" but not "html". Results are memoized in a
+    bounded LRU cache.
+    """
+
+    def __init__(self, synonyms):
+        self.synonyms = [(canonical, list(variants)) for canonical, variants in synonyms]
+        self._priority = {}
+        for priority, (canonical, variants) in enumerate(self.synonyms):
+            for variant in variants:
+                key = self._squash(variant)
+                if key and key not in self._priority:
+                    self._priority[key] = (priority, canonical)
+        # Longest variants first so 'cloud computing' wins over 'cloud'
+        variants = sorted(self._priority, key=len, reverse=True)
+        if variants:
+            alternation = '|'.join(re.escape(v).replace(r'\ ', r'\s+') for v in variants)
+            self._pattern = re.compile(r'(?<![a-z0-9])(?:' + alternation + r')(?![a-z0-9])')
+        else:
+            self._pattern = None
+        self.normalize = lru_cache(maxsize=CACHE_SIZE)(self._normalize)
+
+    @staticmethod
+    def _squash(text):
+        return re.sub(r'\s+', ' ', text.lower().strip())
+
+    def _normalize(self, domain_name):
+        if not domain_name:
+            return domain_name
+        normalized = self._squash(domain_name)
+        best = None
+        if self._pattern is not None:
+            for match in self._pattern.finditer(normalized):
+                hit = self._priority[self._squash(match.group(0))]
+                if best is None or hit[0] < best[0]:
+                    best = hit
+                    if best[0] == 0:
+                        break
+        if best is not None:
+            return best[1]
+        # If no match found, return the original name with proper capitalization
+        return domain_name.strip().title()
+
+
+def load_synonym_table(collection):
+    """Read the synonym table from MongoDB, falling back to DEFAULT_SYNONYMS when empty."""
+    rows = list(collection.find({}, {'_id': 0, 'canonical': 1, 'variants': 1, 'priority': 1}).sort('priority', 1))
+    if not rows:
+        return list(DEFAULT_SYNONYMS)
+    return [(row['canonical'], row.get('variants') or []) for row in rows if row.get('canonical')]
+
+
+def seed_synonym_table(collection):
+    """Store DEFAULT_SYNONYMS in the collection if it is empty; returns True if seeded."""
+    if collection.count_documents({}, limit=1):
+        return False
+    collection.insert_many([
+        {'canonical': canonical, 'variants': variants, 'priority': priority}
+        for priority, (canonical, variants) in enumerate(DEFAULT_SYNONYMS)
+    ])
+    return True
+
+
+class NormalizerRegistry:
+    """Holds the compiled normalizer for this process and reloads it periodically."""
+
+    def __init__(self, collection_getter):
+        self._collection_getter = collection_getter
+        self._lock = threading.Lock()
+        self._normalizer = None
+        self._loaded_at = 0.0
+
+    def get(self):
+        if self._normalizer is None or time.monotonic() - self._loaded_at > RELOAD_INTERVAL_SECONDS:
+            self.reload()
+        return self._normalizer
+
+    def reload(self):
+        with self._lock:
+            try:
+                synonyms = load_synonym_table(self._collection_getter())
+            except Exception as e:
+                print(f'[DOMAINS] Could not load synonym table, using defaults: {e}')
+                synonyms = self._normalizer.synonyms if self._normalizer else DEFAULT_SYNONYMS
+            if self._normalizer is None or synonyms != self._normalizer.synonyms:
+                self._normalizer = DomainNormalizer(synonyms)
+            self._loaded_at = time.monotonic()
+        return self._normalizer
+
+
+def renormalize_domains(domains_collection, normalizer):
+    """Recompute canonicalDomain for every distinct domainName in one bulk_write.
+
+    Returns (distinct_names, modified_count).
+    """
+    from pymongo import UpdateMany
+    operations = [
+        UpdateMany({'domainName': name, 'canonicalDomain': {'$ne': normalizer.normalize(name)}},
+                   {'$set': {'canonicalDomain': normalizer.normalize(name)}})
+        for name in domains_collection.distinct('domainName')
+    ]
+    if not operations:
+        return 0, 0
+    return len(operations), domains_collection.bulk_write(operations, ordered=False).modified_count
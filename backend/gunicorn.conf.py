@@ -0,0 +1,44 @@
+import os
+import subprocess
+import time
+
+# Gunicorn settings for the API; every value can be overridden from the environment
+bind = f"0.0.0.0:{os.getenv('PORT', os.getenv('API_PORT', '5000'))}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+# Import the app once in the master so workers fork with modules already loaded;
+# db_config drops the MongoClient in each child, so nothing is shared after fork
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+chdir = os.path.dirname(os.path.abspath(__file__))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def on_starting(server):
+    # Start the Node.js scheduler once, from the master, when Redis is configured
+    if os.getenv('REDIS_URL') or os.getenv('UPSTASH_REDIS_URL') or os.getenv('REDIS_HOST'):
+        scheduler_path = os.path.join(chdir, 'scheduler.js')
+        try:
+            subprocess.Popen(['node', scheduler_path], cwd=chdir)
+            server.log.info('Started scheduler.js as a background process.')
+        except Exception as e:
+            server.log.error(f'Failed to start scheduler.js: {e}')
+    else:
+        server.log.info('Scheduler not started: set REDIS_URL or REDIS_HOST to enable background jobs.')
+
+
+def post_fork(server, worker):
+    # Cold start is timed per worker from here; with preload_app the master imported the app long before
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    # Runs in the worker after fork, before it accepts connections
+    from api_server import warm_up
+    warm_up(getattr(worker, 'forked_at', None))
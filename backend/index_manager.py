@@ -0,0 +1,291 @@
+import threading
+from fnmatch import fnmatch
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Declarative index registry: collection name (or fnmatch pattern) -> indexes.
+# Each entry is (keys, options). Indexes are created by reconcile_indexes() at
+# worker start-up and by ensure_collection_indexes() when a collection appears,
+# never from request handlers.
+INDEX_REGISTRY = {
+    'teachers': [
+        ([('name', ASCENDING)], {}),
+    ],
+    'papers_*': [
+        # get_teacher_publications sort and keyset pagination
+        ([('citationCount', DESCENDING), ('_id', ASCENDING)], {}),
+        # get_publication_details lookup
+        ([('title', ASCENDING)], {}),
+        # Ingest upsert key (non-unique: the same url may legitimately repeat)
+        ([('url', ASCENDING)], {}),
+        # Stats counts and community scans (pubType/yearInt are set at write time)
+        ([('pubType', ASCENDING), ('yearInt', ASCENDING), ('url', ASCENDING)], {}),
+    ],
+    'citation_history': [
+        # Range reads of one series and per-teacher paper movers
+        ([('kind', ASCENDING), ('key', ASCENDING), ('month', ASCENDING)], {}),
+        ([('kind', ASCENDING), ('teacherName', ASCENDING), ('month', ASCENDING)], {}),
+    ],
+    'paper_signatures': [
+        # LSH candidate lookup for near-duplicate clustering (multikey)
+        ([('bands', ASCENDING)], {}),
+    ],
+    'teacher_stats': [
+        ([('teacherName', ASCENDING)], {'unique': True}),
+    ],
+    'citations': [
+        ([('teacherName', ASCENDING)], {}),
+    ],
+    'total_citations': [
+        # $merge target key for the total_citations rebuild
+        ([('year', ASCENDING)], {'unique': True}),
+    ],
+    'funds': [
+        ([('year', DESCENDING), ('createdAt', DESCENDING)], {}),
+    ],
+    'awards': [
+        ([('createdAt', DESCENDING)], {}),
+    ],
+    'yearly_projects': [
+        ([('year', ASCENDING), ('teacherName', ASCENDING), ('projectName', ASCENDING)], {'unique': True}),
+        ([('year', DESCENDING), ('createdAt', DESCENDING)], {}),
+    ],
+    'domains': [
+        ([('teacherName', ASCENDING), ('domainName', ASCENDING)], {'unique': True}),
+        ([('canonicalDomain', ASCENDING), ('teacherName', ASCENDING)], {}),
+    ],
+    'domain_synonyms': [
+        ([('canonical', ASCENDING)], {'unique': True}),
+    ],
+    'tasks': [
+        # Background task status is kept for a week
+        ([('createdAt', ASCENDING)], {'expireAfterSeconds': 7 * 86400}),
+    ],
+    'admin': [
+        ([('username', ASCENDING)], {}),
+    ],
+}
+
+_reconciled = set()
+_reconciled_lock = threading.Lock()
+
+
+def register_indexes(pattern, indexes):
+    """Add (keys, options) index specs for a collection name or fnmatch pattern."""
+    INDEX_REGISTRY.setdefault(pattern, []).extend(indexes)
+    with _reconciled_lock:
+        _reconciled.clear()
+
+
+def _key_tuple(keys):
+    # Drivers may report directions as floats (1.0); compare them as ints
+    return tuple(
+        (field, int(direction) if isinstance(direction, (int, float)) else direction)
+        for field, direction in keys
+    )
+
+
+def declared_indexes(collection_name):
+    """Return the (keys, options) specs that apply to a collection name."""
+    specs = []
+    for pattern, indexes in INDEX_REGISTRY.items():
+        if pattern == collection_name or ('*' in pattern and fnmatch(collection_name, pattern)):
+            specs.extend(indexes)
+    return specs
+
+
+def _existing_key_patterns(collection):
+    return {
+        _key_tuple(info['key']): name
+        for name, info in collection.index_information().items()
+    }
+
+
+# Options that change what an index enforces or keeps; an index whose options differ is rebuilt
+COMPARED_OPTIONS = {'unique': False, 'sparse': False, 'expireAfterSeconds': None, 'partialFilterExpression': None}
+
+
+def _normalized_options(options):
+    normalized = {}
+    for option, default in COMPARED_OPTIONS.items():
+        value = options.get(option, default)
+        if option in ('unique', 'sparse'):
+            value = bool(value)
+        elif option == 'expireAfterSeconds' and value is not None:
+            value = int(value)
+        elif option == 'partialFilterExpression' and value is not None:
+            value = dict(value)
+        normalized[option] = value
+    return normalized
+
+
+def _option_differences(declared_options, existing_info):
+    """{option: {'declared', 'existing'}} for compared options that differ; empty if they match."""
+    declared, existing = _normalized_options(declared_options), _normalized_options(existing_info)
+    return {
+        option: {'declared': declared[option], 'existing': existing[option]}
+        for option in COMPARED_OPTIONS if declared[option] != existing[option]
+    }
+
+
+def _index_plan(collection, specs):
+    """Split declared specs into missing ones and ones whose existing index has other options.
+
+    Returns (missing [(keys, options)], mismatched [(keys, options, existing_name, differences)]).
+    """
+    existing = {_key_tuple(info['key']): (name, info) for name, info in collection.index_information().items()}
+    missing, mismatched = [], []
+    for keys, options in specs:
+        found = existing.get(_key_tuple(keys))
+        if found is None:
+            missing.append((keys, options))
+            continue
+        differences = _option_differences(options, found[1])
+        if differences:
+            mismatched.append((keys, options, found[0], differences))
+    return missing, mismatched
+
+
+def _has_duplicates(collection, keys):
+    """True if two documents share a value of the key pattern (a unique index would fail)."""
+    group_id = {field.replace('.', '_'): f'${field}' for field, _ in keys}
+    return bool(list(collection.aggregate([
+        {'$group': {'_id': group_id, 'n': {'$sum': 1}}},
+        {'$match': {'n': {'$gt': 1}}},
+        {'$limit': 1},
+    ], allowDiskUse=True)))
+
+
+def _rebuild_index(collection, keys, options, existing_name, differences):
+    """Bring an existing index to the declared options.
+
+    A TTL-only change is applied in place with collMod. Anything else drops the
+    index and recreates it, so queries go without it meanwhile: run this only from
+    the admin reconcile endpoint, never from warm-up or background paths.
+    """
+    if set(differences) == {'expireAfterSeconds'} and options.get('expireAfterSeconds') is not None:
+        collection.database.command('collMod', collection.name, index={
+            'name': existing_name, 'expireAfterSeconds': int(options['expireAfterSeconds'])
+        })
+        return [existing_name]
+    if options.get('unique') and _has_duplicates(collection, keys):
+        raise ValueError(f'Cannot make {existing_name} unique: duplicate values exist')
+    old_info = collection.index_information()[existing_name]
+    old_options = {k: v for k, v in old_info.items() if k in COMPARED_OPTIONS}
+    collection.drop_index(existing_name)
+    try:
+        return collection.create_indexes([IndexModel(keys, **options)])
+    except Exception:
+        # e.g. duplicates block the unique version; put the old index back before reporting
+        collection.create_indexes([IndexModel(list(old_info['key']), name=existing_name, **old_options)])
+        raise
+
+
+def ensure_collection_indexes(db, collection_name, force=False, rebuild_mismatched=False):
+    """Create declared indexes missing on one collection; returns the names created.
+
+    Indexes whose options differ from the registry are only rebuilt with
+    rebuild_mismatched (the admin reconcile endpoint). Collections already
+    reconciled by this process are skipped unless force is set.
+    """
+    if not force and collection_name in _reconciled:
+        return []
+    specs = declared_indexes(collection_name)
+    if not specs:
+        return []
+    collection = db[collection_name]
+    missing, mismatched = _index_plan(collection, specs)
+    created = collection.create_indexes([IndexModel(keys, **options) for keys, options in missing]) if missing else []
+    if rebuild_mismatched:
+        for keys, options, existing_name, differences in mismatched:
+            created.extend(_rebuild_index(collection, keys, options, existing_name, differences))
+    with _reconciled_lock:
+        _reconciled.add(collection_name)
+    return created
+
+
+def ensure_collection_indexes_async(db, collection_name):
+    """ensure_collection_indexes on a daemon thread, for collections first seen in a request."""
+    if collection_name in _reconciled:
+        return
+    thread = threading.Thread(target=_ensure_quietly, args=(db, collection_name))
+    thread.daemon = True
+    thread.start()
+
+
+def _ensure_quietly(db, collection_name):
+    try:
+        ensure_collection_indexes(db, collection_name)
+    except Exception as e:
+        print(f'[INDEX] Could not ensure indexes on {collection_name}: {e}')
+
+
+def _target_collections(db):
+    existing = set(db.list_collection_names())
+    targets = set()
+    for pattern in INDEX_REGISTRY:
+        if '*' in pattern:
+            targets.update(name for name in existing if fnmatch(name, pattern))
+        else:
+            targets.add(pattern)
+    return sorted(targets)
+
+
+def _unused_indexes(collection):
+    """Indexes, declared or not, that $indexStats reports as never used since restart."""
+    try:
+        stats = list(collection.aggregate([{'$indexStats': {}}]))
+    except Exception:
+        # $indexStats needs the clusterMonitor role and is not available everywhere
+        return []
+    unused = []
+    for stat in stats:
+        name = stat.get('name')
+        if name == '_id_':
+            continue
+        if (stat.get('accesses') or {}).get('ops', 0) == 0:
+            unused.append(name)
+    return unused
+
+
+def reconcile_indexes(db, apply=True, rebuild_mismatched=False):
+    """Compare every registered collection against the registry.
+
+    Returns {collection: {'missing': [...], 'mismatched': [...], 'created': [...], 'undeclared': [...],
+    'unused': [...]}} for collections that have something to report (plus 'error' if creation
+    failed). 'mismatched' lists indexes whose unique, sparse, TTL or partial filter options differ
+    from the registry. With apply, missing indexes are created; mismatched ones are only rebuilt
+    (and then also listed in 'created') when rebuild_mismatched is set, since a rebuild drops
+    the index first. With apply=False nothing is created or rebuilt.
+    """
+    report = {}
+    for collection_name in _target_collections(db):
+        collection = db[collection_name]
+        specs = declared_indexes(collection_name)
+        declared_keys = {_key_tuple(keys) for keys, _ in specs}
+        existing = _existing_key_patterns(collection)
+        missing, mismatched = _index_plan(collection, specs)
+        entry = {
+            'missing': [dict(keys) for keys, _ in missing],
+            'mismatched': [
+                {'name': name, 'keys': dict(keys), 'options': differences}
+                for keys, _, name, differences in mismatched
+            ],
+            'created': [],
+            'undeclared': sorted(name for key, name in existing.items() if key not in declared_keys and name != '_id_'),
+            'unused': _unused_indexes(collection),
+        }
+        if apply and (missing or (rebuild_mismatched and mismatched)):
+            try:
+                entry['created'] = ensure_collection_indexes(
+                    db, collection_name, force=True, rebuild_mismatched=rebuild_mismatched
+                )
+            except Exception as e:
+                # e.g. existing duplicates block a unique index; report it and carry on
+                entry['error'] = str(e)
+        elif apply:
+            with _reconciled_lock:
+                _reconciled.add(collection_name)
+        if any(entry.values()):
+            report[collection_name] = entry
+    return report
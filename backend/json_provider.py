@@ -0,0 +1,62 @@
+import datetime
+import decimal
+
+from bson import Decimal128, ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+
+def encode_bson_value(value):
+    """Encode the BSON/Python types that JSON has no native form for"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.datetime) and value.tzinfo is None:
+        # pymongo returns naive UTC datetimes; match orjson's OPT_NAIVE_UTC output
+        return value.replace(tzinfo=datetime.timezone.utc).isoformat()
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class BsonJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes MongoDB documents directly.
+
+    ObjectId and Decimal128 become strings and datetimes ISO 8601 (naive values are
+    treated as UTC, as pymongo returns them), so handlers can pass query results to
+    jsonify without converting each document first. Uses orjson when installed.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', encode_bson_value)
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # orjson returns bytes; hand them to the response without a str round trip
+        return self._app.response_class(self._orjson_dumps(obj), mimetype=self.mimetype)
+
+    @staticmethod
+    def _orjson_dumps(obj):
+        return orjson.dumps(
+            obj,
+            default=encode_bson_value,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+        )
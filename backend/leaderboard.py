@@ -0,0 +1,114 @@
+import re
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from index_manager import register_indexes
+
+RANKINGS_COLLECTION = 'teacher_rankings'
+# Year windows precomputed for "publications in the last N years"
+LEADERBOARD_WINDOWS = [1, 3, 5, 10]
+LEADERBOARD_METRICS = (
+    ['totalCitations', 'hIndex', 'i10Index', 'publications', 'citationGrowth']
+    + [f'publicationsLast{n}' for n in LEADERBOARD_WINDOWS]
+)
+
+# One descending index per metric: top-K is an index walk and a teacher's rank is a
+# COUNT_SCAN over the values above theirs, both O(log n + k)
+register_indexes(RANKINGS_COLLECTION, [([('teacherName', ASCENDING)], {'unique': True})] + [
+    ([(metric, DESCENDING), ('teacherName', ASCENDING)], {}) for metric in LEADERBOARD_METRICS
+])
+
+
+def metric_for(metric, window=None):
+    """Map a metric name plus optional year window to the stored field; raises ValueError."""
+    if window:
+        if metric != 'publications' or int(window) not in LEADERBOARD_WINDOWS:
+            raise ValueError(f'window must be one of {LEADERBOARD_WINDOWS} and is only supported for publications')
+        return f'publicationsLast{int(window)}'
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f'Unknown metric: {metric}')
+    return metric
+
+
+def _int_years(mapping):
+    years = {}
+    for year, value in (mapping or {}).items():
+        if str(year).isdigit() and isinstance(value, (int, float)):
+            years[int(year)] = int(value)
+    return years
+
+
+def compute_ranking(db, teacher_name, current_year=None):
+    """Build the rankings document for one teacher from their citations and papers."""
+    current_year = current_year or datetime.utcnow().year
+    citation_doc = db['citations'].find_one(
+        {'teacherName': teacher_name}, {'citationsPerYear': 1, 'hIndex': 1, 'i10Index': 1}
+    ) or {}
+    per_year = _int_years(citation_doc.get('citationsPerYear'))
+    papers_collection = db['papers_' + re.sub(r'[^a-z0-9]', '_', teacher_name.lower())]
+    by_year = {
+        row['_id']: row['count']
+        for row in papers_collection.aggregate([{'$group': {'_id': '$yearInt', 'count': {'$sum': 1}}}])
+    }
+    ranking = {
+        'teacherName': teacher_name,
+        'totalCitations': sum(per_year.values()),
+        'hIndex': citation_doc.get('hIndex', 0) or 0,
+        'i10Index': citation_doc.get('i10Index', 0) or 0,
+        'publications': sum(by_year.values()),
+        # Change between the last two complete years
+        'citationGrowth': per_year.get(current_year - 1, 0) - per_year.get(current_year - 2, 0),
+        'updatedAt': datetime.utcnow(),
+    }
+    for n in LEADERBOARD_WINDOWS:
+        ranking[f'publicationsLast{n}'] = sum(
+            count for year, count in by_year.items() if isinstance(year, int) and year > current_year - n
+        )
+    return ranking
+
+
+def refresh_rankings(db, teacher_names=None):
+    """Recompute rankings for the given teachers (default: all) in one bulk write."""
+    all_names = [t['name'] for t in db['teachers'].find({}, {'name': 1, '_id': 0}) if t.get('name')]
+    names = all_names if teacher_names is None else [n for n in teacher_names if n in set(all_names)]
+    operations = [
+        UpdateOne({'teacherName': name}, {'$set': compute_ranking(db, name)}, upsert=True)
+        for name in names
+    ]
+    if operations:
+        db[RANKINGS_COLLECTION].bulk_write(operations, ordered=False)
+    if teacher_names is None:
+        db[RANKINGS_COLLECTION].delete_many({'teacherName': {'$nin': all_names}})
+    return len(operations)
+
+
+def top_rankings(db, field, limit):
+    """Top teachers by a stored metric field with competition ranks (1, 2, 2, 4)."""
+    rows = db[RANKINGS_COLLECTION].find(
+        {}, {'_id': 0, 'teacherName': 1, field: 1}
+    ).sort([(field, DESCENDING), ('teacherName', ASCENDING)]).limit(limit)
+    rankings = []
+    for position, row in enumerate(rows, 1):
+        value = row.get(field, 0)
+        rank = rankings[-1]['rank'] if rankings and rankings[-1]['value'] == value else position
+        rankings.append({'rank': rank, 'teacherName': row['teacherName'], 'value': value})
+    return rankings
+
+
+def teacher_rank(db, teacher_name, fields):
+    """{field: {'value', 'rank', 'of'}} for one teacher, or None if they have no rankings entry."""
+    collection = db[RANKINGS_COLLECTION]
+    row = collection.find_one({'teacherName': teacher_name}, {'_id': 0})
+    if row is None:
+        return None
+    total = collection.estimated_document_count()
+    ranks = {}
+    for field in fields:
+        value = row.get(field, 0)
+        ranks[field] = {
+            'value': value,
+            'rank': collection.count_documents({field: {'$gt': value}}) + 1,
+            'of': total,
+        }
+    return ranks
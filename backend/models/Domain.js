@@ -15,6 +15,11 @@ const domainSchema = new mongoose.Schema({
     type: String,
     trim: true
   },
+  // Consolidated display name, computed on write (see normalize_domain_name in api_server.py)
+  canonicalDomain: {
+    type: String,
+    trim: true
+  },
   lastUpdated: {
     type: Date,
     default: Date.now
@@ -25,6 +30,55 @@ const domainSchema = new mongoose.Schema({
 
 // Create compound index to ensure unique teacher-domain combinations
 domainSchema.index({ teacherName: 1, domainName: 1 }, { unique: true });
+// Serves /api/domains and /api/domains/<name>/teachers
+domainSchema.index({ canonicalDomain: 1, teacherName: 1 });
+
+// Built-in rules, same as DEFAULT_SYNONYMS in domain_normalizer.py. Admin-defined
+// synonyms are applied by the API, which re-normalizes domains after each scrape.
+const DOMAIN_VARIANTS = [
+  ['Cybersecurity', ['cyber security', 'cybersecurity', 'cyber-security']],
+  ['Machine Learning', ['machine learning', 'ml', 'ai/ml', 'artificial intelligence']],
+  ['Digital Twin', ['digital twin', 'digital twins']],
+  ['Digital Forensics', ['digital forensics', 'cyber forensics', 'computer forensics']],
+  ['Computer Vision', ['computer vision', 'cv', 'image processing']],
+  ['Data Science', ['data science', 'data analytics', 'big data']],
+  ['Internet of Things', ['iot', 'internet of things', 'smart devices']],
+  ['Blockchain', ['blockchain', 'distributed ledger', 'cryptocurrency']],
+  ['Cloud Computing', ['cloud computing', 'cloud', 'aws', 'azure']]
+];
+
+// Variants only match on token boundaries, so 'ml' does not match "html"
+const escapeRegExp = text => text.replace(/[.*+?^${}()|[\]\\/-]/g, '\\$&').replace(/ /g, '\\s+');
+const DOMAIN_PATTERNS = DOMAIN_VARIANTS.map(([canonical, variants]) => [
+  canonical,
+  new RegExp(`(?<![a-z0-9])(?:${variants.map(escapeRegExp).join('|')})(?![a-z0-9])`)
+]);
+
+function normalizeDomainName(domainName) {
+  if (!domainName) return domainName;
+  const normalized = domainName.toLowerCase().trim().replace(/\s+/g, ' ');
+  for (const [canonical, pattern] of DOMAIN_PATTERNS) {
+    if (pattern.test(normalized)) return canonical;
+  }
+  // Python's str.title()
+  return domainName.trim().toLowerCase().replace(/(^|[^a-z])([a-z])/g, (m, sep, ch) => sep + ch.toUpperCase());
+}
+
+domainSchema.pre('findOneAndUpdate', function (next) {
+  const update = this.getUpdate() || {};
+  const target = update.$set || update;
+  if (target.domainName) {
+    target.canonicalDomain = normalizeDomainName(target.domainName);
+  }
+  next();
+});
+
+domainSchema.pre('save', function (next) {
+  this.canonicalDomain = normalizeDomainName(this.domainName);
+  next();
+});
+
+domainSchema.statics.normalizeDomainName = normalizeDomainName;
 
 const Domain = mongoose.model('Domain', domainSchema);
 
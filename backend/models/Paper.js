@@ -1,4 +1,5 @@
 const mongoose = require('mongoose');
+const { classifyPublicationType, extractPublicationYear } = require('../publicationIngest');
 
 const paperSchema = new mongoose.Schema({
   title: {
@@ -45,11 +46,32 @@ const paperSchema = new mongoose.Schema({
   patent: {
     type: Boolean,
     default: false
-  }
+  },
+  // Canonical fields computed on save (mirrors apply_canonical_publication_fields in api_server.py)
+  pubType: {
+    type: String,
+    enum: ['book', 'conference', 'patent', 'journal', 'other']
+  },
+  yearInt: {
+    type: Number,
+    default: null
+  },
+  // sha256 over the content fields, see publicationIngest.js
+  contentHash: String
 }, {
   timestamps: true
 });
 
+paperSchema.pre('save', function (next) {
+  this.pubType = classifyPublicationType(this);
+  this.yearInt = extractPublicationYear(this);
+  next();
+});
+
+paperSchema.index({ pubType: 1, yearInt: 1, url: 1 });
+// Lookup key for ingest upserts (non-unique, see below)
+paperSchema.index({ url: 1 });
+
 // Remove or comment out the unique index on url
 // paperSchema.index({ url: 1 }, { unique: true });
 
@@ -0,0 +1,238 @@
+"""Near-duplicate publication clustering with MinHash signatures and LSH banding.
+
+The same paper stored under two teachers often differs in punctuation, author
+order or URL. Each paper gets a MinHash signature over its normalized title
+and author set. Papers sharing any LSH band are verified by signature
+similarity and given a common clusterId, which is written onto the paper
+document so the stats and search endpoints can dedupe in one pass.
+
+Signatures and band keys live in the paper_signatures collection (one
+document per paper, multikey index on bands), so ingest assigns a clusterId
+with a single indexed lookup instead of comparing against every paper.
+"""
+import hashlib
+import re
+
+import numpy as np
+from pymongo import UpdateOne
+
+from coauthor_graph import split_authors
+
+SIGNATURES_COLLECTION = 'paper_signatures'
+NUM_PERMUTATIONS = 64
+# 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates, verified below
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+# Estimated Jaccard similarity (fraction of equal signature slots) needed to cluster
+SIMILARITY_THRESHOLD = 0.7
+# Degenerate buckets (e.g. very short titles) are only compared within their first members
+MAX_BUCKET_PAIRWISE = 500
+
+# Bumped whenever signatures change meaning; stored signatures of another version trigger a rebuild
+SIGNATURE_VERSION = 2
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_LOW_31 = np.uint64((1 << 31) - 1)
+_LOW_30 = np.uint64((1 << 30) - 1)
+_rng = np.random.RandomState(20240611)
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+# Title tokens that tell otherwise identical titles apart ("Part I" / "Part II", "... 2" / "... 3")
+_ROMAN_NUMERAL = re.compile(r'^(?=[ivxlc])c{0,3}(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$')
+
+
+def normalize_title(title):
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(title or '').lower()).split())
+
+
+def shingles(paper):
+    """Character 4-grams of the normalized title plus one token per author key."""
+    compact = normalize_title(paper.get('title')).replace(' ', '')
+    tokens = {compact[i:i + 4] for i in range(max(len(compact) - 3, 1))} if compact else set()
+    tokens.update('author:' + key for key, _ in split_authors(paper.get('authors')))
+    return tokens
+
+
+def title_markers(title):
+    """Number and roman-numeral tokens of a title; papers are only clustered when these match."""
+    return sorted(t for t in normalize_title(title).split() if t.isdigit() or _ROMAN_NUMERAL.match(t))
+
+
+def _mod_mersenne(x):
+    """x mod 2^61 - 1 for uint64 x, using 2^61 = 1 (mod p)."""
+    x = (x & _MERSENNE_PRIME) + (x >> np.uint64(61))
+    return np.where(x >= _MERSENNE_PRIME, x - _MERSENNE_PRIME, x)
+
+
+def _mulmod(a, x):
+    """a * x mod 2^61 - 1 for a, x < 2^61 without 128-bit integers.
+
+    With a = ah*2^31 + al and x = xh*2^31 + xl, every partial product fits in 64
+    bits, and 2^62 = 2, 2^61 = 1 (mod p) fold the high parts back in.
+    """
+    shift = np.uint64(31)
+    ah, al = a >> shift, a & _LOW_31
+    xh, xl = x >> shift, x & _LOW_31
+    mid = ah * xl + al * xh
+    total = (ah * xh << np.uint64(1)) + (mid >> np.uint64(30)) + ((mid & _LOW_30) << shift) + al * xl
+    return _mod_mersenne(total)
+
+
+def minhash(tokens):
+    """MinHash signature (uint64 array) of a token set; None if the set is empty."""
+    if not tokens:
+        return None
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'little') for t in tokens],
+        dtype=np.uint64
+    ) % _MERSENNE_PRIME
+    # (a * x + b) mod p for every permutation and token at once; values stay below 2^61,
+    # so signatures fit BSON's int64
+    permuted = _mod_mersenne(_mulmod(_PERM_A[:, None], hashes[None, :]) + _PERM_B[:, None])
+    return permuted.min(axis=1)
+
+
+def band_keys(signature):
+    """One key per LSH band: 'band:digest' of that band's rows."""
+    rows = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [f'{band}:{hashlib.blake2b(rows[band].tobytes(), digest_size=8).hexdigest()}' for band in range(LSH_BANDS)]
+
+
+def similarity(sig_a, sig_b):
+    return float(np.mean(np.asarray(sig_a, dtype=np.uint64) == np.asarray(sig_b, dtype=np.uint64)))
+
+
+def _years_compatible(a, b):
+    return a is None or b is None or abs(a - b) <= 1
+
+
+def _compatible(a, b):
+    return _years_compatible(a.get('yearInt'), b.get('yearInt')) and a.get('markers', []) == b.get('markers', [])
+
+
+def _signature_doc(collection_name, paper):
+    signature = minhash(shingles(paper))
+    if signature is None:
+        return None
+    return {
+        '_id': f"{collection_name}:{paper['_id']}",
+        'collection': collection_name,
+        'paperId': paper['_id'],
+        'yearInt': paper.get('yearInt'),
+        'markers': title_markers(paper.get('title')),
+        'v': SIGNATURE_VERSION,
+        'signature': signature.tolist(),
+        'bands': band_keys(signature),
+    }
+
+
+def _as_array(stored):
+    return np.asarray(stored, dtype=np.uint64)
+
+
+_PAPER_FIELDS = {'title': 1, 'authors': 1, 'yearInt': 1}
+
+
+def assign_clusters(db, collection_name, query=None):
+    """Assign a clusterId to papers of one collection that have none (or match query).
+
+    Each paper is matched against the stored signatures sharing one of its LSH
+    bands; it joins the most similar verified candidate's cluster or starts its
+    own. Returns the number of papers assigned.
+    """
+    papers_collection = db[collection_name]
+    signatures = db[SIGNATURES_COLLECTION]
+    assigned = 0
+    for paper in papers_collection.find(query or {'clusterId': {'$exists': False}}, _PAPER_FIELDS):
+        doc = _signature_doc(collection_name, paper)
+        if doc is None:
+            continue
+        signature = _as_array(doc['signature'])
+        best, best_score = None, SIMILARITY_THRESHOLD
+        for candidate in signatures.find({'bands': {'$in': doc['bands']}, '_id': {'$ne': doc['_id']}},
+                                         {'signature': 1, 'yearInt': 1, 'markers': 1, 'clusterId': 1}):
+            if not _compatible(doc, candidate):
+                continue
+            score = similarity(signature, _as_array(candidate['signature']))
+            if score >= best_score:
+                best, best_score = candidate, score
+        doc['clusterId'] = best['clusterId'] if best else doc['_id']
+        signatures.replace_one({'_id': doc['_id']}, doc, upsert=True)
+        papers_collection.update_one({'_id': paper['_id']}, {'$set': {'clusterId': doc['clusterId']}})
+        assigned += 1
+    return assigned
+
+
+def assign_missing_clusters(db):
+    """Cluster every paper without a clusterId across all papers_* collections.
+
+    Falls back to a full rebuild when no signatures exist yet or any stored
+    signature was computed by another SIGNATURE_VERSION.
+    """
+    signatures = db[SIGNATURES_COLLECTION]
+    if signatures.estimated_document_count() == 0 or signatures.find_one({'v': {'$ne': SIGNATURE_VERSION}}, {'_id': 1}):
+        return rebuild_clusters(db)['papers']
+    return sum(
+        assign_clusters(db, name) for name in db.list_collection_names() if name.startswith('papers_')
+    )
+
+
+def rebuild_clusters(db):
+    """Recompute every signature and cluster from scratch.
+
+    Candidate pairs come from LSH buckets, are verified by signature similarity
+    and merged with union-find, so transitively similar papers share one
+    cluster. Returns {'papers', 'clusters'}.
+    """
+    docs = []
+    for name in db.list_collection_names():
+        if name.startswith('papers_'):
+            for paper in db[name].find({}, _PAPER_FIELDS):
+                doc = _signature_doc(name, paper)
+                if doc is not None:
+                    docs.append(doc)
+
+    parent = list(range(len(docs)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = np.array([d['signature'] for d in docs], dtype=np.uint64).reshape(len(docs), NUM_PERMUTATIONS)
+    buckets = {}
+    for i, doc in enumerate(docs):
+        for key in doc['bands']:
+            buckets.setdefault(key, []).append(i)
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        members = np.asarray(members[:MAX_BUCKET_PAIRWISE])
+        # All pairwise similarities within the bucket in one vectorized step
+        block = signatures[members]
+        scores = (block[:, None, :] == block[None, :, :]).mean(axis=2)
+        for x, y in zip(*np.nonzero(np.triu(scores >= SIMILARITY_THRESHOLD, k=1))):
+            i, j = int(members[x]), int(members[y])
+            if _compatible(docs[i], docs[j]):
+                parent[find(j)] = find(i)
+
+    # The smallest member id names the cluster, so rebuilds are stable
+    cluster_ids = {}
+    for i, doc in enumerate(docs):
+        root = find(i)
+        cluster_ids[root] = min(cluster_ids.get(root, doc['_id']), doc['_id'])
+    by_collection = {}
+    for i, doc in enumerate(docs):
+        doc['clusterId'] = cluster_ids[find(i)]
+        by_collection.setdefault(doc['collection'], []).append(
+            UpdateOne({'_id': doc['paperId']}, {'$set': {'clusterId': doc['clusterId']}})
+        )
+
+    db[SIGNATURES_COLLECTION].delete_many({})
+    if docs:
+        db[SIGNATURES_COLLECTION].insert_many(docs, ordered=False)
+    for name, operations in by_collection.items():
+        db[name].bulk_write(operations, ordered=False)
+    return {'papers': len(docs), 'clusters': len(cluster_ids)}
+
@@ -0,0 +1,131 @@
+const crypto = require('crypto');
+
+// Same field order and value encoding as HASH_FIELDS / compute_content_hash in
+// publication_ingest.py, so a paper hashes identically whichever side wrote it.
+const HASH_FIELDS = [
+  'title', 'url', 'authors', 'source', 'journal', 'conference', 'book', 'year',
+  'volume', 'issue', 'pages', 'publisher', 'description', 'summary', 'pdfLink',
+  'citationCount', 'publicationDate', 'inventors', 'patentOffice', 'patentNumber',
+  'applicationNumber', 'patentFilingNumber', 'filedOn', 'grantedOn', 'patent'
+];
+
+function computeContentHash(doc) {
+  const payload = HASH_FIELDS
+    .map(field => `${field}=${doc[field] === undefined || doc[field] === null ? '' : String(doc[field])}`)
+    .join('\x1f');
+  return crypto.createHash('sha256').update(payload, 'utf8').digest('hex');
+}
+
+// Canonical fields (mirrors apply_canonical_publication_fields in api_server.py)
+function classifyPublicationType(paper) {
+  if (paper.book) return 'book';
+  if (paper.conference) return 'conference';
+  if (paper.patent === true || String(paper.patent).toLowerCase() === 'true') return 'patent';
+  if (paper.source || paper.journal) return 'journal';
+  return 'other';
+}
+
+function extractPublicationYear(paper) {
+  const year = parseInt(paper.year, 10);
+  if (!Number.isNaN(year) && String(year) === String(paper.year).trim()) return year;
+  for (const key of ['publicationDate', 'grantedOn', 'filedOn']) {
+    const value = paper[key];
+    if (typeof value === 'string' && /^\d{4}/.test(value)) {
+      return parseInt(value.slice(0, 4), 10);
+    }
+  }
+  return null;
+}
+
+const TEXT_FIELDS = [
+  'source', 'journal', 'conference', 'book', 'year', 'volume', 'issue', 'pages', 'publisher',
+  'description', 'summary', 'pdfLink', 'publicationDate', 'inventors', 'patentOffice',
+  'patentNumber', 'applicationNumber'
+];
+
+function isBlank(value) {
+  return value === undefined || value === null || value === '';
+}
+
+// Build the stored document for a scraped paper. Fields the scrape came back
+// without keep their stored value (a detail page that failed to load must not
+// blank out pdfLink, description, ...), and only then fall back to the defaults
+// of the old save path.
+function buildPaperDocument(paper, existing = {}) {
+  const pick = (field, fallback) => {
+    if (!isBlank(paper[field])) return paper[field];
+    return isBlank(existing[field]) ? fallback : existing[field];
+  };
+  const doc = {
+    title: paper.title,
+    url: paper.url,
+    teacherName: paper.teacherName,
+    authors: pick('authors', 'Unknown Authors')
+  };
+  for (const field of TEXT_FIELDS) doc[field] = pick(field, '');
+  doc.citationCount = pick('citationCount', 0);
+  const patent = pick('patent', false);
+  doc.patent = patent === true || String(patent).toLowerCase() === 'true';
+  doc.pubType = classifyPublicationType(doc);
+  doc.yearInt = extractPublicationYear(doc);
+  doc.contentHash = computeContentHash(doc);
+  return doc;
+}
+
+// Upsert a teacher's scraped papers with one unordered bulkWrite, skipping
+// papers whose content hash (after merging with the stored copy) is unchanged.
+async function ingestPublications(collection, papers) {
+  const summary = { inserted: 0, updated: 0, unchanged: 0, rejected: 0 };
+  const byUrl = new Map();
+  for (const paper of papers) {
+    if (!paper || !paper.title || !paper.url || !paper.teacherName) {
+      summary.rejected++;
+      continue;
+    }
+    byUrl.set(paper.url, paper);
+  }
+  if (byUrl.size === 0) return summary;
+
+  const projection = { url: 1, contentHash: 1, authors: 1, citationCount: 1, patent: 1 };
+  for (const field of TEXT_FIELDS) projection[field] = 1;
+  const stored = await collection.find({ url: { $in: [...byUrl.keys()] } }, { projection }).toArray();
+  const storedByUrl = new Map(stored.map(d => [d.url, d]));
+
+  const now = new Date();
+  const operations = [];
+  for (const [url, paper] of byUrl) {
+    const existing = storedByUrl.get(url);
+    const doc = buildPaperDocument(paper, existing);
+    if (existing && existing.contentHash === doc.contentHash) {
+      summary.unchanged++;
+      continue;
+    }
+    operations.push({
+      updateOne: {
+        filter: { url },
+        // Changed records lose their clusterId and are re-clustered after the write
+        update: {
+          $set: { ...doc, updatedAt: now },
+          $setOnInsert: { createdAt: now, __v: 0 },
+          $unset: { clusterId: '' }
+        },
+        upsert: true
+      }
+    });
+  }
+  if (operations.length > 0) {
+    const result = await collection.bulkWrite(operations, { ordered: false });
+    summary.inserted = result.upsertedCount;
+    summary.updated = result.matchedCount;
+  }
+  return summary;
+}
+
+module.exports = {
+  HASH_FIELDS,
+  computeContentHash,
+  classifyPublicationType,
+  extractPublicationYear,
+  buildPaperDocument,
+  ingestPublications
+};
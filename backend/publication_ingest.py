@@ -0,0 +1,210 @@
+import csv
+import hashlib
+import io
+import json
+import re
+
+# Fields that make up a publication's content. The content hash is computed over
+# these (in this order) so re-ingesting an identical record can be skipped.
+# backend/publicationIngest.js computes the same hash for the scraper.
+HASH_FIELDS = [
+    'title', 'url', 'authors', 'source', 'journal', 'conference', 'book', 'year',
+    'volume', 'issue', 'pages', 'publisher', 'description', 'summary', 'pdfLink',
+    'citationCount', 'publicationDate', 'inventors', 'patentOffice', 'patentNumber',
+    'applicationNumber', 'patentFilingNumber', 'filedOn', 'grantedOn', 'patent'
+]
+
+TEXT_FIELDS = [f for f in HASH_FIELDS if f not in ('citationCount', 'patent')]
+
+SUPPORTED_FORMATS = ['bibtex', 'csv', 'jsonl']
+
+
+def _hash_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def compute_content_hash(doc):
+    """Return a sha256 hex digest of the publication's content fields."""
+    payload = '\x1f'.join(f"{field}={_hash_value(doc.get(field))}" for field in HASH_FIELDS)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def normalize_record(record, teacher_name):
+    """Build a paper document from an ingested record.
+
+    Missing text fields default to '' (as in add_publication_to_teacher), citationCount
+    is coerced to int and patent to bool. Raises ValueError for unusable records.
+    """
+    if not isinstance(record, dict):
+        raise ValueError('record is not an object')
+    title = str(record.get('title') or '').strip()
+    if not title:
+        raise ValueError('missing title')
+
+    doc = {'teacherName': teacher_name}
+    for field in TEXT_FIELDS:
+        value = record.get(field)
+        doc[field] = str(value).strip() if value is not None else ''
+    doc['title'] = title
+
+    try:
+        doc['citationCount'] = int(record.get('citationCount') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('citationCount must be a number')
+
+    patent = record.get('patent')
+    doc['patent'] = (
+        patent is True
+        or (isinstance(patent, str) and patent.strip().lower() == 'true')
+        or record.get('publicationType') == 'patent'
+    )
+
+    if not doc['url']:
+        # Mirror add_publication_to_teacher: never store an empty url
+        del doc['url']
+    return doc
+
+
+def parse_jsonl(text):
+    """Parse JSON-lines; yields (record, error) tuples, one per non-blank line."""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield None, f'invalid JSON: {e.msg}'
+
+
+def parse_csv(text):
+    """Parse CSV with a header row of paper field names; yields (record, error) tuples."""
+    reader = csv.DictReader(io.StringIO(text))
+    for row in reader:
+        yield {k.strip(): v for k, v in row.items() if k}, None
+
+
+_BIBTEX_ENTRY = re.compile(r'@(\w+)\s*\{', re.IGNORECASE)
+
+# BibTeX field -> paper field
+_BIBTEX_FIELD_MAP = {
+    'title': 'title',
+    'author': 'authors',
+    'journal': 'journal',
+    'year': 'year',
+    'volume': 'volume',
+    'number': 'issue',
+    'pages': 'pages',
+    'publisher': 'publisher',
+    'abstract': 'description',
+    'url': 'url',
+    'note': 'summary',
+}
+
+
+def _read_bibtex_value(text, pos):
+    """Read a braced, quoted or bare BibTeX value starting at pos; return (value, new_pos)."""
+    if text[pos] == '{':
+        depth = 0
+        start = pos + 1
+        while pos < len(text):
+            if text[pos] == '{':
+                depth += 1
+            elif text[pos] == '}':
+                depth -= 1
+                if depth == 0:
+                    return text[start:pos], pos + 1
+            pos += 1
+        raise ValueError('unbalanced braces')
+    if text[pos] == '"':
+        end = text.find('"', pos + 1)
+        if end == -1:
+            raise ValueError('unterminated quote')
+        return text[pos + 1:end], end + 1
+    match = re.match(r'[^,}\s]+', text[pos:])
+    if not match:
+        raise ValueError('missing value')
+    return match.group(0), pos + match.end()
+
+
+def _parse_bibtex_entry(entry_type, body):
+    fields = {}
+    # Skip the citation key
+    pos = body.find(',')
+    if pos == -1:
+        return fields
+    pos += 1
+    while pos < len(body):
+        match = re.match(r'\s*([\w\-]+)\s*=\s*', body[pos:])
+        if not match:
+            break
+        name = match.group(1).lower()
+        pos += match.end()
+        value, pos = _read_bibtex_value(body, pos)
+        fields[name] = re.sub(r'\s+', ' ', value.replace('{', '').replace('}', '')).strip()
+        comma = re.match(r'\s*,?', body[pos:])
+        pos += comma.end()
+
+    record = {}
+    for bib_field, paper_field in _BIBTEX_FIELD_MAP.items():
+        if fields.get(bib_field):
+            record[paper_field] = fields[bib_field]
+    if 'authors' in record:
+        record['authors'] = ', '.join(a.strip() for a in record['authors'].split(' and '))
+    booktitle = fields.get('booktitle', '')
+    if entry_type in ('inproceedings', 'conference', 'proceedings'):
+        record['conference'] = booktitle or fields.get('series', '')
+    elif entry_type in ('book', 'inbook', 'incollection'):
+        record['book'] = booktitle or fields.get('title', '')
+    elif entry_type == 'patent':
+        record['patent'] = True
+        record['patentNumber'] = fields.get('number', '')
+        record['inventors'] = record.get('authors', '')
+    return record
+
+
+def parse_bibtex(text):
+    """Parse BibTeX entries; yields (record, error) tuples. @comment/@string/@preamble are skipped."""
+    pos = 0
+    while True:
+        match = _BIBTEX_ENTRY.search(text, pos)
+        if not match:
+            return
+        entry_type = match.group(1).lower()
+        start = match.end() - 1
+        try:
+            body, pos = _read_bibtex_value(text, start)
+        except ValueError as e:
+            yield None, f'invalid BibTeX entry: {e}'
+            return
+        if entry_type in ('comment', 'string', 'preamble'):
+            continue
+        try:
+            yield _parse_bibtex_entry(entry_type, body), None
+        except ValueError as e:
+            yield None, f'invalid BibTeX entry: {e}'
+
+
+PARSERS = {
+    'bibtex': parse_bibtex,
+    'csv': parse_csv,
+    'jsonl': parse_jsonl,
+}
+
+
+def detect_format(content_type, filename=''):
+    """Guess the batch format from a Content-Type header or file extension."""
+    content_type = (content_type or '').lower()
+    filename = (filename or '').lower()
+    if 'bibtex' in content_type or filename.endswith('.bib'):
+        return 'bibtex'
+    if 'csv' in content_type or filename.endswith('.csv'):
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type or 'json' in content_type \
+            or filename.endswith('.jsonl') or filename.endswith('.ndjson'):
+        return 'jsonl'
+    return None
@@ -0,0 +1,322 @@
+"""Query-plan auditor for the hot query shapes in api_server.py.
+
+Runs each shape through explain('executionStats') and flags collection scans,
+in-memory sorts and high docs-examined/returned ratios. Exposed as
+GET /admin/query-plans and runnable after a deploy or in a benchmark run:
+
+    python query_audit.py [--fail-on-regression]
+"""
+import sys
+
+from index_manager import declared_indexes
+
+# Docs examined per doc returned above which a plan is flagged
+SCAN_RATIO_THRESHOLD = 10
+# Ratios on tiny collections are noise
+MIN_DOCS_EXAMINED = 100
+
+# Representative values substituted into the shapes; resolved from the data where possible
+DEFAULT_SAMPLES = {
+    'teacher_name': 'unknown',
+    'paper_title': 'unknown',
+    'search_term': 'security',
+    'domain_name': 'Cybersecurity',
+    'year': '2024',
+    'project_name': 'unknown',
+}
+
+# Each shape mirrors a query issued by an endpoint. 'collection' may be 'papers_*',
+# which is audited against the largest teacher papers collection. 'expected_collscan'
+# marks shapes that cannot use an index as written; they are reported but are not
+# treated as regressions.
+QUERY_SHAPES = [
+    {
+        'name': 'teacher_lookup',
+        'endpoint': 'GET /teachers/<id>',
+        'collection': 'teachers',
+        'kind': 'find',
+        'filter': lambda s: {'name': s['teacher_name']},
+        'limit': 1,
+    },
+    {
+        'name': 'publications_by_citations',
+        'endpoint': 'GET /teachers/<id>/publications',
+        'collection': 'papers_*',
+        'kind': 'find',
+        'filter': lambda s: {},
+        'sort': [('citationCount', -1), ('_id', 1)],
+    },
+    {
+        'name': 'publication_by_title',
+        'endpoint': 'GET /teachers/<id>/publications/<title>',
+        'collection': 'papers_*',
+        'kind': 'find',
+        'filter': lambda s: {'title': s['paper_title']},
+        'limit': 1,
+    },
+    {
+        'name': 'teacher_stats_rollup',
+        'endpoint': 'GET /teachers/<id>/stats, GET /teachers/stats',
+        'collection': 'teacher_stats',
+        'kind': 'find',
+        'filter': lambda s: {'teacherName': {'$in': [s['teacher_name']]}},
+    },
+    {
+        'name': 'community_type_scan',
+        'endpoint': 'GET /api/community/stats, /api/community/yearly_stats',
+        'collection': 'papers_*',
+        'kind': 'find',
+        'filter': lambda s: {'pubType': {'$in': ['book', 'conference', 'patent', 'journal', 'other']}},
+        'projection': {'_id': 0, 'pubType': 1, 'yearInt': 1, 'url': 1},
+    },
+    {
+        'name': 'search_regex',
+        'endpoint': 'GET /search',
+        'collection': 'papers_*',
+        'kind': 'find',
+        'filter': lambda s: {'$or': [
+            {field: {'$regex': s['search_term'], '$options': 'i'}}
+            for field in ('title', 'authors', 'description', 'summary')
+        ]},
+        'expected_collscan': 'unanchored case-insensitive regex cannot use a B-tree index',
+    },
+    {
+        'name': 'citations_by_teacher',
+        'endpoint': 'GET /teachers/<id>/citations',
+        'collection': 'citations',
+        'kind': 'find',
+        'filter': lambda s: {'teacherName': s['teacher_name']},
+        'limit': 1,
+    },
+    {
+        'name': 'yearly_projects_list',
+        'endpoint': 'GET /api/yearly-projects',
+        'collection': 'yearly_projects',
+        'kind': 'find',
+        'filter': lambda s: {},
+        'sort': [('year', -1), ('createdAt', -1)],
+    },
+    {
+        'name': 'yearly_project_duplicate_check',
+        'endpoint': 'POST /api/yearly-projects',
+        'collection': 'yearly_projects',
+        'kind': 'find',
+        'filter': lambda s: {'year': s['year'], 'teacherName': s['teacher_name'], 'projectName': s['project_name']},
+        'limit': 1,
+    },
+    {
+        'name': 'domain_summary',
+        'endpoint': 'GET /api/domains',
+        'collection': 'domains',
+        'kind': 'aggregate',
+        'pipeline': lambda s: [
+            {'$match': {'canonicalDomain': {'$exists': True, '$nin': [None, '']}}},
+            {'$group': {'_id': '$canonicalDomain', 'teachers': {'$addToSet': '$teacherName'}}},
+        ],
+    },
+    {
+        'name': 'domain_teachers',
+        'endpoint': 'GET /api/domains/<name>/teachers',
+        'collection': 'domains',
+        'kind': 'aggregate',
+        'pipeline': lambda s: [
+            {'$match': {'canonicalDomain': s['domain_name']}},
+            {'$sort': {'teacherName': 1, 'lastUpdated': -1}},
+            {'$group': {'_id': '$teacherName', 'domainName': {'$first': '$domainName'}}},
+        ],
+    },
+    {
+        'name': 'leaderboard_top',
+        'endpoint': 'GET /api/leaderboard',
+        'collection': 'teacher_rankings',
+        'kind': 'find',
+        'filter': lambda s: {},
+        'sort': [('totalCitations', -1), ('teacherName', 1)],
+        'limit': 10,
+    },
+    {
+        'name': 'funds_list',
+        'endpoint': 'GET /api/funds',
+        'collection': 'funds',
+        'kind': 'find',
+        'filter': lambda s: {},
+        'sort': [('year', -1), ('createdAt', -1)],
+    },
+    {
+        'name': 'awards_list',
+        'endpoint': 'GET /api/awards',
+        'collection': 'awards',
+        'kind': 'find',
+        'filter': lambda s: {},
+        'sort': [('createdAt', -1)],
+    },
+]
+
+
+def _largest_papers_collection(db):
+    names = [name for name in db.list_collection_names() if name.startswith('papers_')]
+    if not names:
+        return None
+    return max(names, key=lambda name: db[name].estimated_document_count())
+
+
+def resolve_samples(db, papers_collection=None):
+    """Pick real values for the shapes so equality filters hit actual data."""
+    samples = dict(DEFAULT_SAMPLES)
+    teacher = db['teachers'].find_one({}, {'name': 1})
+    if teacher and teacher.get('name'):
+        samples['teacher_name'] = teacher['name']
+    if papers_collection:
+        paper = db[papers_collection].find_one({}, {'title': 1})
+        if paper and paper.get('title'):
+            samples['paper_title'] = paper['title']
+    project = db['yearly_projects'].find_one({}, {'year': 1, 'teacherName': 1, 'projectName': 1})
+    if project:
+        samples['year'] = project.get('year', samples['year'])
+        samples['project_name'] = project.get('projectName', samples['project_name'])
+    domain = db['domains'].find_one({'canonicalDomain': {'$exists': True}}, {'canonicalDomain': 1})
+    if domain and domain.get('canonicalDomain'):
+        samples['domain_name'] = domain['canonicalDomain']
+    return samples
+
+
+def _explain_command(shape, collection_name, samples):
+    if shape['kind'] == 'aggregate':
+        return {'aggregate': collection_name, 'pipeline': shape['pipeline'](samples), 'cursor': {}}
+    if shape['kind'] == 'count':
+        return {'count': collection_name, 'query': shape['filter'](samples)}
+    command = {'find': collection_name, 'filter': shape['filter'](samples)}
+    if shape.get('sort'):
+        command['sort'] = dict(shape['sort'])
+    if shape.get('projection'):
+        command['projection'] = shape['projection']
+    if shape.get('limit'):
+        command['limit'] = shape['limit']
+    return command
+
+
+def _collect(node, key, found):
+    """Gather every value stored under `key` anywhere in an explain document."""
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key:
+                found.append(v)
+            _collect(v, key, found)
+    elif isinstance(node, list):
+        for item in node:
+            _collect(item, key, found)
+    return found
+
+
+def _plan_stages(plan, stages):
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for child_key in ('inputStage', 'queryPlan'):
+            _plan_stages(plan.get(child_key), stages)
+        for child in plan.get('inputStages', []):
+            _plan_stages(child, stages)
+    return stages
+
+
+def _suggest_index(shape, samples):
+    """Equality fields first, then sort fields (the ESR rule); None if nothing to index."""
+    if shape['kind'] == 'aggregate':
+        match = next((stage['$match'] for stage in shape['pipeline'](samples) if '$match' in stage), {})
+        sort = next((list(stage['$sort'].items()) for stage in shape['pipeline'](samples) if '$sort' in stage), [])
+    else:
+        match = shape['filter'](samples)
+        sort = list(shape.get('sort') or [])
+    keys = [(field, 1) for field in match if not field.startswith('$')]
+    keys += [(field, direction) for field, direction in sort if field not in dict(keys)]
+    return keys or None
+
+
+def analyze_explain(explain, shape, samples, collection_name):
+    winning_plans = _collect(explain, 'winningPlan', [])
+    stages = []
+    for plan in winning_plans:
+        _plan_stages(plan, stages)
+    execution = _collect(explain, 'executionStats', [])
+    docs_examined = sum(stats.get('totalDocsExamined', 0) for stats in execution)
+    keys_examined = sum(stats.get('totalKeysExamined', 0) for stats in execution)
+    returned = sum(stats.get('nReturned', 0) for stats in execution)
+    millis = max([stats.get('executionTimeMillis', 0) for stats in execution] or [0])
+    ratio = round(docs_examined / max(returned, 1), 2)
+
+    flags = []
+    if 'COLLSCAN' in stages:
+        flags.append('COLLSCAN')
+    if 'SORT' in stages and shape.get('sort'):
+        flags.append('IN_MEMORY_SORT')
+    if docs_examined >= MIN_DOCS_EXAMINED and ratio > SCAN_RATIO_THRESHOLD:
+        flags.append('HIGH_SCAN_RATIO')
+
+    result = {
+        'stages': stages,
+        'docsExamined': docs_examined,
+        'keysExamined': keys_examined,
+        'nReturned': returned,
+        'docsExaminedPerReturned': ratio,
+        'executionTimeMillis': millis,
+        'flags': flags,
+    }
+    if flags and not shape.get('expected_collscan'):
+        suggestion = _suggest_index(shape, samples)
+        if suggestion:
+            declared = any(dict(keys) == dict(suggestion) for keys, _ in declared_indexes(collection_name))
+            result['suggestedIndex'] = dict(suggestion)
+            # A declared index that is missing only needs POST /admin/indexes/reconcile
+            result['suggestedIndexDeclared'] = declared
+    if shape.get('expected_collscan'):
+        result['note'] = shape['expected_collscan']
+    return result
+
+
+def audit_query_plans(db, shapes=None):
+    """Explain every query shape; returns a report with one entry per shape."""
+    papers_collection = _largest_papers_collection(db)
+    samples = resolve_samples(db, papers_collection)
+    entries = []
+    for shape in shapes or QUERY_SHAPES:
+        collection_name = papers_collection if shape['collection'] == 'papers_*' else shape['collection']
+        entry = {'name': shape['name'], 'endpoint': shape['endpoint'], 'collection': collection_name}
+        if not collection_name:
+            entry['skipped'] = 'no papers_* collections'
+            entries.append(entry)
+            continue
+        try:
+            explain = db.command('explain', _explain_command(shape, collection_name, samples), verbosity='executionStats')
+            entry.update(analyze_explain(explain, shape, samples, collection_name))
+        except Exception as e:
+            entry['error'] = str(e)
+        entry['regression'] = bool(entry.get('flags')) and not shape.get('expected_collscan')
+        entries.append(entry)
+    return {
+        'samples': samples,
+        'shapes': entries,
+        'regressions': [entry['name'] for entry in entries if entry.get('regression')],
+    }
+
+
+def _print_report(report):
+    for entry in report['shapes']:
+        if 'skipped' in entry or 'error' in entry:
+            print(f"{entry['name']:<32} {entry.get('skipped') or 'ERROR: ' + entry['error']}")
+            continue
+        flags = ','.join(entry['flags']) or 'ok'
+        print(f"{entry['name']:<32} {'+'.join(dict.fromkeys(entry['stages'])):<28} "
+              f"examined={entry['docsExamined']:<8} returned={entry['nReturned']:<8} "
+              f"ratio={entry['docsExaminedPerReturned']:<8} {flags}")
+        if 'suggestedIndex' in entry:
+            declared = ' (declared; run index reconcile)' if entry['suggestedIndexDeclared'] else ''
+            print(f"{'':<32} suggest index {entry['suggestedIndex']}{declared}")
+
+
+if __name__ == '__main__':
+    from db_config import get_db
+    audit = audit_query_plans(get_db())
+    _print_report(audit)
+    if '--fail-on-regression' in sys.argv and audit['regressions']:
+        print(f"Query plan regressions: {', '.join(audit['regressions'])}")
+        sys.exit(1)
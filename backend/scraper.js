@@ -5,6 +5,7 @@ const connectDB = require('./config/db');
 const fs = require('fs');
 const mongoose = require('mongoose');
 const { schema: paperSchema } = require('./models/Paper'); // Import the schema only
+const { ingestPublications } = require('./publicationIngest');
 
 // Try to import Citation model, but handle if it's not available
 let Citation;
@@ -552,51 +553,7 @@ async function scrapePaperDetails(page, paperUrl, citationCount, source, year, t
     console.log(details.description || 'N/A');
     console.log('----------------\n');
 
-    // Save to MongoDB
-    try {
-      const PaperModel = getTeacherPaperModel(details.teacherName);
-      // Try to find existing paper
-      const existingPaper = await PaperModel.findOne({ url: details.url });
-      
-      if (existingPaper) {
-        // Update only the changing fields
-        existingPaper.citationCount = details.citationCount;
-        existingPaper.pdfLink = details.pdfLink || existingPaper.pdfLink;
-        existingPaper.description = details.description || existingPaper.description;
-        
-        // Update other fields if they were empty before
-        if (!existingPaper.source && details.source) existingPaper.source = details.source;
-        if (!existingPaper.journal && details.journal) existingPaper.journal = details.journal;
-        if (!existingPaper.conference && details.conference) existingPaper.conference = details.conference;
-        if (!existingPaper.book && details.book) existingPaper.book = details.book;
-        if (!existingPaper.volume && details.volume) existingPaper.volume = details.volume;
-        if (!existingPaper.issue && details.issue) existingPaper.issue = details.issue;
-        if (!existingPaper.pages && details.pages) existingPaper.pages = details.pages;
-        if (!existingPaper.publisher && details.publisher) existingPaper.publisher = details.publisher;
-        if (!existingPaper.publicationDate && details.publicationDate) existingPaper.publicationDate = details.publicationDate;
-        if (!existingPaper.inventors && details.inventors) existingPaper.inventors = details.inventors;
-        if (!existingPaper.patentOffice && details.patentOffice) existingPaper.patentOffice = details.patentOffice;
-        if (!existingPaper.patentNumber && details.patentNumber) existingPaper.patentNumber = details.patentNumber;
-        if (!existingPaper.applicationNumber && details.applicationNumber) existingPaper.applicationNumber = details.applicationNumber;
-        if (!existingPaper.patent && details.patent) existingPaper.patent = details.patent; // Update patent field
-        
-        await existingPaper.save();
-        console.log('[SUCCESS] Successfully updated existing paper in MongoDB');
-        console.log('[INFO] MongoDB Document ID:', existingPaper._id);
-      } else {
-        // Create new paper if it doesn't exist
-        const paper = new PaperModel(details);
-        await paper.save();
-        console.log('[SUCCESS] Successfully saved new paper to MongoDB');
-        console.log('[INFO] MongoDB Document ID:', paper._id);
-      }
-    } catch (error) {
-      console.error('[ERROR] Error saving to MongoDB:', error.message);
-      if (error.name === 'ValidationError') {
-        console.error('Validation errors:', error.errors);
-      }
-    }
-
+    // Persisted in one batch by scrapeAndStorePapers via ingestPublications
     return details;
   } catch (error) {
     console.error(`[ERROR] Error scraping paper details: ${error.message}`);
@@ -819,7 +776,7 @@ async function scrapeAndStorePapers() {
       console.log(`Found ${allPublications.length} publications for ${author.profileUrl}`);
     }
 
-    // Optimize MongoDB operations with individual saves
+    // Store papers with one unordered bulkWrite per teacher, skipping unchanged papers
     if (allPublications.length > 0) {
       console.log('Storing papers in MongoDB...');
       console.log(`Total publications found: ${allPublications.length}`);
@@ -830,108 +787,36 @@ async function scrapeAndStorePapers() {
         await connectDB();
       }
       
-      let savedCount = 0;
-      let updatedCount = 0;
-      let errorCount = 0;
-      
-      // Use individual saves for better error handling
+      const totals = { inserted: 0, updated: 0, unchanged: 0, rejected: 0 };
+      const papersByTeacher = new Map();
       for (const paper of allPublications) {
-        try {
-          if (!paper.title || !paper.url || !paper.teacherName) {
-            console.error('[ERROR] Missing required fields:', {
-              title: paper.title,
-              url: paper.url,
-              teacherName: paper.teacherName
-            });
-            errorCount++;
-            continue;
-          }
-          const PaperModel = getTeacherPaperModel(paper.teacherName);
-          // Check if paper already exists
-          const existingPaper = await PaperModel.findOne({ url: paper.url });
-          if (existingPaper) {
-            // Update existing paper
-            const updateData = {
-              title: paper.title,
-              teacherName: paper.teacherName,
-              authors: paper.authors || 'Unknown Authors',
-              source: paper.source,
-              journal: paper.journal,
-              conference: paper.conference,
-              book: paper.book,
-              year: paper.year,
-              volume: paper.volume,
-              issue: paper.issue,
-              pages: paper.pages,
-              publisher: paper.publisher,
-              description: paper.description,
-              summary: paper.summary,
-              pdfLink: paper.pdfLink,
-              citationCount: paper.citationCount || 0,
-              publicationDate: paper.publicationDate,
-              inventors: paper.inventors,
-              patentOffice: paper.patentOffice,
-              patentNumber: paper.patentNumber,
-              applicationNumber: paper.applicationNumber,
-              patent: paper.patent // Include patent field in update
-            };
-
-            // Only update fields that have values
-            Object.keys(updateData).forEach(key => {
-              if (updateData[key] !== undefined && updateData[key] !== null) {
-                existingPaper[key] = updateData[key];
-              }
-            });
-
-            await existingPaper.save();
-            updatedCount++;
-            console.log(`[UPDATED] Updated paper: ${paper.title}`);
-          } else {
-            // Create new paper with all fields
-            const newPaper = new PaperModel({
-              title: paper.title,
-              url: paper.url,
-              teacherName: paper.teacherName,
-              authors: paper.authors || 'Unknown Authors',
-              source: paper.source || '',
-              journal: paper.journal || '',
-              conference: paper.conference || '',
-              book: paper.book || '',
-              year: paper.year || '',
-              volume: paper.volume || '',
-              issue: paper.issue || '',
-              pages: paper.pages || '',
-              publisher: paper.publisher || '',
-              description: paper.description || '',
-              summary: paper.summary || '',
-              pdfLink: paper.pdfLink || '',
-              citationCount: paper.citationCount || 0,
-              publicationDate: paper.publicationDate || '',
-              inventors: paper.inventors || '',
-              patentOffice: paper.patentOffice || '',
-              patentNumber: paper.patentNumber || '',
-              applicationNumber: paper.applicationNumber || '',
-              patent: paper.patent // Include patent field in new paper
-            });
+        if (!paper || !paper.teacherName) {
+          totals.rejected++;
+          continue;
+        }
+        if (!papersByTeacher.has(paper.teacherName)) papersByTeacher.set(paper.teacherName, []);
+        papersByTeacher.get(paper.teacherName).push(paper);
+      }
 
-            await newPaper.save();
-            savedCount++;
-            console.log(`[SAVED] Saved new paper: ${paper.title}`);
-          }
+      for (const [teacherName, papers] of papersByTeacher) {
+        try {
+          const PaperModel = getTeacherPaperModel(teacherName);
+          await PaperModel.createIndexes();
+          const result = await ingestPublications(PaperModel.collection, papers);
+          for (const key of Object.keys(totals)) totals[key] += result[key];
+          console.log(`[SAVED] ${teacherName}: ${result.inserted} new, ${result.updated} updated, ${result.unchanged} unchanged`);
         } catch (saveError) {
-          errorCount++;
-          console.error(`[ERROR] Error saving paper ${paper.url}:`, saveError.message);
-          if (saveError.name === 'ValidationError') {
-            console.error('Validation errors:', saveError.errors);
-          }
+          totals.rejected += papers.length;
+          console.error(`[ERROR] Error saving papers for ${teacherName}:`, saveError.message);
         }
       }
       
       console.log('\n[SUMMARY] MongoDB Save Summary:');
       console.log('----------------------');
-      console.log(`New papers saved: ${savedCount}`);
-      console.log(`Papers updated: ${updatedCount}`);
-      console.log(`Errors: ${errorCount}`);
+      console.log(`New papers saved: ${totals.inserted}`);
+      console.log(`Papers updated: ${totals.updated}`);
+      console.log(`Papers unchanged: ${totals.unchanged}`);
+      console.log(`Errors: ${totals.rejected}`);
       console.log(`Total processed: ${allPublications.length}`);
       console.log('----------------------\n');
     } else {
@@ -0,0 +1,244 @@
+"""In-memory prefix index for typeahead suggestions.
+
+Each suggestion type (teachers, publications, authors, domains, projects) keeps
+a sorted array of (word-start suffix, entry id) pairs, so "learn" finds
+"Deep Learning for ..." with one binary search and a short range scan. Entries
+carry a popularity weight (citations or frequency) used to rank the range.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+SUGGEST_TYPES = ['teachers', 'publications', 'authors', 'domains', 'projects']
+# Only the first words of long titles are indexed as suffix starts
+MAX_INDEXED_WORDS = 8
+# Entries added since the last build are scanned linearly; rebuild once there are this many
+MAX_PENDING = 2000
+# Rebuild in the background at least this often (writes from the scraper bypass the API)
+SUGGEST_MAX_AGE_SECONDS = 600
+
+
+def normalize_text(text):
+    folded = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', folded).split())
+
+
+class PrefixIndex:
+    """Sorted (suffix, id) pairs over one kind of suggestion.
+
+    The sorted array is static between rebuilds and carries an argmax segment
+    tree over entry weights, so the top-k of a prefix range comes out in
+    O(k log n) however many entries match. Entries added afterwards go to a
+    small pending list that is scanned linearly until the next rebuild.
+    """
+
+    def __init__(self):
+        self.pairs = []
+        self.pending = []
+        self.entries = []
+        self.normalized = []
+        self.by_identity = {}
+        self._weights = []
+        self._tree = []
+
+    def add(self, text, weight, data=None, identity=None, accumulate=False, bulk=False):
+        """Add an entry or update the weight of an existing one (max, or sum if accumulate)."""
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        identity = identity or normalized
+        entry_id = self.by_identity.get(identity)
+        if entry_id is not None:
+            # Weight changes reorder the built array only at the next rebuild
+            entry = self.entries[entry_id]
+            entry['weight'] = entry['weight'] + weight if accumulate else max(entry['weight'], weight)
+            return
+        entry_id = len(self.entries)
+        self.by_identity[identity] = entry_id
+        self.entries.append({'text': str(text).strip(), 'weight': weight, **(data or {})})
+        self.normalized.append(normalized)
+        words = normalized.split(' ')
+        target = self.pairs if bulk else self.pending
+        for position in range(min(len(words), MAX_INDEXED_WORDS)):
+            target.append((' '.join(words[position:]), entry_id))
+
+    def finish_bulk(self):
+        self.pairs.sort()
+        n = len(self.pairs)
+        self._weights = [self.entries[entry_id]['weight'] for _, entry_id in self.pairs]
+        tree = [0] * (2 * n)
+        tree[n:] = range(n)
+        for node in range(n - 1, 0, -1):
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if self._weights[left] >= self._weights[right] else right
+        self._tree = tree
+
+    def _argmax(self, lo, hi):
+        """Position of the heaviest pair in pairs[lo:hi]."""
+        weights, tree, n = self._weights, self._tree, len(self.pairs)
+        best = -1
+        lo += n
+        hi += n
+        while lo < hi:
+            if lo & 1:
+                if best < 0 or weights[tree[lo]] > weights[best]:
+                    best = tree[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                if best < 0 or weights[tree[hi]] > weights[best]:
+                    best = tree[hi]
+            lo >>= 1
+            hi >>= 1
+        return best
+
+    def search(self, prefix, limit):
+        lo = bisect_left(self.pairs, (prefix,))
+        hi = bisect_left(self.pairs, (prefix + '\uffff',))
+        found = []
+        seen = set()
+        # Pop the heaviest pair of a range, then split the range around it
+        ranges = [(-self._weights[p], p, lo, hi) for p in [self._argmax(lo, hi)] if lo < hi]
+        while ranges and len(found) < limit:
+            _, position, start, end = heapq.heappop(ranges)
+            entry_id = self.pairs[position][1]
+            if entry_id not in seen:
+                seen.add(entry_id)
+                found.append(entry_id)
+            for sub_start, sub_end in ((start, position), (position + 1, end)):
+                if sub_start < sub_end:
+                    p = self._argmax(sub_start, sub_end)
+                    heapq.heappush(ranges, (-self._weights[p], p, sub_start, sub_end))
+        found.extend({entry_id for suffix, entry_id in self.pending if suffix.startswith(prefix)} - seen)
+        # Rank by popularity; entries starting with the prefix win ties
+        ranked = sorted(found, key=lambda i: (
+            -self.entries[i]['weight'], not self.normalized[i].startswith(prefix), i
+        ))[:limit]
+        return [dict(self.entries[i]) for i in ranked]
+
+
+class SuggestIndex:
+    """One PrefixIndex per suggestion type, safe for concurrent readers and writers."""
+
+    def __init__(self):
+        self.indexes = {kind: PrefixIndex() for kind in SUGGEST_TYPES}
+        self._lock = threading.Lock()
+
+    def _add_publication(self, paper, bulk=False):
+        from coauthor_graph import split_authors
+        citations = paper.get('citationCount') or 0
+        if not isinstance(citations, (int, float)):
+            citations = 0
+        if paper.get('title'):
+            self.indexes['publications'].add(
+                paper['title'], citations,
+                {'teacherName': paper.get('teacherName'), 'id': str(paper['_id']) if paper.get('_id') else None},
+                identity=paper.get('clusterId'), bulk=bulk
+            )
+        for key, name in split_authors(paper.get('authors')):
+            # Authors rank by how many papers list them
+            self.indexes['authors'].add(name, 1, identity=key, accumulate=True, bulk=bulk)
+
+    def add_publications(self, papers):
+        with self._lock:
+            for paper in papers:
+                self._add_publication(paper)
+
+    def add_teacher(self, name, total_citations=0):
+        with self._lock:
+            self.indexes['teachers'].add(name, total_citations)
+
+    def add_project(self, project):
+        with self._lock:
+            self.indexes['projects'].add(
+                project.get('projectName'), 1,
+                {'teacherName': project.get('teacherName'), 'year': project.get('year')}, accumulate=True
+            )
+
+    @classmethod
+    def from_db(cls, db):
+        index = cls()
+        citations = {
+            row['teacherName']: row.get('totalCitations', 0)
+            for row in db['teacher_rankings'].find({}, {'_id': 0, 'teacherName': 1, 'totalCitations': 1})
+        }
+        for teacher in db['teachers'].find({}, {'_id': 0, 'name': 1}):
+            if teacher.get('name'):
+                index.indexes['teachers'].add(teacher['name'], citations.get(teacher['name'], 0), bulk=True)
+        for name in db.list_collection_names():
+            if name.startswith('papers_'):
+                for paper in db[name].find({}, {'title': 1, 'authors': 1, 'citationCount': 1, 'teacherName': 1, 'clusterId': 1}):
+                    index._add_publication(paper, bulk=True)
+        for row in db['domains'].aggregate([
+            {'$match': {'canonicalDomain': {'$nin': [None, '']}}},
+            {'$group': {'_id': '$canonicalDomain', 'teachers': {'$addToSet': '$teacherName'}}},
+        ]):
+            index.indexes['domains'].add(row['_id'], len(row['teachers']), bulk=True)
+        for project in db['yearly_projects'].find({}, {'_id': 0, 'projectName': 1, 'teacherName': 1, 'year': 1}):
+            index.indexes['projects'].add(
+                project.get('projectName'), 1, {'teacherName': project.get('teacherName'), 'year': project.get('year')},
+                accumulate=True, bulk=True
+            )
+        for prefix_index in index.indexes.values():
+            prefix_index.finish_bulk()
+        return index
+
+    def pending_count(self):
+        return sum(len(prefix_index.pending) for prefix_index in self.indexes.values())
+
+    def suggest(self, prefix, types=None, limit=5):
+        """{type: [suggestion, ...]} for a raw prefix; raises ValueError on unknown types."""
+        unknown = [t for t in types or [] if t not in SUGGEST_TYPES]
+        if unknown:
+            raise ValueError(f'Unknown suggestion types: {unknown}. Use {SUGGEST_TYPES}')
+        normalized = normalize_text(prefix)
+        if not normalized:
+            return {kind: [] for kind in types or SUGGEST_TYPES}
+        with self._lock:
+            return {kind: self.indexes[kind].search(normalized, limit) for kind in types or SUGGEST_TYPES}
+
+
+class SuggestIndexStore:
+    """Current index for this process; stale indexes keep serving while a rebuild runs."""
+
+    def __init__(self, db_getter):
+        self._db_getter = db_getter
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0.0
+        self._stale = False
+        self._rebuilding = False
+
+    def mark_stale(self):
+        self._stale = True
+
+    def _rebuild(self):
+        try:
+            index = SuggestIndex.from_db(self._db_getter())
+            self._index, self._built_at = index, time.monotonic()
+        finally:
+            self._rebuilding = False
+
+    def get(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = SuggestIndex.from_db(self._db_getter())
+                    self._built_at = time.monotonic()
+        elif (self._stale or time.monotonic() - self._built_at > SUGGEST_MAX_AGE_SECONDS
+              or self._index.pending_count() > MAX_PENDING):
+            with self._lock:
+                if not self._rebuilding:
+                    self._stale = False
+                    self._rebuilding = True
+                    thread = threading.Thread(target=self._rebuild, name='suggest-rebuild')
+                    thread.daemon = True
+                    thread.start()
+        return self._index
+
+    def peek(self):
+        """The index if one is loaded, for incremental updates (None before first use)."""
+        return self._index
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import admin_auth  # noqa: E402
+from admin_auth import _b64decode, _b64encode, issue_session_token, verify_session_token  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def session_secret(monkeypatch):
+    monkeypatch.setattr(admin_auth, '_SESSION_SECRET', b'test-secret')
+
+
+def test_valid_token_round_trips():
+    token, expires_at = issue_session_token('admin', ttl_seconds=60)
+    claims = verify_session_token(token)
+    assert claims['sub'] == 'admin' and claims['exp'] == expires_at
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    token, expires_at = issue_session_token('admin', ttl_seconds=60)
+    monkeypatch.setattr(time, 'time', lambda: expires_at + 1)
+    assert verify_session_token(token) is None
+
+
+def test_tampered_claims_are_rejected():
+    token, _ = issue_session_token('admin', ttl_seconds=60)
+    payload, signature = token.split('.')
+    claims = _b64decode(payload).replace(b'"admin"', b'"root"')
+    assert verify_session_token(f'{_b64encode(claims)}.{signature}') is None
+
+
+def test_token_signed_with_another_secret_is_rejected(monkeypatch):
+    token, _ = issue_session_token('admin', ttl_seconds=60)
+    monkeypatch.setattr(admin_auth, '_SESSION_SECRET', b'other-secret')
+    assert verify_session_token(token) is None
+
+
+@pytest.mark.parametrize('token', [None, '', 'no-dot', 'a.b.c', 'abc.!!!'])
+def test_malformed_tokens_are_rejected(token):
+    assert verify_session_token(token) is None
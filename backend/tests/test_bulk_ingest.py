@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_server  # noqa: E402
+from publication_ingest import parse_jsonl  # noqa: E402
+
+
+class PapersCollection:
+    """Just enough of a papers_* collection for ingest_publication_records."""
+
+    def __init__(self, stored=(), write_errors=()):
+        self.stored = list(stored)
+        self.write_errors = list(write_errors)
+        self.operations = []
+
+    def find(self, query, projection=None):
+        return list(self.stored)
+
+    def bulk_write(self, operations, ordered=True):
+        self.operations = operations
+        if self.write_errors:
+            raise BulkWriteError({'writeErrors': self.write_errors, 'nUpserted': len(operations) - len(self.write_errors)})
+        return type('Result', (), {'upserted_count': len(operations), 'matched_count': 0})()
+
+
+@pytest.fixture(autouse=True)
+def no_derived_indexes(monkeypatch):
+    # The co-author graph, suggest and text indexes are refreshed after every write
+    for name in ('update_coauthor_graph', 'update_suggest_index', 'update_text_index'):
+        monkeypatch.setattr(api_server, name, lambda *args, **kwargs: None)
+
+
+def _records(*lines):
+    return parse_jsonl('\n'.join(lines))
+
+
+def test_identical_records_are_skipped():
+    record = '{"title": "A", "url": "https://example.org/a", "citationCount": 2}'
+    doc = api_server.normalize_record({'title': 'A', 'url': 'https://example.org/a', 'citationCount': 2}, 'T')
+    api_server.apply_canonical_publication_fields(doc)
+    stored = {'url': doc['url'], 'title': 'A', 'contentHash': api_server.compute_content_hash(doc)}
+    papers = PapersCollection(stored=[stored])
+    summary = api_server.ingest_publication_records(papers, 'T', _records(record))
+    assert summary == {'inserted': 0, 'updated': 0, 'unchanged': 1, 'rejected': []}
+    assert papers.operations == []
+
+
+def test_write_errors_report_input_positions():
+    papers = PapersCollection(write_errors=[{'index': 1, 'errmsg': 'E11000 duplicate key'}])
+    summary = api_server.ingest_publication_records(papers, 'T', _records(
+        'not json',
+        '{"title": "A", "url": "https://example.org/a"}',
+        '{"url": "https://example.org/untitled"}',
+        '{"title": "B", "url": "https://example.org/b"}',
+    ))
+    # Operation 1 is the record on line 3 (index 3): lines 0 and 2 never became operations
+    assert [r['index'] for r in summary['rejected']] == [0, 2, 3]
+    assert summary['rejected'][0]['reason'].startswith('invalid JSON')
+    assert summary['rejected'][1:] == [{'index': 2, 'reason': 'missing title'},
+                                       {'index': 3, 'reason': 'E11000 duplicate key'}]
+    assert summary['inserted'] == 1
@@ -0,0 +1,36 @@
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+mongomock = pytest.importorskip('mongomock')
+
+from citation_history import (  # noqa: E402
+    HISTORY_COLLECTION, _clip, load_series, record_citation_snapshots, summarize_series
+)
+
+
+def _snapshot(db, total, when):
+    db['citations'].update_one({'teacherName': 'T'}, {'$set': {'citationsPerYear': {'2024': total}}}, upsert=True)
+    return record_citation_snapshots(db, include_papers=False, include_community=False, when=when)
+
+
+def test_samples_are_written_only_when_the_count_changes():
+    db = mongomock.MongoClient()['test']
+    assert _snapshot(db, 10, datetime(2025, 1, 5))['teachers'] == 1
+    assert _snapshot(db, 10, datetime(2025, 1, 6))['teachers'] == 0
+    assert _snapshot(db, 12, datetime(2025, 1, 20))['teachers'] == 1
+    assert _snapshot(db, 12, datetime(2025, 2, 1))['teachers'] == 1  # first sample of a new month
+    buckets = {b['month']: b['counts'] for b in db[HISTORY_COLLECTION].find({'kind': 'teacher'})}
+    assert buckets == {'2025-01': [10, 12], '2025-02': [12]}
+    series = load_series(db, 'teacher', 'T', start=date(2025, 1, 10), end=date(2025, 2, 28))
+    assert summarize_series(series)['delta'] == 2
+
+
+def test_clip_keeps_the_last_sample_before_start_as_baseline():
+    samples = [(date(2025, 1, 1), 5), (date(2025, 1, 10), 7), (date(2025, 2, 1), 9), (date(2025, 3, 1), 11)]
+    assert _clip(samples, date(2025, 1, 15), date(2025, 2, 15)) == [(date(2025, 1, 10), 7), (date(2025, 2, 1), 9)]
+    assert summarize_series([]) == {'series': [], 'first': None, 'last': None, 'delta': None}
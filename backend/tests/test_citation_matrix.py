@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from citation_matrix import CitationMatrix, citation_analytics, growth, moving_average  # noqa: E402
+
+
+@pytest.fixture
+def matrix():
+    return CitationMatrix(
+        ['A', 'B', 'C'], [2020, 2021, 2022, 2023],
+        [[1, 2, 0, 4], [0, 3, 3, 3], [5, 0, 0, 0]],
+        domains={'Cybersecurity': [0, 1], 'Blockchain': [2]}
+    )
+
+
+def test_growth_is_nan_after_a_zero_year():
+    absolute, percent = growth(np.array([[2, 4, 0, 3]]))
+    assert absolute.tolist() == [[2, -4, 3]]
+    assert percent[0, :2].tolist() == [100.0, -100.0] and np.isnan(percent[0, 2])
+
+
+def test_moving_average_aligns_to_window_end():
+    assert moving_average(np.array([[1, 2, 3, 4]]), 2).tolist() == [[1.5, 2.5, 3.5]]
+    assert moving_average(np.array([[1, 2]]), 3).shape == (1, 0)
+
+
+def test_domain_totals_sum_member_teachers(matrix):
+    result = citation_analytics(matrix, metric='totals', by='domain', year_from=2021)
+    assert result['years'] == [2021, 2022, 2023]
+    assert result['series'] == {'Blockchain': [0, 0, 0], 'Cybersecurity': [5, 3, 7]}
+
+
+def test_community_cumulative_and_teacher_subset(matrix):
+    result = citation_analytics(matrix, metric='cumulative', teachers=['A', 'C', 'unknown'])
+    assert result['teachers'] == 2
+    assert result['series'] == {'community': [6, 8, 8, 12]}
+
+
+def test_bad_parameters_raise_value_error(matrix):
+    with pytest.raises(ValueError):
+        citation_analytics(matrix, metric='median')
+    with pytest.raises(ValueError):
+        citation_analytics(matrix, by='faculty')
+
+
+def test_year_axis_is_contiguous():
+    mongomock = pytest.importorskip('mongomock')
+    db = mongomock.MongoClient()['test']
+    db['citations'].insert_many([
+        {'teacherName': 'A', 'citationsPerYear': {'2018': 2, '2021': 4, '1': 99}},
+        {'teacherName': 'B', 'citationsPerYear': {'2020': 1}},
+    ])
+    matrix = CitationMatrix.from_db(db)
+    assert matrix.years.tolist() == [2018, 2019, 2020, 2021]
+    assert matrix.values.tolist() == [[2, 0, 0, 4], [0, 0, 1, 0]]
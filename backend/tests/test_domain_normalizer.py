@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain_normalizer import DEFAULT_SYNONYMS, DomainNormalizer  # noqa: E402
+
+normalizer = DomainNormalizer(DEFAULT_SYNONYMS)
+
+
+def test_variants_match_on_token_boundaries():
+    assert normalizer.normalize('ML for Security') == 'Machine Learning'
+    # 'ml' inside 'html' is not a match
+    assert normalizer.normalize('html rendering') == 'Html Rendering'
+
+
+def test_longest_variant_and_priority_win():
+    assert normalizer.normalize('Cloud  Computing') == 'Cloud Computing'
+    # Both domains are mentioned; the earlier table entry wins
+    assert normalizer.normalize('Machine learning for cyber-security') == 'Cybersecurity'
+
+
+def test_unknown_and_empty_names():
+    assert normalizer.normalize('  quantum networks ') == 'Quantum Networks'
+    assert normalizer.normalize('') == ''
+    assert normalizer.normalize(None) is None
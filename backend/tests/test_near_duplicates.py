@@ -0,0 +1,51 @@
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import (  # noqa: E402
+    SIMILARITY_THRESHOLD, _compatible, _mulmod, minhash, shingles, similarity, title_markers
+)
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_mulmod_matches_exact_arithmetic():
+    p = (1 << 61) - 1
+    rng = random.Random(7)
+    a = [rng.randrange(p) for _ in range(500)] + [p - 1]
+    x = [rng.randrange(p) for _ in range(500)] + [p - 1]
+    result = _mulmod(np.array(a, dtype=np.uint64), np.array(x, dtype=np.uint64))
+    assert [int(r) for r in result] == [i * j % p for i, j in zip(a, x)]
+
+
+def test_signature_similarity_tracks_exact_jaccard():
+    pairs = [
+        ('Intrusion detection using deep learning', 'Intrusion detection using machine learning'),
+        ('A survey of graph neural networks for recommendation', 'Graph neural networks in recommender systems: a survey'),
+        ('Energy efficient routing in wireless sensor networks', 'Energy-efficient routing in wireless sensor networks.'),
+        ('Blockchain based land registry', 'Federated learning on edge devices'),
+    ]
+    for title_a, title_b in pairs:
+        tokens_a, tokens_b = shingles({'title': title_a}), shingles({'title': title_b})
+        estimate = similarity(minhash(tokens_a), minhash(tokens_b))
+        # 64 permutations: standard error is at most 1 / (2 * sqrt(64)) = 0.0625
+        assert abs(estimate - _jaccard(tokens_a, tokens_b)) < 0.2, (title_a, title_b, estimate)
+
+
+def test_distinct_titles_stay_below_threshold():
+    a = shingles({'title': 'Intrusion detection using deep learning'})
+    b = shingles({'title': 'Intrusion detection using machine learning'})
+    assert similarity(minhash(a), minhash(b)) < SIMILARITY_THRESHOLD
+
+
+def test_numbered_parts_are_not_compatible():
+    assert title_markers('IoT security: Part I') == ['i']
+    assert title_markers('IoT security: Part II') == ['ii']
+    assert not _compatible({'markers': ['i']}, {'markers': ['ii']})
+    assert _compatible({'yearInt': 2020, 'markers': []}, {'yearInt': 2021, 'markers': []})
@@ -0,0 +1,45 @@
+import base64
+import json
+import os
+import sys
+
+import pytest
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_server import decode_publication_cursor, encode_publication_cursor  # noqa: E402
+
+
+def _cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def test_cursor_continues_after_the_paper():
+    paper_id = ObjectId()
+    query = decode_publication_cursor(encode_publication_cursor({'_id': paper_id, 'citationCount': 12}))
+    assert query == {'$or': [
+        {'citationCount': {'$lt': 12}},
+        {'citationCount': None},
+        {'citationCount': 12, '_id': {'$gt': paper_id}},
+    ]}
+
+
+def test_cursor_past_the_counted_papers_only_pages_ties():
+    paper_id = ObjectId()
+    query = decode_publication_cursor(encode_publication_cursor({'_id': paper_id}))
+    assert query == {'citationCount': None, '_id': {'$gt': paper_id}}
+
+
+@pytest.mark.parametrize('token', [
+    'not base64 json',
+    _cursor([3]),
+    _cursor([3, 'not-an-object-id']),
+    _cursor([True, str(ObjectId())]),
+    _cursor(['3', str(ObjectId())]),
+    _cursor([{'$gt': 0}, str(ObjectId())]),
+    _cursor([2.5, str(ObjectId())]),
+])
+def test_malformed_cursors_are_rejected(token):
+    with pytest.raises(ValueError):
+        decode_publication_cursor(token)
@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from publication_ingest import (  # noqa: E402
+    compute_content_hash, detect_format, normalize_record, parse_bibtex, parse_csv, parse_jsonl
+)
+
+BIBTEX = """
+@comment{exported from a reference manager}
+@article{sharma2021,
+  title = {Intrusion Detection with {Deep} Learning},
+  author = {Anil Sharma and B. Gupta},
+  journal = "IEEE Access",
+  year = 2021,
+  number = {4},
+}
+@inproceedings{gupta2020,
+  title = {Federated Learning on Edge Devices},
+  author = {B. Gupta},
+  booktitle = {Proceedings of ICML},
+  year = {2020}
+}
+@misc{broken, title = {Unbalanced
+"""
+
+
+def test_parse_bibtex_maps_fields_and_reports_broken_entries():
+    results = list(parse_bibtex(BIBTEX))
+    (article, error_a), (proceedings, error_b), (broken, broken_error) = results
+    assert error_a is None and error_b is None
+    assert article == {'title': 'Intrusion Detection with Deep Learning', 'authors': 'Anil Sharma, B. Gupta',
+                       'journal': 'IEEE Access', 'year': '2021', 'issue': '4'}
+    assert proceedings['conference'] == 'Proceedings of ICML'
+    assert broken is None and broken_error.startswith('invalid BibTeX entry')
+
+
+def test_parse_csv_reads_header_row():
+    text = 'title,url,citationCount\nA paper,https://example.org/a,3\n'
+    assert list(parse_csv(text)) == [({'title': 'A paper', 'url': 'https://example.org/a', 'citationCount': '3'}, None)]
+
+
+def test_parse_jsonl_reports_bad_lines_in_place():
+    results = list(parse_jsonl('{"title": "A"}\n\nnot json\n{"title": "B"}\n'))
+    assert results[0] == ({'title': 'A'}, None)
+    assert results[1][0] is None and results[1][1].startswith('invalid JSON')
+    assert results[2] == ({'title': 'B'}, None)
+
+
+def test_detect_format():
+    assert detect_format('application/x-bibtex') == 'bibtex'
+    assert detect_format('', 'papers.bib') == 'bibtex'
+    assert detect_format('text/csv; charset=utf-8') == 'csv'
+    assert detect_format('application/x-ndjson') == 'jsonl'
+    assert detect_format('application/octet-stream', 'papers.jsonl') == 'jsonl'
+    assert detect_format('text/plain', 'papers.txt') is None
+
+
+def test_content_hash_ignores_whitespace_and_non_content_fields():
+    first = normalize_record({'title': 'A paper ', 'url': 'https://example.org/a', 'citationCount': '3'}, 'T')
+    again = normalize_record({'title': 'A paper', 'url': 'https://example.org/a', 'citationCount': 3}, 'T')
+    assert compute_content_hash(first) == compute_content_hash(again)
+    assert compute_content_hash({**first, 'updatedAt': 'now'}) == compute_content_hash(first)
+    assert compute_content_hash({**first, 'citationCount': 4}) != compute_content_hash(first)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+mongomock = pytest.importorskip('mongomock')
+
+from api_server import compute_teacher_stats  # noqa: E402
+
+
+def test_type_counts_include_papers_without_pubtype():
+    papers = mongomock.MongoClient()['test']['papers_test']
+    papers.insert_many([
+        {'pubType': 'journal', 'citationCount': 4},
+        {'pubType': 'conference', 'citationCount': 1},
+        # Written before the pubType backfill
+        {'source': 'IEEE Access', 'citationCount': 2},
+        {'conference': 'ICML'},
+        {'book': 'Deep Learning'},
+        {'patent': True},
+    ])
+    stats = compute_teacher_stats(papers)
+    assert stats['journal_count'] == 2
+    assert stats['conference_count'] == 2
+    assert stats['book_count'] == 1
+    assert stats['patent_count'] == 1
+    type_counts = sum(stats[f] for f in ('journal_count', 'conference_count', 'book_count', 'patent_count'))
+    assert type_counts == stats['total_papers'] == 6
+    assert stats['total_citations'] == 7
@@ -0,0 +1,373 @@
+"""TF-IDF vector index over publication text for related papers and expert search.
+
+Each paper's title (weighted double), description and summary become a sparse
+TF-IDF row. Rows are stored CSR (paper -> terms) for "related to this paper"
+and CSC (term -> papers) so a query only touches the postings of its own terms.
+Row norms are precomputed, so a cosine query is a few bincounts.
+
+The arrays are written as .npy files and opened with mmap_mode='r', so every
+worker shares one page-cache copy and starts without a rebuild. Papers ingested
+after the build live in a small JSON delta next to the base arrays and are
+scored directly; deletions are recorded there as tombstones.
+
+Builds and delta updates from every worker are serialized by an flock on
+index_dir/.lock.
+"""
+import fcntl
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+INDEX_DIR = os.getenv('TEXT_INDEX_DIR', os.path.join(os.path.dirname(__file__), 'data', 'text_index'))
+# Fold the delta into a fresh base once it holds this many papers
+MAX_DELTA_DOCS = 500
+TITLE_WEIGHT = 2
+# Expert scores add up each teacher's best matching papers, so prolific authors are not favoured
+EXPERT_TOP_PAPERS = 5
+
+_TOKEN = re.compile(r'[a-z][a-z0-9]{2,}')
+STOPWORDS = frozenset("""
+about above after again against all also among and any are based because been before being below between both but
+can could did does doing down during each few for from further had has have having here how however into its itself
+more most new novel other our out over own paper proposed same should some such than that the their them then there
+these they this those through too under until upon using very via was were what when where which while who whom why
+will with within without would your approach method methods results study use used
+""".split())
+
+_ARRAYS = ['idf', 'norms', 'indptr', 'indices', 'data', 'term_indptr', 'term_docs', 'term_data']
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(str(text or '').lower()) if t not in STOPWORDS]
+
+
+def paper_terms(paper):
+    """Term frequencies for a paper: title tokens count TITLE_WEIGHT times."""
+    counts = Counter(tokenize(paper.get('description')) + tokenize(paper.get('summary')))
+    for term in tokenize(paper.get('title')):
+        counts[term] += TITLE_WEIGHT
+    return counts
+
+
+def paper_meta(paper):
+    return {
+        'id': str(paper['_id']),
+        'teacherName': paper.get('teacherName'),
+        'title': paper.get('title'),
+        'year': paper.get('year'),
+        'clusterId': paper.get('clusterId'),
+    }
+
+
+_TEXT_FIELDS = {'title': 1, 'description': 1, 'summary': 1, 'teacherName': 1, 'year': 1, 'clusterId': 1}
+
+
+@contextmanager
+def index_file_lock(index_dir=INDEX_DIR):
+    """Exclusive lock on the index directory, shared by every worker process.
+
+    flock locks belong to the open file, so this is not re-entrant: take it once
+    around a whole build or delta update.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, '.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def build_index(db, index_dir=INDEX_DIR):
+    """Build a new base from every papers_* collection, publish it and clear the delta.
+
+    Callers hold index_file_lock(index_dir).
+    """
+    metas, rows = [], []
+    for name in db.list_collection_names():
+        if name.startswith('papers_'):
+            for paper in db[name].find({}, _TEXT_FIELDS):
+                counts = paper_terms(paper)
+                if counts:
+                    metas.append(paper_meta(paper))
+                    rows.append(counts)
+
+    vocab = sorted({term for counts in rows for term in counts})
+    term_ids = {term: i for i, term in enumerate(vocab)}
+    n_docs = len(rows)
+    indptr = np.zeros(n_docs + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(counts) for counts in rows])
+    indices = np.fromiter((term_ids[t] for counts in rows for t in counts), dtype=np.int32, count=int(indptr[-1]))
+    tf = np.fromiter((c for counts in rows for c in counts.values()), dtype=np.float32, count=int(indptr[-1]))
+    df = np.bincount(indices, minlength=len(vocab))
+    # Smoothed idf, as in scikit-learn
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    data = (1 + np.log(tf)) * idf[indices]
+    doc_of_entry = np.repeat(np.arange(n_docs, dtype=np.int32), np.diff(indptr))
+    norms = np.sqrt(np.bincount(doc_of_entry, weights=data.astype(np.float64) ** 2, minlength=n_docs)).astype(np.float32)
+
+    # Inverted (term -> docs) layout of the same entries
+    order = np.argsort(indices, kind='stable')
+    term_indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    term_indptr[1:] = np.cumsum(df)
+    arrays = {
+        'idf': idf, 'norms': norms, 'indptr': indptr, 'indices': indices, 'data': data.astype(np.float32),
+        'term_indptr': term_indptr, 'term_docs': doc_of_entry[order], 'term_data': data[order].astype(np.float32),
+    }
+
+    version = f'base-{int(time.time() * 1000)}'
+    base_dir = os.path.join(index_dir, version)
+    os.makedirs(base_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(base_dir, f'{name}.npy'), array)
+    with open(os.path.join(base_dir, 'vocab.json'), 'w') as f:
+        json.dump(vocab, f)
+    with open(os.path.join(base_dir, 'docs.json'), 'w') as f:
+        json.dump(metas, f)
+    _write_json(os.path.join(index_dir, 'delta.json'), {'base': version, 'docs': [], 'removed': []})
+    _write_json(os.path.join(index_dir, 'manifest.json'), {'base': version, 'docs': n_docs, 'terms': len(vocab)})
+    with open(os.path.join(index_dir, 'manifest.json')) as f:
+        published = json.load(f)['base']
+    for entry in os.listdir(index_dir):
+        if entry.startswith('base-') and entry != published:
+            # Workers still mapping an old base keep their open file handles
+            shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+    return {'papers': n_docs, 'terms': len(vocab)}
+
+
+def _write_json(path, payload):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+class TextIndex:
+    """A memory-mapped base plus the in-memory delta of papers ingested since."""
+
+    def __init__(self, index_dir, base, delta):
+        self.base = base
+        base_dir = os.path.join(index_dir, base)
+        for name in _ARRAYS:
+            setattr(self, name, np.load(os.path.join(base_dir, f'{name}.npy'), mmap_mode='r'))
+        with open(os.path.join(base_dir, 'vocab.json')) as f:
+            self.vocab = json.load(f)
+        self.term_ids = {term: i for i, term in enumerate(self.vocab)}
+        with open(os.path.join(base_dir, 'docs.json')) as f:
+            self.docs = json.load(f)
+        self.doc_rows = {meta['id']: i for i, meta in enumerate(self.docs)}
+        # Idf of a term no base paper contains (df = 0)
+        self.unseen_idf = math.log(1 + len(self.docs)) + 1
+        self.removed = set(delta.get('removed', []))
+        self.delta_docs = [d['meta'] for d in delta.get('docs', [])]
+        self.delta_vectors = [d['vector'] for d in delta.get('docs', [])]
+        self.delta_norms = [math.sqrt(sum(w * w for w in v.values())) or 1.0 for v in self.delta_vectors]
+        self.delta_rows = {meta['id']: i for i, meta in enumerate(self.delta_docs)}
+
+    def vectorize(self, counts):
+        """{term: tf-idf weight} using the base idf (terms new since the build get the maximum idf)."""
+        return {
+            term: float((1 + math.log(count)) * (self.idf[self.term_ids[term]] if term in self.term_ids else self.unseen_idf))
+            for term, count in counts.items()
+        }
+
+    def _vector_for(self, paper_id):
+        if paper_id in self.delta_rows:
+            return self.delta_vectors[self.delta_rows[paper_id]]
+        row = self.doc_rows.get(paper_id)
+        if row is None:
+            return None
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return {self.vocab[t]: w for t, w in zip(self.indices[start:end].tolist(), self.data[start:end].tolist())}
+
+    def _scores(self, vector):
+        """Cosine similarity of a query vector to every base and delta paper."""
+        query_norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        postings_docs, postings_weights = [], []
+        for term, weight in vector.items():
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_indptr[term_id], self.term_indptr[term_id + 1]
+            postings_docs.append(self.term_docs[start:end])
+            postings_weights.append(self.term_data[start:end] * weight)
+        base = np.zeros(len(self.docs), dtype=np.float64)
+        if postings_docs:
+            base = np.bincount(np.concatenate(postings_docs), weights=np.concatenate(postings_weights),
+                               minlength=len(self.docs))
+        base = np.divide(base, np.asarray(self.norms) * query_norm, out=np.zeros_like(base), where=np.asarray(self.norms) > 0)
+        delta = np.array([
+            sum(w * doc.get(t, 0.0) for t, w in vector.items()) / (norm * query_norm)
+            for doc, norm in zip(self.delta_vectors, self.delta_norms)
+        ], dtype=np.float64)
+        return base, delta
+
+    def _ranked(self, vector, limit, exclude=()):
+        """(meta, score) pairs, best first, skipping removed papers and `exclude` ids or clusters."""
+        base, delta = self._scores(vector)
+        candidates = []
+        # Over-fetch so filtering removed and excluded papers still leaves `limit`
+        want = min(len(base), limit * 4 + len(self.removed) + len(exclude))
+        if want:
+            top = np.argpartition(-base, want - 1)[:want]
+            # Removed base papers (deleted, or superseded by a delta entry) are skipped
+            candidates.extend((self.docs[i], float(base[i])) for i in top if base[i] > 0 and self.docs[i]['id'] not in self.removed)
+        candidates.extend((meta, float(score)) for meta, score in zip(self.delta_docs, delta.tolist()) if score > 0)
+        candidates.sort(key=lambda item: -item[1])
+        ranked = []
+        for meta, score in candidates:
+            if meta['id'] in exclude or (meta.get('clusterId') and meta['clusterId'] in exclude):
+                continue
+            ranked.append((meta, score))
+            if len(ranked) == limit:
+                break
+        return ranked
+
+    def related(self, paper_id, limit=10):
+        """Papers most similar to paper_id (its near-duplicates excluded); None if unknown."""
+        if paper_id in self.removed and paper_id not in self.delta_rows:
+            return None
+        vector = self._vector_for(paper_id)
+        if vector is None:
+            return None
+        meta = self.delta_docs[self.delta_rows[paper_id]] if paper_id in self.delta_rows else self.docs[self.doc_rows[paper_id]]
+        exclude = {paper_id} | ({meta['clusterId']} if meta.get('clusterId') else set())
+        return [{**m, 'score': round(s, 4)} for m, s in self._ranked(vector, limit, exclude)]
+
+    def experts(self, query, limit=10, papers_per_teacher=3):
+        """Teachers ranked by the summed relevance of their best matching papers."""
+        vector = self.vectorize(Counter(tokenize(query)))
+        if not vector:
+            return []
+        by_teacher = {}
+        for meta, score in self._ranked(vector, max(limit * 50, 500)):
+            if meta.get('teacherName'):
+                by_teacher.setdefault(meta['teacherName'], []).append((meta, score))
+        experts = []
+        for teacher_name, matches in by_teacher.items():
+            experts.append({
+                'teacherName': teacher_name,
+                'score': round(sum(score for _, score in matches[:EXPERT_TOP_PAPERS]), 4),
+                'matchingPapers': len(matches),
+                'topPapers': [{'title': m['title'], 'year': m['year'], 'score': round(s, 4)} for m, s in matches[:papers_per_teacher]],
+            })
+        experts.sort(key=lambda e: -e['score'])
+        return experts[:limit]
+
+
+class TextIndexStore:
+    """Per-process handle on the on-disk index; reopens it when another worker publishes."""
+
+    def __init__(self, db_getter, index_dir=INDEX_DIR):
+        self._db_getter = db_getter
+        self._dir = index_dir
+        self._lock = threading.Lock()
+        self._index = None
+        self._stamp = None
+
+    def _paths(self):
+        return os.path.join(self._dir, 'manifest.json'), os.path.join(self._dir, 'delta.json')
+
+    def _current_stamp(self):
+        try:
+            return tuple(os.stat(path).st_mtime_ns for path in self._paths())
+        except OSError:
+            return None
+
+    def _open_locked(self):
+        stamp = self._current_stamp()
+        if stamp is None:
+            with index_file_lock(self._dir):
+                # Another worker may have built it while this one waited for the lock
+                if self._current_stamp() is None:
+                    build_index(self._db_getter(), self._dir)
+            stamp = self._current_stamp()
+        manifest_path, delta_path = self._paths()
+        for attempt in range(3):
+            with open(manifest_path) as f:
+                base = json.load(f)['base']
+            with open(delta_path) as f:
+                delta = json.load(f)
+            if delta.get('base') != base:
+                delta = {'docs': [], 'removed': []}
+            try:
+                index = TextIndex(self._dir, base, delta)
+                break
+            except FileNotFoundError:
+                # A newer base was published (and this one removed) between the reads
+                if attempt == 2:
+                    raise
+                stamp = self._current_stamp()
+        self._index, self._stamp = index, stamp
+        return self._index
+
+    def get(self):
+        if self._index is not None and self._current_stamp() == self._stamp:
+            return self._index
+        with self._lock:
+            if self._index is not None and self._current_stamp() == self._stamp:
+                return self._index
+            return self._open_locked()
+
+    def rebuild(self):
+        with self._lock:
+            with index_file_lock(self._dir):
+                result = build_index(self._db_getter(), self._dir)
+            self._open_locked()
+        return result
+
+    def _update_delta(self, change):
+        """Apply change(delta dict) to delta.json and reopen; rebuild when the delta is large.
+
+        The read-modify-write runs under the file lock and against the published
+        base, so concurrent ingests in other workers are not lost.
+        """
+        with self._lock:
+            if self._index is None:
+                self._open_locked()
+            with index_file_lock(self._dir):
+                if self._current_stamp() != self._stamp:
+                    # Another worker changed the delta or published a new base
+                    self._open_locked()
+                index = self._index
+                manifest_path, delta_path = self._paths()
+                with open(delta_path) as f:
+                    delta = json.load(f)
+                if delta.get('base') != index.base:
+                    delta = {'base': index.base, 'docs': [], 'removed': []}
+                change(index, delta)
+                if len(delta['docs']) > MAX_DELTA_DOCS:
+                    build_index(self._db_getter(), self._dir)
+                else:
+                    _write_json(delta_path, delta)
+            self._open_locked()
+
+    def add_papers(self, papers):
+        """Add (or replace) ingested papers in the delta."""
+        def change(index, delta):
+            ids = set()
+            for paper in papers:
+                vector = index.vectorize(paper_terms(paper))
+                if vector and paper.get('_id') is not None:
+                    meta = paper_meta(paper)
+                    ids.add(meta['id'])
+                    delta['docs'] = [d for d in delta['docs'] if d['meta']['id'] != meta['id']]
+                    delta['docs'].append({'meta': meta, 'vector': vector})
+            # A re-ingested base paper is superseded by its delta entry
+            delta['removed'] = sorted(set(delta['removed']) | {i for i in ids if i in index.doc_rows})
+        self._update_delta(change)
+
+    def remove_paper(self, paper_id):
+        def change(index, delta):
+            delta['docs'] = [d for d in delta['docs'] if d['meta']['id'] != paper_id]
+            if paper_id in index.doc_rows:
+                delta['removed'] = sorted(set(delta['removed']) | {paper_id})
+        self._update_delta(change)
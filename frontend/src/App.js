@@ -30,6 +30,7 @@ function AppRoutes() {
       const last = Number(localStorage.getItem('adminLastActivity') || '0');
       if (isAdmin && last > 0 && Date.now() - last > SESSION_TIMEOUT_MS) {
         localStorage.removeItem('isAdminLoggedIn');
+        localStorage.removeItem('adminToken');
         localStorage.removeItem('adminLoginTime');
         localStorage.removeItem('adminLastActivity');
       }
@@ -1,11 +1,47 @@
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
+import axios from "axios";
 import "./navbar.css";
 
+const SUGGEST_DEBOUNCE_MS = 120;
+const SUGGESTION_LABELS = {
+  teachers: "Faculty",
+  publications: "Publications",
+  authors: "Authors",
+  domains: "Domains",
+  projects: "Projects",
+};
+
 const Navbar = () => {
   const [searchQuery, setSearchQuery] = useState("");
+  const [suggestions, setSuggestions] = useState({});
   const navigate = useNavigate();
 
+  // Typeahead: ask /api/suggest once typing pauses, cancelling the previous request
+  useEffect(() => {
+    const prefix = searchQuery.trim();
+    if (prefix.length < 2) {
+      setSuggestions({});
+      return undefined;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const res = await axios.get("http://localhost:5000/api/suggest", {
+          params: { prefix, limit: 4 },
+          signal: controller.signal,
+        });
+        setSuggestions(res.data.suggestions || {});
+      } catch (err) {
+        if (!axios.isCancel(err)) setSuggestions({});
+      }
+    }, SUGGEST_DEBOUNCE_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchQuery]);
+
   const handleSearch = (e) => {
     e.preventDefault();
     if (searchQuery.trim()) {
@@ -14,6 +50,20 @@ const Navbar = () => {
     }
   };
 
+  const handleSuggestionClick = (type, item) => {
+    if (type === "teachers") {
+      navigate(`/teachers/${encodeURIComponent(item.text)}`);
+    } else if (type === "publications" && item.teacherName) {
+      // Publication detail pages are keyed by title
+      navigate(`/teachers/${encodeURIComponent(item.teacherName)}/publications/${encodeURIComponent(item.text)}`);
+    } else {
+      navigate(`/search?q=${encodeURIComponent(item.text)}`);
+    }
+    setSearchQuery("");
+  };
+
+  const hasSuggestions = Object.values(suggestions).some((items) => items && items.length);
+
   const handleKeyPress = (e) => {
     if (e.key === "Enter") {
       handleSearch(e);
@@ -38,10 +88,33 @@ const Navbar = () => {
               value={searchQuery}
               onChange={(e) => setSearchQuery(e.target.value)}
               onKeyPress={handleKeyPress}
+              onBlur={() => setSuggestions({})}
             />
             <button type="submit" className="search-button">
             <img src="/search.png" alt="Search" />
             </button>
+            {hasSuggestions && (
+              <ul className="search-suggestions">
+                {Object.entries(suggestions).map(([type, items]) =>
+                  items && items.length ? (
+                    <li key={type} className="search-suggestion-group">
+                      <span className="search-suggestion-label">{SUGGESTION_LABELS[type] || type}</span>
+                      <ul>
+                        {items.map((item, i) => (
+                          <li
+                            key={`${type}-${i}`}
+                            className="search-suggestion"
+                            onMouseDown={() => handleSuggestionClick(type, item)}
+                          >
+                            {item.text}
+                          </li>
+                        ))}
+                      </ul>
+                    </li>
+                  ) : null
+                )}
+              </ul>
+            )}
           </form>
         </div>
         <div className="nav-center">
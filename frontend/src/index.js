@@ -21,6 +21,12 @@ axios.interceptors.request.use((config) => {
     }
     // If request URL is relative, Axios will prepend defaults.baseURL
   }
+  // Attach the admin session token issued by /admin/login
+  const adminToken = localStorage.getItem('adminToken');
+  if (adminToken && !config.headers?.Authorization) {
+    config.headers = config.headers || {};
+    config.headers.Authorization = `Bearer ${adminToken}`;
+  }
   return config;
 });
 
@@ -230,6 +230,7 @@ const AdminPage = () => {
       console.log('🚪 Logging out user');
       setIsLoggedIn(false);
       localStorage.removeItem('isAdminLoggedIn');
+      localStorage.removeItem('adminToken');
       localStorage.removeItem('adminLoginTime');
       setShowChangePassword(false);
       setView('login'); // Direct redirect to login page
@@ -504,6 +505,7 @@ const AdminPage = () => {
       if (response.data.success) {
         setIsLoggedIn(true);
         localStorage.setItem('isAdminLoggedIn', 'true');
+        localStorage.setItem('adminToken', response.data.token);
         localStorage.setItem('adminLoginTime', new Date().toISOString());
         setLoginUsername("");
         setLoginPassword("");
@@ -529,6 +531,7 @@ const AdminPage = () => {
   const handleLogout = () => {
     setIsLoggedIn(false);
     localStorage.removeItem('isAdminLoggedIn');
+    localStorage.removeItem('adminToken');
     localStorage.removeItem('adminLoginTime');
     if (timeoutRef.current) {
       clearTimeout(timeoutRef.current);
@@ -1074,8 +1077,11 @@ const AdminPage = () => {
           }
           try {
             const API_BASE = process.env.REACT_APP_API_URL || '';
-            const res = await axios.post(`${API_BASE}/admin/reset_password`, {
+            // The answers are verified again by the request that sets the password
+            const res = await axios.post(`${API_BASE}/admin/forgot_password`, {
               username: forgotUsername,
+              answer1: forgotAnswer1,
+              answer2: forgotAnswer2,
               newPassword: resetPassword,
             });
             if (res.data.success) {
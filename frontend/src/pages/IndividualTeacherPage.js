@@ -8,6 +8,11 @@ import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContai
 import { BarChart, Bar, Cell } from 'recharts';
 //
 
+// Convert the citations section to the [{ year, citations }] series recharts expects
+const toCitationSeries = (perYear) => Object.entries(perYear)
+    .map(([year, count]) => ({ year: parseInt(year), citations: Number(count) }))
+    .sort((a, b) => a.year - b.year);
+
 const IndividualTeacherPage = () => {
     const { teacherId } = useParams();
     const navigate = useNavigate();
@@ -29,18 +34,39 @@ const IndividualTeacherPage = () => {
     const fetchTeacherData = useCallback(async () => {
         try {
             setLoading(true);
-            // Fetch teacher details
-            const teacherResponse = await axios.get(`http://localhost:5000/teachers/${teacherId}`);
-            setTeacher(teacherResponse.data.teacher);
-            // Fetch publications
-            const pubsResponse = await axios.get(`http://localhost:5000/teachers/${teacherId}/publications`);
-            setPublications(pubsResponse.data.publications || []);
+            setCitationsLoading(true);
+            setStatsLoading(true);
+            setCitationsError("");
+            setStatsError("");
+            // Teacher, publications, citations and stats in a single request
+            const res = await axios.get(`http://localhost:5000/teachers/${teacherId}/profile`, {
+                params: { include: 'stats,citations,publications' }
+            });
+            setTeacher(res.data.teacher);
+            setPublications(res.data.publications.publications || []);
+            setStats(res.data.stats);
+            const citations = res.data.citations || {};
+            const perYear = citations.citationsPerYear || {};
+            setCitationsData(toCitationSeries(perYear));
+            setCitationsInfo({
+                totalCitations: citations.totalCitations,
+                lastUpdated: citations.lastUpdated,
+                hIndex: citations.hIndex,
+                i10Index: citations.i10Index
+            });
+            if (Object.keys(perYear).length === 0) {
+                setCitationsError("No citation data available. Citations may not have been scraped yet.");
+            }
             setError("");
         } catch (error) {
             console.error("Error fetching teacher data:", error);
             setError("Failed to load teacher information. Please try again later.");
+            setCitationsError("Failed to load citation data. Citations may not have been scraped yet.");
+            setStatsError("Failed to load stats.");
         } finally {
             setLoading(false);
+            setCitationsLoading(false);
+            setStatsLoading(false);
         }
     }, [teacherId]);
 
@@ -48,54 +74,6 @@ const IndividualTeacherPage = () => {
         fetchTeacherData();
     }, [fetchTeacherData]);
 
-    useEffect(() => {
-        const fetchCitations = async () => {
-            setCitationsLoading(true);
-            setCitationsError("");
-            try {
-                // Only fetch the already scraped data
-                const res = await axios.get(`http://localhost:5000/teachers/${teacherId}/citations/scraped`);
-                const perYear = res.data.citationsPerYear || {};
-                // Convert to array for recharts: [{ year, citations }]
-                const arr = Object.entries(perYear)
-                    .map(([year, citations]) => ({ year: parseInt(year), citations: Number(citations) }))
-                    .sort((a, b) => a.year - b.year);
-                setCitationsData(arr);
-                setCitationsInfo({
-                    totalCitations: res.data.totalCitations,
-                    lastUpdated: res.data.lastUpdated,
-                    hIndex: res.data.hIndex,
-                    i10Index: res.data.i10Index
-                });
-                if (Object.keys(perYear).length === 0) {
-                    setCitationsError("No citation data available. Citations may not have been scraped yet.");
-                }
-            } catch (err) {
-                console.error("Error fetching citations:", err);
-                setCitationsError("Failed to load citation data. Citations may not have been scraped yet.");
-            } finally {
-                setCitationsLoading(false);
-            }
-        };
-        fetchCitations();
-    }, [teacherId]);
-
-    useEffect(() => {
-        const fetchStats = async () => {
-            setStatsLoading(true);
-            setStatsError("");
-            try {
-                const res = await axios.get(`http://localhost:5000/teachers/${teacherId}/stats`);
-                setStats(res.data);
-            } catch (err) {
-                setStatsError("Failed to load stats.");
-            } finally {
-                setStatsLoading(false);
-            }
-        };
-        fetchStats();
-    }, [teacherId]);
-
     const handleShowMore = () => {
         setDisplayCount(prev => prev + 20);
     };